@@ -54,5 +54,9 @@ setup(
 
     install_requires=[
         'pyfiglet>=0.7.5'
-    ]
+    ],
+
+    extras_require={
+        'numpy': ['numpy'],
+    },
 )
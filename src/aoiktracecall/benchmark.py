@@ -0,0 +1,193 @@
+# coding: utf-8
+"""
+Benchmark wrapper overhead of method attribute access and method call.
+
+Each wrapper mode wraps a fresh class's method with a no-op handler, so the
+timings show the cost of the wrapper itself, without printing.
+
+Usage:
+    python -m aoiktracecall.benchmark [options]
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+import sys
+import timeit
+
+# Internal imports
+from aoiktracecall.config import get_config
+from aoiktracecall.config import set_config
+from aoiktracecall.wrap import wrap_class_attrs
+
+
+# Wrapper modes.
+# Tuple of mode name, `WRAP_USING_WRAPPER_CLASS` value and
+# `WRAP_PRESERVE_SIGNATURE` value, or None for the unwrapped method.
+_MODES = (
+    ('unwrapped', None, None),
+    ('wrapper_class', True, False),
+    ('auto', 'auto', False),
+    ('plain_function', False, False),
+    ('signature', 'auto', True),
+)
+
+
+def _create_class():
+    # Create a fresh class each time because a class is wrapped only once
+    class Sample(object):
+
+        def add(self, value):
+            return value + 1
+
+    #
+    return Sample
+
+
+def _noop_filter(info):
+    # Wrap only the class and its `add` method
+    if info.get('info_type') == 'class' or info.get('attr_name') == 'add':
+        return info
+    else:
+        return False
+
+
+def _noop_handler(info):
+    return info
+
+
+def create_instance(mode):
+    """
+    Create instance of a class whose method is wrapped in given mode.
+
+    :param mode: Mode name.
+
+    :return: Instance.
+    """
+    # Get mode info
+    for mode_name, using_wrapper_class, preserve_signature in _MODES:
+        if mode_name == mode:
+            break
+    else:
+        raise ValueError(mode)
+
+    # Create class
+    cls = _create_class()
+
+    # If need wrap
+    if using_wrapper_class is not None:
+        # Store old configs
+        old_config_s = (
+            get_config('WRAP_USING_WRAPPER_CLASS'),
+            get_config('WRAP_PRESERVE_SIGNATURE'),
+        )
+
+        # Set configs
+        set_config('WRAP_USING_WRAPPER_CLASS', using_wrapper_class)
+
+        set_config('WRAP_PRESERVE_SIGNATURE', preserve_signature)
+
+        try:
+            # Wrap the class's method
+            wrap_class_attrs(
+                cls,
+                filter=_noop_filter,
+                handler=_noop_handler,
+                module=sys.modules[__name__],
+            )
+        finally:
+            # Restore old configs
+            set_config('WRAP_USING_WRAPPER_CLASS', old_config_s[0])
+
+            set_config('WRAP_PRESERVE_SIGNATURE', old_config_s[1])
+
+    # Return instance
+    return cls()
+
+
+def run_benchmark(number=100000, repeat=5):
+    """
+    Run benchmark of each wrapper mode.
+
+    :param number: Number of operations per timing.
+
+    :param repeat: Number of timings, of which the best is used.
+
+    :return: List of tuples of mode name, attribute access time per \
+        operation and method call time per operation, in seconds.
+    """
+    # Result list
+    result_s = []
+
+    # For each mode
+    for mode_name, _, _ in _MODES:
+        # Create instance
+        obj = create_instance(mode_name)
+
+        # Get bound method
+        method = obj.add
+
+        # Time attribute access
+        access_time = min(timeit.Timer(
+            lambda: obj.add
+        ).repeat(number=number, repeat=repeat)) / number
+
+        # Time method call on instance
+        call_time = min(timeit.Timer(
+            lambda: method(1)
+        ).repeat(number=number, repeat=repeat)) / number
+
+        # Add result
+        result_s.append((mode_name, access_time, call_time))
+
+    # Return result list
+    return result_s
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.benchmark',
+        description='Benchmark wrapper overhead of method access and call.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '-n', '--number',
+        dest='number',
+        type=int,
+        default=100000,
+        help='Number of operations per timing.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '-r', '--repeat',
+        dest='repeat',
+        type=int,
+        default=5,
+        help='Number of timings, of which the best is used.',
+    )
+
+    # Parse arguments
+    args = parser.parse_args(args)
+
+    # Run benchmark
+    result_s = run_benchmark(number=args.number, repeat=args.repeat)
+
+    # Print header
+    print('{:<16}{:>14}{:>14}'.format('mode', 'access (ns)', 'call (ns)'))
+
+    # For each result
+    for mode_name, access_time, call_time in result_s:
+        # Print result
+        print('{:<16}{:>14.1f}{:>14.1f}'.format(
+            mode_name, access_time * 1e9, call_time * 1e9
+        ))
+
+    #
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
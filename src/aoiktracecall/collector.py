@@ -0,0 +1,343 @@
+# coding: utf-8
+"""
+Trace event collector.
+
+Receives trace events sent by `plugin.socket_plugin.SocketEventSender` over a
+Unix domain socket, and writes them to per-process event files in the output
+directory, together with an index file summarizing the events.
+
+Usage:
+    python -m aoiktracecall.collector --socket PATH --output DIR
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+import json
+import os
+import select
+import socket
+import sys
+import threading
+
+# Internal imports
+from aoiktracecall.plugin.socket_plugin import decode_frames
+
+
+# Index file name in output directory
+INDEX_FILE_NAME = 'index.json'
+
+
+def get_event_file_name(pid):
+    """
+    Get event file name of given process.
+
+    :param pid: Process ID.
+
+    :return: File name.
+    """
+    return 'events.{}.jsonl'.format(pid)
+
+
+class TraceCollector(object):
+    """
+    Collector server.
+
+    Each received event is written as a JSON line to the sending process'
+    event file. Events of one process are written in receive order, which is
+    timestamp order, so the files can be merged with `aoiktracecall.merge`.
+
+    The index file maps each process ID to its event file and event count,
+    and each URI to its event count.
+    """
+
+    def __init__(self, socket_path, output_dir, recv_size=256 * 1024):
+        #
+        self.socket_path = socket_path
+
+        #
+        self.output_dir = output_dir
+
+        #
+        self.recv_size = recv_size
+
+        #
+        self.event_count = 0
+
+        # Map process ID to event count
+        self._pid_event_counts = {}
+
+        # Map URI to event count
+        self._uri_event_counts = {}
+
+        # Map process ID to event file
+        self._event_files = {}
+
+        # Map client socket to tuple of receive buffer and URI table
+        self._clients = {}
+
+        #
+        self._server_socket = None
+
+        #
+        self._stopped = threading.Event()
+
+    def start(self):
+        """
+        Create output directory and listening socket.
+
+        :return: None.
+        """
+        # If output directory not exists
+        if not os.path.isdir(self.output_dir):
+            # Create output directory
+            os.makedirs(self.output_dir)
+
+        # If socket file exists
+        if os.path.exists(self.socket_path):
+            # Remove stale socket file
+            os.remove(self.socket_path)
+
+        # Create server socket
+        self._server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # Bind socket path
+        self._server_socket.bind(self.socket_path)
+
+        # Listen
+        self._server_socket.listen(128)
+
+    def serve_forever(self, poll_interval=0.5):
+        """
+        Serve until `shutdown` is called.
+
+        :param poll_interval: Interval in seconds to check for shutdown.
+
+        :return: None.
+        """
+        # If not started
+        if self._server_socket is None:
+            # Start
+            self.start()
+
+        #
+        try:
+            # While not stopped
+            while not self._stopped.is_set():
+                # Get sockets to read
+                read_socket_s = [self._server_socket] + list(self._clients)
+
+                # Wait for readable sockets
+                readable_s, _, _ = select.select(
+                    read_socket_s, [], [], poll_interval
+                )
+
+                # For each readable socket
+                for sock in readable_s:
+                    # If is server socket
+                    if sock is self._server_socket:
+                        # Accept client
+                        client_socket, _ = sock.accept()
+
+                        # Add client
+                        self._clients[client_socket] = (bytearray(), {})
+
+                    # If is client socket
+                    else:
+                        # Receive from client
+                        self._receive(sock)
+        finally:
+            # Close sockets and files, and write index file
+            self._close()
+
+    def shutdown(self):
+        """
+        Stop serving. Can be called from another thread.
+
+        :return: None.
+        """
+        self._stopped.set()
+
+    def _receive(self, client_socket):
+        # Get receive buffer and URI table of the client
+        buffer, uri_table = self._clients[client_socket]
+
+        #
+        try:
+            # Receive data
+            data = client_socket.recv(self.recv_size)
+        except (IOError, OSError):
+            # Treat as closed
+            data = b''
+
+        # If the client has closed
+        if not data:
+            # Remove client
+            del self._clients[client_socket]
+
+            # Close client socket
+            client_socket.close()
+
+            # Return
+            return
+
+        # Add data to buffer
+        buffer += data
+
+        #
+        try:
+            # Decode complete frames
+            event_s, decoded_size = decode_frames(buffer, uri_table)
+        except ValueError:
+            # Drop the client sending invalid data
+            del self._clients[client_socket]
+
+            # Close client socket
+            client_socket.close()
+
+            # Return
+            return
+
+        # Remove decoded data from buffer
+        del buffer[:decoded_size]
+
+        # Write events
+        self._write_events(event_s)
+
+    def _write_events(self, event_s):
+        # For each event
+        for event in event_s:
+            # Get process ID
+            pid = event['pid']
+
+            # Get event file
+            event_file = self._event_files.get(pid, None)
+
+            # If event file is not opened
+            if event_file is None:
+                # Open event file
+                event_file = self._event_files[pid] = open(
+                    os.path.join(self.output_dir, get_event_file_name(pid)),
+                    'a',
+                )
+
+            # Write event
+            event_file.write(json.dumps(event) + '\n')
+
+            # Update counts
+            self.event_count += 1
+
+            self._pid_event_counts[pid] = \
+                self._pid_event_counts.get(pid, 0) + 1
+
+            uri = event['uri']
+
+            self._uri_event_counts[uri] = \
+                self._uri_event_counts.get(uri, 0) + 1
+
+    def _close(self):
+        # For each client socket
+        for client_socket in list(self._clients):
+            # Not wait for clients still connected
+            client_socket.setblocking(False)
+
+            # Receive remaining data.
+            # The client is removed when no more data is available.
+            while client_socket in self._clients:
+                self._receive(client_socket)
+
+        # If server socket is created
+        if self._server_socket is not None:
+            # Close server socket
+            self._server_socket.close()
+
+            #
+            self._server_socket = None
+
+            # Remove socket file
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        # For each event file
+        for event_file in self._event_files.values():
+            # Close event file
+            event_file.close()
+
+        #
+        self._event_files = {}
+
+        # Write index file
+        self.write_index()
+
+    def write_index(self):
+        """
+        Write index file.
+
+        :return: None.
+        """
+        # Get index
+        index = {
+            'event_count': self.event_count,
+            'processes': dict(
+                (str(pid), {
+                    'event_file': get_event_file_name(pid),
+                    'event_count': count,
+                })
+                for pid, count in self._pid_event_counts.items()
+            ),
+            'uris': self._uri_event_counts,
+        }
+
+        # Open index file
+        with open(
+            os.path.join(self.output_dir, INDEX_FILE_NAME), 'w'
+        ) as index_file:
+            # Write index
+            json.dump(index, index_file, indent=4, sort_keys=True)
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.collector',
+        description='Collect trace events sent over a Unix domain socket.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--socket',
+        dest='socket_path',
+        required=True,
+        help='Unix domain socket path to listen on.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--output',
+        dest='output_dir',
+        required=True,
+        help='Output directory of event files and index file.',
+    )
+
+    # Parse arguments
+    parsed_args = parser.parse_args(args)
+
+    # Create collector
+    collector = TraceCollector(
+        socket_path=parsed_args.socket_path,
+        output_dir=parsed_args.output_dir,
+    )
+
+    #
+    try:
+        # Serve until interrupted
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    # Return exit code
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,804 @@
+# coding: utf-8
+"""
+Columnar export of traced calls for analysis with NumPy.
+
+Each call is a row with columns `uri_id`, `pid`, `thread_id`, `level`,
+`start_ns`, `end_ns` and `count`. Rows are written in chunks. Each chunk is a
+directory containing one `.npy` file per column, which can be loaded with
+`numpy.load`. The output directory's `meta.json` lists the columns, the
+chunks, and the URIs indexed by `uri_id`.
+
+Writing does not need NumPy. Loading memory-maps the column files if NumPy is
+available, and otherwise reads them into `array.array` objects. The analysis
+helpers need NumPy.
+
+Usage:
+    python -m aoiktracecall.columnar -o DIR PATH [PATH ...]
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+from array import array
+import ast
+import json
+import os
+import struct
+import sys
+
+# Internal imports
+from aoiktracecall.query import get_event_file_paths
+from aoiktracecall.query import iter_calls
+from aoiktracecall.store import TraceStore
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Meta file name in output directory
+META_FILE_NAME = 'meta.json'
+
+# Meta file format version
+_META_FORMAT_VERSION = 1
+
+# List of column name and `.npy` dtype descr
+COLUMNS = [
+    ('uri_id', '<i4'),
+    ('pid', '<i4'),
+    ('thread_id', '<i2'),
+    ('level', '<i2'),
+    ('start_ns', '<i8'),
+    ('end_ns', '<i8'),
+    ('count', '<i8'),
+]
+
+# `.npy` format magic
+_NPY_MAGIC = b'\x93NUMPY'
+
+
+def get_chunk_name(chunk_index):
+    """
+    Get chunk directory name of given chunk index.
+
+    :param chunk_index: Chunk index.
+
+    :return: Directory name.
+    """
+    return 'chunk.{:05d}'.format(chunk_index)
+
+
+def _get_typecode(descr):
+    # Get item size
+    item_size = int(descr[2:])
+
+    # For each signed integer typecode
+    for typecode in 'bhilq':
+        #
+        try:
+            # If the typecode has the item size
+            if array(typecode).itemsize == item_size:
+                # Return the typecode
+                return typecode
+        # If the typecode is not supported, e.g. `q` in Python 2
+        except ValueError:
+            continue
+
+    # Raise error
+    raise ValueError('No array typecode for dtype: {}'.format(descr))
+
+
+def write_npy(file_path, descr, values):
+    """
+    Write `.npy` file of one-dimension array.
+
+    :param file_path: File path.
+
+    :param descr: Little-endian dtype descr, e.g. `<i4`.
+
+    :param values: `array.array` object whose item size matches the descr.
+
+    :return: None.
+    """
+    # Get header text
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}"\
+        .format(descr, len(values))
+
+    # Pad header so data starts at a multiple of 64 bytes.
+    # 10 is the size of magic, version and header length.
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+
+    # If the platform is big-endian
+    if sys.byteorder == 'big':
+        # Copy values
+        values = array(values.typecode, values)
+
+        # Convert to little-endian
+        values.byteswap()
+
+    # Open file
+    with open(file_path, 'wb') as npy_file:
+        # Write magic and version 1.0
+        npy_file.write(_NPY_MAGIC + b'\x01\x00')
+
+        # Write header length
+        npy_file.write(struct.pack('<H', len(header)))
+
+        # Write header
+        npy_file.write(header.encode('latin1'))
+
+        # Write data
+        values.tofile(npy_file)
+
+
+def read_npy(file_path):
+    """
+    Read `.npy` file written by `write_npy`, without NumPy.
+
+    :param file_path: File path.
+
+    :return: `array.array` object.
+    """
+    # Open file
+    with open(file_path, 'rb') as npy_file:
+        # Read magic and version
+        magic = npy_file.read(8)
+
+        # If magic is invalid
+        if magic[:6] != _NPY_MAGIC:
+            raise ValueError('Invalid `.npy` file: {}'.format(file_path))
+
+        # If is version 1.x
+        if magic[6:7] == b'\x01':
+            # Read header length
+            header_size = struct.unpack('<H', npy_file.read(2))[0]
+        else:
+            # Read header length
+            header_size = struct.unpack('<I', npy_file.read(4))[0]
+
+        # Read header
+        header = ast.literal_eval(npy_file.read(header_size).decode('latin1'))
+
+        # Create array
+        values = array(_get_typecode(header['descr']))
+
+        # Read data
+        data = npy_file.read()
+
+    # Load data
+    if hasattr(values, 'frombytes'):
+        # Python 3
+        values.frombytes(data)
+    else:
+        # Python 2
+        values.fromstring(data)
+
+    # If the platform is big-endian
+    if sys.byteorder == 'big':
+        # Convert from little-endian
+        values.byteswap()
+
+    # Return array
+    return values
+
+
+class ColumnarWriter(object):
+    """
+    Write calls into columnar chunks in given output directory.
+
+    Rows are buffered in `array.array` objects and written when the buffer
+    has `chunk_size` rows, and when `close` is called.
+    """
+
+    def __init__(self, output_dir, chunk_size=64 * 1024):
+        #
+        self.output_dir = output_dir
+
+        #
+        self.chunk_size = chunk_size
+
+        #
+        self.row_count = 0
+
+        # Map URI to URI ID
+        self._uri_ids = {}
+
+        # URI list indexed by URI ID
+        self._uris = []
+
+        # List of chunk dicts with keys `name` and `row_count`
+        self._chunks = []
+
+        # Map column name to buffered values
+        self._buffers = None
+
+        #
+        self._reset_buffers()
+
+        # If output directory not exists
+        if not os.path.isdir(self.output_dir):
+            # Create output directory
+            os.makedirs(self.output_dir)
+
+    def _reset_buffers(self):
+        self._buffers = dict(
+            (name, array(_get_typecode(descr))) for name, descr in COLUMNS
+        )
+
+    def add_call(self, uri, pid, thread, level, start, end, count):
+        """
+        Add a call.
+
+        :param uri: URI.
+
+        :param pid: Process ID.
+
+        :param thread: Simple thread ID.
+
+        :param level: Call level.
+
+        :param start: Start timestamp in seconds.
+
+        :param end: End timestamp in seconds.
+
+        :param count: Call count.
+
+        :return: None.
+        """
+        # Get URI ID
+        uri_id = self._uri_ids.get(uri, None)
+
+        # If the URI has no ID yet
+        if uri_id is None:
+            # Create URI ID
+            uri_id = self._uri_ids[uri] = len(self._uris)
+
+            # Add URI
+            self._uris.append(uri)
+
+        # Get buffers
+        buffers = self._buffers
+
+        # Add row
+        buffers['uri_id'].append(uri_id)
+        buffers['pid'].append(pid or 0)
+        buffers['thread_id'].append(thread or 0)
+        buffers['level'].append(level or 0)
+        buffers['start_ns'].append(int(round(start * 1e9)))
+        buffers['end_ns'].append(int(round(end * 1e9)))
+        buffers['count'].append(count or 0)
+
+        #
+        self.row_count += 1
+
+        # If the buffer is full
+        if len(buffers['uri_id']) >= self.chunk_size:
+            # Write chunk
+            self._write_chunk()
+
+    def add_call_info(self, call_info):
+        """
+        Add a call dict returned by `query.iter_calls`.
+
+        :param call_info: Call dict.
+
+        :return: None.
+        """
+        self.add_call(
+            uri=call_info['uri'],
+            pid=call_info['pid'],
+            thread=call_info['thread'],
+            level=call_info['level'],
+            start=call_info['start'],
+            end=call_info['end'],
+            count=call_info['count'],
+        )
+
+    def _write_chunk(self):
+        # Get row count
+        row_count = len(self._buffers['uri_id'])
+
+        # If no rows
+        if not row_count:
+            # Ignore
+            return
+
+        # Get chunk name
+        chunk_name = get_chunk_name(len(self._chunks))
+
+        # Get chunk directory path
+        chunk_dir = os.path.join(self.output_dir, chunk_name)
+
+        # If chunk directory not exists
+        if not os.path.isdir(chunk_dir):
+            # Create chunk directory
+            os.makedirs(chunk_dir)
+
+        # For each column
+        for name, descr in COLUMNS:
+            # Write column file
+            write_npy(
+                os.path.join(chunk_dir, name + '.npy'),
+                descr,
+                self._buffers[name],
+            )
+
+        # Add chunk
+        self._chunks.append({'name': chunk_name, 'row_count': row_count})
+
+        # Clear buffers
+        self._reset_buffers()
+
+    def close(self):
+        """
+        Write buffered rows and meta file.
+
+        :return: None.
+        """
+        # Write buffered rows
+        self._write_chunk()
+
+        # Get meta
+        meta = {
+            'version': _META_FORMAT_VERSION,
+            'row_count': self.row_count,
+            'columns': COLUMNS,
+            'chunks': self._chunks,
+            'uris': self._uris,
+        }
+
+        # Open meta file
+        with open(
+            os.path.join(self.output_dir, META_FILE_NAME), 'w'
+        ) as meta_file:
+            # Write meta
+            json.dump(meta, meta_file, indent=4)
+
+
+def export_event_files(paths, output_dir, chunk_size=64 * 1024):
+    """
+    Export calls in given event files to columnar chunks.
+
+    :param paths: List of event file paths or collector output directories.
+
+    :param output_dir: Output directory.
+
+    :param chunk_size: Number of rows per chunk.
+
+    :return: Number of rows written.
+    """
+    # Create writer
+    writer = ColumnarWriter(output_dir, chunk_size=chunk_size)
+
+    # For each event file
+    for file_path in get_event_file_paths(paths):
+        # For each call
+        for call_info in iter_calls(TraceStore(file_path)):
+            # Add the call
+            writer.add_call_info(call_info)
+
+    # Write buffered rows and meta file
+    writer.close()
+
+    # Return row count
+    return writer.row_count
+
+
+def _require_numpy():
+    # If NumPy is not available
+    if numpy is None:
+        # Raise error
+        raise ImportError('NumPy is required for columnar analysis helpers.')
+
+
+class ColumnarTrace(object):
+    """
+    Columnar chunks loaded from given directory.
+
+    With NumPy, column files are memory-mapped, and `column` returns NumPy
+    arrays. Without NumPy, `column` returns `array.array` objects.
+    """
+
+    def __init__(self, input_dir):
+        #
+        self.input_dir = input_dir
+
+        # Open meta file
+        with open(os.path.join(input_dir, META_FILE_NAME), 'r') as meta_file:
+            # Load meta
+            meta = json.load(meta_file)
+
+        # If meta version is not supported
+        if meta.get('version') != _META_FORMAT_VERSION:
+            raise ValueError(
+                'Unsupported columnar meta version: {}'.format(
+                    meta.get('version')
+                )
+            )
+
+        #
+        self.row_count = meta['row_count']
+
+        # URI list indexed by URI ID
+        self.uris = meta['uris']
+
+        # Column name list
+        self.column_names = [name for name, _ in meta['columns']]
+
+        # Chunk name list
+        self.chunk_names = [chunk['name'] for chunk in meta['chunks']]
+
+        # Map column name to loaded column
+        self._columns = {}
+
+    def load_chunk_column(self, chunk_name, name):
+        """
+        Load one column of one chunk.
+
+        :param chunk_name: Chunk name.
+
+        :param name: Column name.
+
+        :return: Memory-mapped NumPy array, or `array.array` object without \
+            NumPy.
+        """
+        # Get column file path
+        file_path = os.path.join(self.input_dir, chunk_name, name + '.npy')
+
+        # If NumPy is available
+        if numpy is not None:
+            # Return memory-mapped array
+            return numpy.load(file_path, mmap_mode='r')
+
+        # Return array.array object
+        return read_npy(file_path)
+
+    def column(self, name):
+        """
+        Get column values of all chunks.
+
+        :param name: Column name.
+
+        :return: NumPy array, or `array.array` object without NumPy.
+        """
+        # Get loaded column
+        values = self._columns.get(name, None)
+
+        # If the column is loaded
+        if values is not None:
+            # Return the column
+            return values
+
+        # Load chunk columns
+        chunk_value_s = [
+            self.load_chunk_column(chunk_name, name)
+            for chunk_name in self.chunk_names
+        ]
+
+        # If NumPy is available
+        if numpy is not None:
+            # If have one chunk
+            if len(chunk_value_s) == 1:
+                # Use the memory-mapped array without copying
+                values = chunk_value_s[0]
+
+            # If have no chunk
+            elif not chunk_value_s:
+                # Use empty array
+                values = numpy.zeros(0, dtype=dict(COLUMNS)[name])
+
+            # If have multiple chunks
+            else:
+                # Concatenate chunks
+                values = numpy.concatenate(chunk_value_s)
+        else:
+            # Create array
+            values = array(_get_typecode(dict(COLUMNS)[name]))
+
+            # For each chunk
+            for chunk_values in chunk_value_s:
+                # Add chunk values
+                values.extend(chunk_values)
+
+        # Store the column
+        self._columns[name] = values
+
+        # Return the column
+        return values
+
+    def durations(self):
+        """
+        Get call durations in nanoseconds.
+
+        :return: NumPy array.
+        """
+        _require_numpy()
+
+        return numpy.asarray(self.column('end_ns')) - \
+            numpy.asarray(self.column('start_ns'))
+
+    def parents(self):
+        """
+        Get parent row index of each row, i.e. the caller's row.
+
+        A call's caller is the last call in the same process and thread that
+        started before it, at one level lower, and ended after it. This is
+        computed level by level with `searchsorted`.
+
+        :return: NumPy int64 array. -1 for rows without caller.
+        """
+        _require_numpy()
+
+        # Get columns
+        pid_s = numpy.asarray(self.column('pid'))
+
+        thread_s = numpy.asarray(self.column('thread_id'))
+
+        level_s = numpy.asarray(self.column('level'))
+
+        start_s = numpy.asarray(self.column('start_ns'))
+
+        end_s = numpy.asarray(self.column('end_ns'))
+
+        # Get row order by process, thread, start time, and level so a caller
+        # is before its callees starting at the same time
+        order = numpy.lexsort((level_s, start_s, thread_s, pid_s))
+
+        # Map row index to position in the order
+        position_s = numpy.empty(len(order), dtype=numpy.int64)
+
+        position_s[order] = numpy.arange(len(order))
+
+        # Parent row index list
+        parent_s = numpy.full(len(order), -1, dtype=numpy.int64)
+
+        # For each level having callers
+        for level in numpy.unique(level_s)[1:]:
+            # Get callee rows
+            callee_s = numpy.nonzero(level_s == level)[0]
+
+            # Get candidate caller positions, sorted
+            caller_position_s = numpy.sort(
+                position_s[level_s == level - 1]
+            )
+
+            # If no candidate callers
+            if not len(caller_position_s):
+                continue
+
+            # Find the last candidate caller before each callee
+            index_s = numpy.searchsorted(
+                caller_position_s, position_s[callee_s]
+            ) - 1
+
+            # Get whether the callee has a candidate caller
+            has_caller_s = index_s >= 0
+
+            # Get callee rows with candidate callers
+            callee_s = callee_s[has_caller_s]
+
+            # Get candidate caller rows
+            caller_s = order[caller_position_s[index_s[has_caller_s]]]
+
+            # Get whether the candidate caller is the callee's caller
+            valid_s = (pid_s[caller_s] == pid_s[callee_s]) & \
+                (thread_s[caller_s] == thread_s[callee_s]) & \
+                (end_s[caller_s] >= end_s[callee_s])
+
+            # Set parent row indexes
+            parent_s[callee_s[valid_s]] = caller_s[valid_s]
+
+        # Return parent row indexes
+        return parent_s
+
+    def self_times(self, parents=None):
+        """
+        Get call self times in nanoseconds, i.e. durations excluding callees.
+
+        :param parents: Parent row indexes returned by `parents`.
+
+        :return: NumPy array.
+        """
+        _require_numpy()
+
+        # If parents are not given
+        if parents is None:
+            # Compute parents
+            parents = self.parents()
+
+        # Get durations
+        duration_s = self.durations()
+
+        # Get callees' total duration of each row
+        callee_total_s = numpy.zeros(len(duration_s), dtype=numpy.int64)
+
+        # Get whether the row has caller
+        has_caller_s = parents >= 0
+
+        # Add each callee's duration to its caller
+        numpy.add.at(
+            callee_total_s, parents[has_caller_s], duration_s[has_caller_s]
+        )
+
+        # Return self times
+        return duration_s - callee_total_s
+
+    def uri_percentiles(self, percents=(50, 90, 99), values=None):
+        """
+        Get per-URI percentiles of call durations or given values.
+
+        :param percents: Percent list.
+
+        :param values: Per-row values, e.g. returned by `self_times`. \
+            Default is durations.
+
+        :return: Dict mapping URI to dict with keys `count` and each percent.
+        """
+        _require_numpy()
+
+        # If values are not given
+        if values is None:
+            # Use durations
+            values = self.durations()
+
+        # Get URI IDs
+        uri_id_s = numpy.asarray(self.column('uri_id'))
+
+        # Get row order by URI ID
+        order = numpy.argsort(uri_id_s, kind='mergesort')
+
+        # Get sorted values
+        sorted_uri_id_s = uri_id_s[order]
+
+        sorted_value_s = numpy.asarray(values)[order]
+
+        # Get each URI ID's start position in the sorted rows
+        unique_uri_id_s, start_s = numpy.unique(
+            sorted_uri_id_s, return_index=True
+        )
+
+        # Get end positions
+        end_s = numpy.append(start_s[1:], len(order))
+
+        # Result dict
+        result = {}
+
+        # For each URI ID
+        for uri_id, start, end in zip(unique_uri_id_s, start_s, end_s):
+            # Get percentiles
+            percentile_s = numpy.percentile(
+                sorted_value_s[start:end], percents
+            )
+
+            # Get URI's result
+            uri_result = {'count': int(end - start)}
+
+            uri_result.update(
+                (percent, float(value))
+                for percent, value in zip(percents, percentile_s)
+            )
+
+            # Store URI's result
+            result[self.uris[uri_id]] = uri_result
+
+        # Return result
+        return result
+
+    def call_tree(self, parents=None):
+        """
+        Get call tree in compressed form.
+
+        :param parents: Parent row indexes returned by `parents`.
+
+        :return: Tuple of root row indexes, children offsets and children row \
+            indexes. The children of row `i` are \
+            `children[offsets[i]:offsets[i + 1]]`, ordered by start time.
+        """
+        _require_numpy()
+
+        # If parents are not given
+        if parents is None:
+            # Compute parents
+            parents = self.parents()
+
+        # Get row order by parent, then start time
+        order = numpy.lexsort(
+            (numpy.asarray(self.column('start_ns')), parents)
+        )
+
+        # Get row count of each parent, with roots counted at index 0
+        count_s = numpy.bincount(parents + 1, minlength=len(parents) + 1)
+
+        # Get children offsets.
+        # Index 0 of `count_s` is for roots, which come first in `order`.
+        offset_s = numpy.concatenate(([0], numpy.cumsum(count_s[1:]))) + \
+            count_s[0]
+
+        # Return roots, children offsets and children
+        return order[:count_s[0]], offset_s, order
+
+    def iter_call_tree(self, parents=None):
+        """
+        Iterate rows in depth-first order.
+
+        :param parents: Parent row indexes returned by `parents`.
+
+        :return: Iterator of (depth, row index).
+        """
+        # Get call tree
+        root_s, offset_s, children = self.call_tree(parents=parents)
+
+        # Stack of (depth, row index), popped from the end
+        stack = [(0, int(row)) for row in root_s[::-1]]
+
+        # While have rows
+        while stack:
+            # Pop a row
+            depth, row = stack.pop()
+
+            # Yield the row
+            yield depth, row
+
+            # Push children in reverse order so the first child is popped
+            # first
+            stack.extend(
+                (depth + 1, int(child))
+                for child in children[offset_s[row]:offset_s[row + 1]][::-1]
+            )
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.columnar',
+        description='Export calls in trace event files to columnar chunks.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        'paths',
+        metavar='PATH',
+        nargs='+',
+        help='Event file, or collector output directory.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '-o', '--output',
+        dest='output_dir',
+        required=True,
+        help='Output directory.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--chunk-size',
+        dest='chunk_size',
+        type=int,
+        default=64 * 1024,
+        help='Number of rows per chunk.',
+    )
+
+    # Parse arguments
+    parsed_args = parser.parse_args(args)
+
+    # Export
+    row_count = export_event_files(
+        parsed_args.paths,
+        parsed_args.output_dir,
+        chunk_size=parsed_args.chunk_size,
+    )
+
+    # Write message
+    sys.stderr.write('# Exported {} calls to {}\n'.format(
+        row_count, parsed_args.output_dir
+    ))
+
+    # Return exit code
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
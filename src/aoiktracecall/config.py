@@ -9,8 +9,37 @@ _CONFIG_DICT = {
     # break if the code that was using the original function requires a real
     # function, instead of a callable. Known cases include PyQt slot functions.
     #
+    # 'auto' means use wrapper class only if the wrapped callable is not a
+    # plain function. Plain function wrappers are cheaper to call.
+    #
     'WRAP_USING_WRAPPER_CLASS': True,
 
+    # Whether trace a class's instantiation by hooking its `__init__` in place.
+    #
+    # If disabled, a traced class is replaced with a subclass whose `__new__`
+    # reports the call, which changes the class identity. If enabled,
+    # instances keep the original type, but the reported call covers
+    # `__init__` only, and instantiation of subclasses is not reported.
+    #
+    'WRAP_CLASS_IN_PLACE': False,
+
+    # Whether generate wrappers with the same signature as plain functions.
+    #
+    # Such a wrapper binds arguments by name when called, so the handler gets
+    # info dict key `bound_args` and `printing_handler` needs not inspect the
+    # function's signature on each call. `inspect.signature` on the wrapper
+    # is correct if `WRAP_USING_WRAPPER_CLASS` is disabled.
+    #
+    'WRAP_PRESERVE_SIGNATURE': False,
+
+    # Whether record objects rejected by the trace filter.
+    #
+    # If enabled, `wrap.rewrap`, used by `trace.reload_specs`, can wrap
+    # objects that newly match reloaded specs. Otherwise it only updates or
+    # disarms existing wrappers.
+    #
+    'WRAP_RECORD_CANDIDATES': False,
+
     # Whether wrap base class attributes in a subclass.
     #
     # If enabled, wrapper attributes will be added to a subclass even if the
@@ -38,6 +67,12 @@ _CONFIG_DICT = {
     # Whether show main thread ID
     'SHOW_MAIN_THREAD_ID': False,
 
+    # Whether show process ID before thread ID.
+    #
+    # This helps tell apart output of processes writing to the same logger.
+    #
+    'SHOW_PROCESS_ID': False,
+
     # Whether show function's file path and line number in pre-call hook
     'SHOW_FUNC_FILE_PATH_LINENO_PRE_CALL': True,
 
@@ -62,6 +97,164 @@ _CONFIG_DICT = {
     # Use this if `PRINTING_HANDLER_DEBUG_INFO_DICT` causes errors.
     #
     'PRINTING_HANDLER_DEBUG_INFO_DICT_SAFE': False,
+
+    # Whether measure thread CPU time of each traced call.
+    #
+    # If enabled, post-call info dicts contain key `cpu_time`. Requires
+    # Python 3.7+.
+    #
+    'TRACE_CPU_TIME': False,
+
+    # Names of handlers that events are passed to, for specs not selecting
+    # handlers by spec dict key `handlers`.
+    #
+    # See `trace.trace_calls_in_specs`.
+    #
+    'DEFAULT_HANDLERS': ('print',),
+
+    # Whether skip all handler work of a call hidden because it is below a
+    # call hiding calls below it, e.g. `hide_tree`.
+    #
+    # Only calls with plain `True` showhide value are skipped, since calls
+    # with other values may be shown or change visibility of calls below
+    # them. Time of skipped calls counts as their callers' self time.
+    #
+    'HIDDEN_SUBTREE_SHORT_CIRCUIT': True,
+
+    # Whether skipped hidden calls still update call count and level.
+    #
+    # If enabled, counts and indentation of calls shown below hidden calls
+    # are same as if hidden calls are not skipped.
+    #
+    'HIDDEN_SUBTREE_COUNTING': True,
+
+    # Min interval in seconds between reports of the same trace handler error.
+    #
+    # Errors with same hook type, exception type and URI within the interval
+    # are counted instead of reported.
+    #
+    'HANDLER_ERROR_REPORT_INTERVAL': 10,
+
+    # Count of consecutive failures of a trace handler after which the
+    # handler is disabled for `HANDLER_BREAKER_BACKOFF` seconds.
+    #
+    # After the backoff period, one more failure disables the handler again,
+    # while a success resets the failure count.
+    #
+    # None or 0 means never disable.
+    #
+    'HANDLER_BREAKER_FAILURES': 5,
+
+    # Seconds a failing trace handler is disabled for.
+    #
+    'HANDLER_BREAKER_BACKOFF': 60,
+
+    # Scope of trace handler failure counting.
+    #
+    # 'uri': Failures are counted and the handler is disabled per URI.
+    # 'global': Failures are counted and the handler is disabled for all URIs.
+    #
+    'HANDLER_BREAKER_SCOPE': 'uri',
+
+    # Whether print traceback of exceptions propagated from traced callees.
+    #
+    # If disabled, only the call where the exception was raised prints the
+    # traceback. Calls it propagated through print the exception in one line.
+    #
+    'PRINTING_PROPAGATED_EXCEPTION_TRACEBACK': False,
+
+    # Whether collect stats of specs and print a report at process exit.
+    #
+    # If enabled, `trace_calls_in_specs` counts objects matched by each spec
+    # at wrap time and calls of the matched functions at runtime, and times
+    # spec matching. The report lists dead specs, i.e. specs that matched no
+    # objects, and the specs most expensive to match. See
+    # `spec_stats_plugin.format_spec_stats_report`.
+    #
+    'SPEC_STATS': False,
+
+    # Number of most expensive specs listed in the spec stats report.
+    #
+    'SPEC_STATS_REPORT_TOP_COUNT': 10,
+
+    # Wrap decision cache file path.
+    #
+    # If set, `trace_calls_in_specs` caches trace filter decisions on disk,
+    # keyed by specs hash, module name and module file modification time, so
+    # that later process starts skip spec matching for unchanged modules.
+    #
+    'WRAP_DECISION_CACHE_PATH': None,
+
+    # Default latency threshold in milliseconds.
+    #
+    # If set, `trace_calls_in_specs` buffers each top-level traced call's
+    # events and prints them only if the call takes at least this long. Specs
+    # can set their own threshold via the `threshold_ms` key of a spec dict.
+    #
+    'LATENCY_THRESHOLD_MS': None,
+
+    # Max number of events buffered for a call under latency threshold.
+    #
+    # Events after the limit are dropped and counted in the flushed output.
+    #
+    'LATENCY_THRESHOLD_BUFFER_MAX': 100000,
+
+    # Max traced call depth, relative to the outermost limited call.
+    #
+    # Calls deeper than this are not passed to the trace handler. Specs can
+    # set their own limit via the `max_depth` key of a spec dict.
+    #
+    'TRACE_MAX_DEPTH': None,
+
+    # Max traced child calls per call.
+    #
+    # Child calls after this many are not passed to the trace handler. Specs
+    # can set their own limit via the `max_children` key of a spec dict.
+    #
+    'TRACE_MAX_CHILDREN': None,
+
+    # Max traced calls per second per URI.
+    #
+    # Calls over this rate are not passed to the trace handler. Specs can set
+    # their own limit via the `max_rate` key of a spec dict.
+    #
+    'TRACE_MAX_RATE': None,
+
+    # Max calls per second of a traced function, above which its wrapper is
+    # disarmed, i.e. calls the function directly without tracing.
+    #
+    # Unlike `TRACE_MAX_RATE`, which only suppresses handler calls, this
+    # removes nearly all tracing cost of e.g. a tiny helper called millions
+    # of times. A notice is printed once per disarmed function. See
+    # `wrap.get_auto_disarmed_uris`. None means never disarm by call rate.
+    #
+    'AUTO_DISARM_MAX_RATE': None,
+
+    # Max fraction of wall time a traced function's handler work may take,
+    # above which its wrapper is disarmed, e.g. 0.1.
+    #
+    # None means never disarm by overhead.
+    #
+    'AUTO_DISARM_MAX_OVERHEAD': None,
+
+    # Seconds over which call rate and overhead are measured for
+    # `AUTO_DISARM_MAX_RATE` and `AUTO_DISARM_MAX_OVERHEAD`.
+    #
+    'AUTO_DISARM_WINDOW': 1,
+
+    # Min count of repeated calls to collapse.
+    #
+    # If set, `trace_calls_in_specs` prints consecutive sibling calls to the
+    # same function after the first one as a single summary line, if there
+    # are at least this many of them.
+    #
+    'PRINTING_COLLAPSE_REPEATS': None,
+
+    # Max number of events buffered per thread for collapsing repeated calls.
+    #
+    # A repeated call with more events is printed in full.
+    #
+    'PRINTING_COLLAPSE_BUFFER_MAX': 1000,
 }
 
 
@@ -2,9 +2,14 @@
 from __future__ import absolute_import
 
 # Standard imports
+import json
 import logging
+import os
 
 # Internal imports
+from aoiktracecall.state import fork_callback_add
+from aoiktracecall.state import get_simple_thread_id
+from aoiktracecall.state import get_timestamp
 from aoiktracecall.util import indent_by_level
 
 
@@ -151,3 +156,122 @@ def print_error(text, indent=True):
 
         # Send text to logger
         logger.error(text)
+
+
+class ProcessFileHandler(logging.Handler):
+    """
+    Logging handler that writes records to a per-process trace file.
+
+    Each record is written as a JSON line with keys `pid`, `thread` (simple
+    thread ID), `ts` (monotonic timestamp) and `text`. The file path is given
+    as a template containing `{pid}`, so each process, including processes
+    forked after the handler is created, writes its own file. Use
+    `aoiktracecall.merge` to combine the files into one timeline.
+    """
+
+    def __init__(self, file_path_template):
+        #
+        logging.Handler.__init__(self)
+
+        #
+        self.file_path_template = file_path_template
+
+        # Process ID of the opened file
+        self._pid = None
+
+        #
+        self._file = None
+
+        # Flush buffered records before fork so they are not copied to and
+        # written again by the child process
+        fork_callback_add(self.flush, before=True)
+
+        # Drop the file inherited from parent process after fork
+        fork_callback_add(self._reset_after_fork)
+
+    def get_file_path(self, pid=None):
+        #
+        if pid is None:
+            pid = os.getpid()
+
+        #
+        return self.file_path_template.format(pid=pid)
+
+    def _reset_after_fork(self):
+        # Not close the file because it is still used by parent process
+        self._file = None
+
+        #
+        self._pid = None
+
+        #
+        self.createLock()
+
+    def emit(self, record):
+        #
+        try:
+            # Get process ID
+            pid = os.getpid()
+
+            # If the file is not opened by this process.
+            # Checked here too for Python versions without fork callbacks.
+            if self._pid != pid:
+                # Open the file
+                self._file = open(self.get_file_path(pid), 'a')
+
+                #
+                self._pid = pid
+
+            # Get record text
+            text = json.dumps({
+                'pid': pid,
+                'thread': get_simple_thread_id(record.thread),
+                'ts': get_timestamp(),
+                'text': self.format(record),
+            })
+
+            # Write record text
+            self._file.write(text + '\n')
+
+        except Exception:
+            #
+            self.handleError(record)
+
+    def flush(self):
+        #
+        if self._file is not None and self._pid == os.getpid():
+            self._file.flush()
+
+    def close(self):
+        #
+        try:
+            #
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+
+            #
+            self._file = None
+        finally:
+            #
+            logging.Handler.close(self)
+
+
+def add_process_file_handler(file_path_template):
+    """
+    Add `ProcessFileHandler` to info and error loggers.
+
+    :param file_path_template: File path template containing `{pid}`.
+
+    :return: The handler added.
+    """
+    # Create handler
+    handler = ProcessFileHandler(file_path_template)
+
+    # Add handler to info logger
+    get_info_logger().addHandler(handler)
+
+    # Add handler to error logger
+    get_error_logger().addHandler(handler)
+
+    # Return the handler
+    return handler
@@ -0,0 +1,186 @@
+# coding: utf-8
+"""
+Merge per-process trace files written by `logging.ProcessFileHandler` into \
+    one timeline ordered by timestamp.
+
+Usage:
+    python -m aoiktracecall.merge [-o OUTPUT] [--jsonl] FILE [FILE ...]
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+import heapq
+import json
+import sys
+
+
+def iter_trace_file_records(file_path, file_index=0):
+    """
+    Iterate records in given trace file.
+
+    :param file_path: Trace file path.
+
+    :param file_index: File index used to order records with same timestamp.
+
+    :return: Iterator of (timestamp, file index, line index, record dict).
+    """
+    # Open trace file
+    with open(file_path, 'r') as trace_file:
+        # For each line
+        for line_index, line in enumerate(trace_file):
+            # Strip the line
+            line = line.strip()
+
+            # If the line is empty
+            if not line:
+                # Ignore
+                continue
+
+            #
+            try:
+                # Load record
+                record = json.loads(line)
+            except ValueError:
+                # Ignore partial line written by a killed process
+                continue
+
+            # Yield sort key and record.
+            # Line index keeps records with same timestamp in file order.
+            yield (record.get('ts', 0), file_index, line_index, record)
+
+
+def iter_merged_records(file_paths):
+    """
+    Iterate records in given trace files, ordered by timestamp.
+
+    Each file is read in streaming fashion. Records in each file are assumed
+    to be ordered by timestamp already, which is the case for files written
+    by one process.
+
+    :param file_paths: Trace file path list.
+
+    :return: Iterator of record dicts.
+    """
+    # Record iterator list
+    iter_s = [
+        iter_trace_file_records(file_path, file_index=file_index)
+        for file_index, file_path in enumerate(file_paths)
+    ]
+
+    # For each record in merged order
+    for _, _, _, record in heapq.merge(*iter_s):
+        # Yield the record
+        yield record
+
+
+def format_record(record):
+    """
+    Format record to text.
+
+    :param record: Record dict.
+
+    :return: Text with each line prefixed by process ID and thread ID.
+    """
+    # Get prefix
+    prefix = '[P{} T{}] '.format(
+        record.get('pid', '?'), record.get('thread', '?')
+    )
+
+    # Return text
+    return '\n'.join(
+        prefix + line for line in record.get('text', '').split('\n')
+    )
+
+
+def merge_trace_files(file_paths, output_file, jsonl=False):
+    """
+    Merge given trace files into given output file.
+
+    :param file_paths: Trace file path list.
+
+    :param output_file: Output file object.
+
+    :param jsonl: Whether write JSON lines instead of text.
+
+    :return: Number of records written.
+    """
+    # Record count
+    record_count = 0
+
+    # For each record in merged order
+    for record in iter_merged_records(file_paths):
+        # If need write JSON lines
+        if jsonl:
+            # Get text
+            text = json.dumps(record)
+        else:
+            # Get text
+            text = format_record(record)
+
+        # Write text
+        output_file.write(text + '\n')
+
+        # Increment record count
+        record_count += 1
+
+    # Return record count
+    return record_count
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.merge',
+        description='Merge per-process trace files into one timeline.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        'file_paths',
+        metavar='FILE',
+        nargs='+',
+        help='Per-process trace file.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '-o', '--output',
+        dest='output_path',
+        default=None,
+        help='Output file. Default is stdout.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--jsonl',
+        dest='jsonl',
+        action='store_true',
+        help='Write JSON lines instead of text.',
+    )
+
+    # Parse arguments
+    parsed_args = parser.parse_args(args)
+
+    # If output file is not given
+    if parsed_args.output_path is None:
+        # Merge to stdout
+        merge_trace_files(
+            parsed_args.file_paths, sys.stdout, jsonl=parsed_args.jsonl
+        )
+
+    # If output file is given
+    else:
+        # Open output file
+        with open(parsed_args.output_path, 'w') as output_file:
+            # Merge to output file
+            merge_trace_files(
+                parsed_args.file_paths, output_file, jsonl=parsed_args.jsonl
+            )
+
+    # Return exit code
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
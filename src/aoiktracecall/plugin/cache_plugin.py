@@ -0,0 +1,481 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Standard imports
+import atexit
+import hashlib
+import json
+import os
+import sys
+import threading
+from traceback import format_exc
+
+# Internal imports
+from aoiktracecall.logging import print_debug
+from aoiktracecall.logging import print_error
+
+
+# Cache file format version
+_CACHE_FORMAT_VERSION = 2
+
+# Sentinel for cache misses
+_MISSING = object()
+
+# Key of dict storing a tuple, which JSON would turn into a list
+_TUPLE_KEY = '__tuple__'
+
+
+def _encode_value(value):
+    # If is tuple
+    if isinstance(value, tuple):
+        # Store as dict so that it is loaded as tuple
+        return {_TUPLE_KEY: [_encode_value(item) for item in value]}
+
+    # If is list
+    if isinstance(value, list):
+        #
+        return [_encode_value(item) for item in value]
+
+    # If is dict
+    if isinstance(value, dict):
+        #
+        return dict(
+            (key, _encode_value(item)) for key, item in value.items()
+        )
+
+    #
+    return value
+
+
+def _decode_value(value):
+    # If is list
+    if isinstance(value, list):
+        #
+        return [_decode_value(item) for item in value]
+
+    # If is dict
+    if isinstance(value, dict):
+        # If is stored tuple
+        if len(value) == 1 and _TUPLE_KEY in value:
+            #
+            return tuple(_decode_value(item) for item in value[_TUPLE_KEY])
+
+        #
+        return dict(
+            (key, _decode_value(item)) for key, item in value.items()
+        )
+
+    #
+    return value
+
+
+def get_specs_hash(parsed_specs, extra=None):
+    """
+    Get hash text of given parsed specs.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :param extra: Extra object whose repr text is part of the hash, e.g. \
+        config values affecting filtering.
+
+    :return: Hash text.
+    """
+    # Get text to hash
+    text = repr((
+        [(uri, spec_info) for uri, spec_info in parsed_specs.items()],
+        extra,
+    ))
+
+    # Return hash text
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def get_module_cache_key(module):
+    """
+    Get cache key of given module.
+
+    The key changes when the module's source file changes, which invalidates
+    the module's cached wrap decisions.
+
+    :param module: Module object.
+
+    :return: Key text, or None if the module can not be keyed.
+    """
+    # Get module name
+    module_name = getattr(module, '__name__', None)
+
+    # If module name is not valid
+    if not isinstance(module_name, str):
+        # Return None to not use cache
+        return None
+
+    # Get module file path
+    file_path = getattr(module, '__file__', None)
+
+    # If module has no file.
+    # This is the case of built-in modules, which only change with the
+    # interpreter.
+    if not file_path:
+        # Return key based on interpreter version
+        return '{}|<builtin>|{}'.format(module_name, sys.version)
+
+    #
+    try:
+        # Get file stat
+        stat = os.stat(file_path)
+    except OSError:
+        # Return None to not use cache
+        return None
+
+    # Return key based on file path, modification time and size
+    return '{}|{}|{}|{}'.format(
+        module_name, file_path, stat.st_mtime, stat.st_size
+    )
+
+
+def get_info_cache_key(info):
+    """
+    Get cache key of given info dict, unique within its module.
+
+    :param info: Info dict.
+
+    :return: Key text.
+    """
+    # Return key text
+    return '{}|{}|{}|{}'.format(
+        info.get('info_type', None),
+        info.get('onwrap_uri', None),
+        info.get('origin_uri', None),
+        info.get('origin_attr_uri', None),
+    )
+
+
+class WrapDecisionCache(object):
+    """
+    On-disk cache of wrap decisions made by trace filters.
+
+    Entries are grouped by module. Each module's entries are dropped when the
+    module's cache key changes. All entries are dropped when the specs hash
+    changes.
+    """
+
+    def __init__(self, file_path, specs_hash):
+        #
+        self.file_path = file_path
+
+        #
+        self.specs_hash = specs_hash
+
+        # Map module name to dict with keys `key` and `entries`
+        self._modules = None
+
+        # Map module name to tuple of module object and module cache key
+        self._module_keys = {}
+
+        #
+        self._dirty = False
+
+        #
+        self._lock = threading.RLock()
+
+        #
+        self.hit_count = 0
+
+        #
+        self.miss_count = 0
+
+    def load(self):
+        # Modules dict
+        modules = {}
+
+        #
+        try:
+            # Open cache file
+            with open(self.file_path, 'r') as cache_file:
+                # Load cache data
+                data = json.load(cache_file)
+
+            # If the cache data matches current version and specs
+            if isinstance(data, dict) and \
+                    data.get('version', None) == _CACHE_FORMAT_VERSION and \
+                    data.get('specs_hash', None) == self.specs_hash:
+                # Use the cached modules dict
+                modules = data.get('modules', None) or {}
+
+        # If the cache file not exists
+        except (IOError, OSError):
+            # Use empty modules dict
+            pass
+
+        # If the cache file is corrupted
+        except ValueError:
+            # Get message
+            msg = '# Warning: Ignored invalid wrap decision cache file: {}'\
+                .format(self.file_path)
+
+            # Print message
+            print_debug(msg)
+
+        #
+        with self._lock:
+            #
+            self._modules = modules
+
+    def save(self):
+        #
+        with self._lock:
+            # If not loaded or not changed
+            if self._modules is None or not self._dirty:
+                # Ignore
+                return
+
+            # Get cache data
+            data = {
+                'version': _CACHE_FORMAT_VERSION,
+                'specs_hash': self.specs_hash,
+                'modules': self._modules,
+            }
+
+            #
+            self._dirty = False
+
+        # Write to temporary file first to avoid partial cache file
+        tmp_file_path = '{}.{}.tmp'.format(self.file_path, os.getpid())
+
+        #
+        try:
+            # Open temporary file
+            with open(tmp_file_path, 'w') as cache_file:
+                # Write cache data
+                json.dump(data, cache_file)
+
+            #
+            try:
+                # Python 3
+                os.replace(tmp_file_path, self.file_path)
+            except AttributeError:
+                # Python 2
+                if os.path.exists(self.file_path):
+                    os.remove(self.file_path)
+
+                os.rename(tmp_file_path, self.file_path)
+
+        except Exception:
+            #
+            error_msg = (
+                '# Error when saving wrap decision cache:\n---\n{}---\n'
+            ).format(format_exc())
+
+            #
+            print_error(error_msg)
+
+    def _get_module_entries(self, module):
+        # Get module name
+        module_name = getattr(module, '__name__', None)
+
+        # Get cached module key
+        module_key_info = self._module_keys.get(module_name, None)
+
+        # If module key is not computed for the module object
+        if module_key_info is None or module_key_info[0] is not module:
+            # Compute module key
+            module_key = get_module_cache_key(module)
+
+            # Store module key
+            self._module_keys[module_name] = (module, module_key)
+        else:
+            # Use computed module key
+            module_key = module_key_info[1]
+
+        # If the module can not be keyed
+        if module_key is None:
+            # Return None to not use cache
+            return None
+
+        # If the cache is not loaded
+        if self._modules is None:
+            # Load the cache
+            self.load()
+
+        # Get module cache item
+        module_item = self._modules.get(module_name, None)
+
+        # If the module has no cache item, or the module has changed
+        if module_item is None or module_item.get('key', None) != module_key:
+            # Create new module cache item
+            module_item = self._modules[module_name] = {
+                'key': module_key,
+                'entries': {},
+            }
+
+            #
+            self._dirty = True
+
+        # Return module cache entries
+        return module_item['entries']
+
+    def get(self, info):
+        """
+        Get cached decision for given info dict.
+
+        :param info: Info dict.
+
+        :return: False if the object was rejected, dict of info items added \
+            or changed by the filter if the object was accepted, or None if \
+            not cached.
+        """
+        #
+        with self._lock:
+            # Get module cache entries
+            entries = self._get_module_entries(info.get('module', None))
+
+            # If the module can not be cached
+            if entries is None:
+                # Return None
+                return None
+
+            # Get cached decision
+            decision = entries.get(get_info_cache_key(info), _MISSING)
+
+        # If not cached
+        if decision is _MISSING:
+            #
+            self.miss_count += 1
+
+            # Return None
+            return None
+
+        #
+        self.hit_count += 1
+
+        # If the object was rejected
+        if decision is False:
+            # Return False
+            return False
+
+        # Return a copy because info dicts may be changed by handlers.
+        # Tuples stored as dicts are restored.
+        return _decode_value(decision)
+
+    def set(self, info, decision):
+        """
+        Set decision for given info dict.
+
+        :param info: Info dict.
+
+        :param decision: False or dict of info items added or changed by \
+            the filter.
+
+        :return: None.
+        """
+        # If the decision is dict
+        if decision is not False:
+            #
+            try:
+                # Ensure the decision can be stored as JSON.
+                # Round-trip it so stored values are plain JSON values.
+                decision = json.loads(json.dumps(_encode_value(decision)))
+            except (TypeError, ValueError):
+                # Not cache the decision
+                return
+
+        #
+        with self._lock:
+            # Get module cache entries
+            entries = self._get_module_entries(info.get('module', None))
+
+            # If the module can not be cached
+            if entries is None:
+                # Ignore
+                return
+
+            # Store the decision
+            entries[get_info_cache_key(info)] = decision
+
+            #
+            self._dirty = True
+
+
+def cached_filter(info, filter, cache):
+    """
+    Filter function that uses wrap decision cache before calling given filter.
+
+    :param info: Info dict.
+
+    :param filter: Filter function to call on cache miss.
+
+    :param cache: WrapDecisionCache instance.
+
+    :return: Filter result.
+    """
+    # Get cached decision
+    decision = cache.get(info)
+
+    # If the object was rejected
+    if decision is False:
+        # Return False
+        return False
+
+    # If the object was accepted
+    if decision is not None:
+        # Add info items added or changed by the filter
+        info.update(decision)
+
+        # Return info dict
+        return info
+
+    # Get info items before filtering, since the filter may change the info
+    # dict in place
+    old_info = info.copy()
+
+    # Call the filter
+    result = filter(info)
+
+    # If the object is rejected
+    if not isinstance(result, dict):
+        # Cache rejection
+        cache.set(info, False)
+
+    # If the object is accepted
+    else:
+        # Cache info items added or changed by the filter
+        cache.set(info, dict(
+            (key, value) for key, value in result.items()
+            if old_info.get(key, _MISSING) is not value
+        ))
+
+    # Return filter result
+    return result
+
+
+def create_cached_filter(filter, file_path, specs_hash, save_at_exit=True):
+    """
+    Create filter function that caches given filter's decisions on disk.
+
+    :param filter: Filter function.
+
+    :param file_path: Cache file path.
+
+    :param specs_hash: Specs hash text. Cache is dropped if it changes.
+
+    :param save_at_exit: Whether save the cache at process exit.
+
+    :return: Filter function. Its `cache` attribute is the cache object.
+    """
+    # Create cache
+    cache = WrapDecisionCache(file_path=file_path, specs_hash=specs_hash)
+
+    # Create filter function
+    def combo_filter(info):
+        return cached_filter(info, filter=filter, cache=cache)
+
+    # Expose cache object, e.g. for calling `save` explicitly
+    combo_filter.cache = cache
+
+    # If need save the cache at process exit
+    if save_at_exit:
+        # Register exit callback
+        atexit.register(cache.save)
+
+    # Return filter function
+    return combo_filter
@@ -0,0 +1,270 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Standard imports
+import atexit
+
+# Internal imports
+from aoiktracecall.config import get_config
+from aoiktracecall.logging import print_info
+from aoiktracecall.state import collapse_state_get
+from aoiktracecall.state import collapse_state_set
+from aoiktracecall.state import count_get
+from aoiktracecall.util import indent_by_level
+
+
+class CollapseRun(object):
+    """
+    Run of consecutive sibling calls to the same function.
+
+    The first call of a run is passed to the handler. Following calls are
+    buffered while they run, and counted as repeats when they end.
+    """
+
+    def __init__(self, info):
+        # Function of the calls
+        self.func = info['func']
+
+        # URI of the calls
+        self.uri = info['onwrap_uri']
+
+        # Level of the calls
+        self.level = info['level']
+
+        # Count of repeated calls after the first call
+        self.repeat_count = 0
+
+        # Repeated calls' total, min and max duration
+        self.total_time = 0.0
+
+        self.min_time = None
+
+        self.max_time = None
+
+        # Events of repeated calls held until the repeat count reaches the
+        # collapse threshold
+        self.held_infos = []
+
+        # Events of the repeated call being run, or None if not in a repeat
+        self.pending_infos = None
+
+
+def _add_info(info_s, info):
+    # If is post-call event
+    if info['trace_hook_type'] == 'post_call':
+        # Store current count for printing the next count later
+        info['post_call_count'] = count_get()
+
+    #
+    info_s.append(info)
+
+
+def _format_time(seconds):
+    return '{:.3f}ms'.format(seconds * 1000)
+
+
+def _end_run(run, handler):
+    # If held events are not collapsed
+    if run.held_infos:
+        # For each held event
+        for held_info in run.held_infos:
+            # Pass to handler
+            handler(held_info)
+
+    # If have collapsed repeats
+    elif run.repeat_count:
+        # Get message
+        msg = 'x {:,} more calls to {}, total {}, min/avg/max {}/{}/{}'\
+            .format(
+                run.repeat_count,
+                run.uri,
+                _format_time(run.total_time),
+                _format_time(run.min_time),
+                _format_time(run.total_time / run.repeat_count),
+                _format_time(run.max_time),
+            )
+
+        # Print message at the calls' level
+        print_info(indent_by_level(msg, level=run.level) + '\n', indent=False)
+
+
+def collapse_handler(info, handler):
+    """
+    Trace handler that collapses consecutive sibling calls to the same \
+        function into a summary line.
+
+    The first call of a run is passed to given handler. Following calls are
+    buffered while they run. A run with at least `PRINTING_COLLAPSE_REPEATS`
+    repeated calls is summarized by count and durations when the run ends.
+    If a repeated call's events exceed `PRINTING_COLLAPSE_BUFFER_MAX`, its
+    events are passed to the handler and it starts a new run.
+
+    :param info: Info dict.
+
+    :param handler: Handler to pass events to, e.g. `printing_handler`.
+
+    :return: Handler result, or False if the event is buffered.
+    """
+    # Get hook type
+    trace_hook_type = info['trace_hook_type']
+
+    # Get level
+    level = info['level']
+
+    # Get current run
+    run = collapse_state_get()
+
+    # If in a repeated call
+    if run is not None and run.pending_infos is not None:
+        # If is the repeated call's end event
+        if trace_hook_type == 'post_call' and \
+                level == run.level and info['func'] is run.func:
+            # Get duration
+            duration = info['elapsed']
+
+            # Update run
+            run.repeat_count += 1
+
+            run.total_time += duration
+
+            run.min_time = duration if run.min_time is None else \
+                min(run.min_time, duration)
+
+            run.max_time = duration if run.max_time is None else \
+                max(run.max_time, duration)
+
+            # If the run is not long enough to collapse yet
+            if run.repeat_count < get_config('PRINTING_COLLAPSE_REPEATS'):
+                # Hold the repeated call's events
+                run.held_infos.extend(run.pending_infos)
+
+                _add_info(run.held_infos, info)
+            else:
+                # Drop held events
+                run.held_infos = []
+
+            # End the repeated call
+            run.pending_infos = None
+
+            # Return False to stop the handler chain
+            return False
+
+        # If the buffer is not full
+        if len(run.held_infos) + len(run.pending_infos) < \
+                get_config('PRINTING_COLLAPSE_BUFFER_MAX'):
+            # Buffer the event
+            _add_info(run.pending_infos, info)
+
+            # Return False to stop the handler chain
+            return False
+
+        # Get the repeated call's events
+        pending_info_s = run.pending_infos
+
+        # End the run without the repeated call
+        run.pending_infos = None
+
+        _end_run(run, handler)
+
+        # Pass the repeated call's events
+        for pending_info in pending_info_s:
+            handler(pending_info)
+
+        # Start a new run with the repeated call, which has not ended.
+        # A new run object is set, see `ContextLocal`.
+        collapse_state_set(None)
+
+        # Pass the event
+        return handler(info)
+
+    # If is call start event
+    if trace_hook_type == 'pre_call':
+        # If is a repeated call of the run
+        if run is not None and level == run.level and \
+                info['func'] is run.func:
+            # Start buffering the repeated call
+            run.pending_infos = [info]
+
+            # Return False to stop the handler chain
+            return False
+
+        # If the call is not below the run's calls
+        if run is not None and level <= run.level:
+            # End the run
+            collapse_state_set(None)
+
+            _end_run(run, handler)
+
+        # Pass the event
+        return handler(info)
+
+    # If is call end event
+    if trace_hook_type == 'post_call':
+        # If the run's calls are callees of the ended call
+        if run is not None and level < run.level:
+            # End the run
+            _end_run(run, handler)
+
+        # Pass the event
+        result = handler(info)
+
+        # Start a new run with the ended call.
+        # A new run object is set, see `ContextLocal`.
+        collapse_state_set(CollapseRun(info))
+
+        # Return handler result
+        return result
+
+    # If is generator event at or above the run's level
+    if run is not None and level <= run.level:
+        # End the run
+        collapse_state_set(None)
+
+        _end_run(run, handler)
+
+    # Pass the event
+    return handler(info)
+
+
+def create_collapse_handler(handler):
+    """
+    Create `collapse_handler` for given handler.
+
+    The created handler prints the current thread's unfinished run summary
+    at process exit.
+
+    :param handler: Handler to pass events to.
+
+    :return: Handler function.
+    """
+    # Create handler function
+    def combo_handler(info):
+        return collapse_handler(info, handler=handler)
+
+    # Create exit callback
+    def end_run_at_exit():
+        # Get current run
+        run = collapse_state_get()
+
+        # If have run
+        if run is not None:
+            # Clear the run
+            collapse_state_set(None)
+
+            # Get events of the unfinished repeated call, if any
+            pending_info_s = run.pending_infos or []
+
+            # End the run without the repeated call
+            run.pending_infos = None
+
+            _end_run(run, handler)
+
+            # Pass the unfinished repeated call's events
+            for pending_info in pending_info_s:
+                handler(pending_info)
+
+    # Register exit callback
+    atexit.register(end_run_at_exit)
+
+    # Return handler function
+    return combo_handler
@@ -0,0 +1,43 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.spec import get_matched_spec_info
+
+
+# ----- Info dict keys -----
+# Whether trace resumes of generators returned by the traced function.
+# Notice code at 2XGNT relies on this key.
+INFO_K_TRACE_GENERATOR = 'trace_generator'
+
+
+def generator_filter(info, parsed_specs):
+    #
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
+
+    #
+    if spec_info is None:
+        #
+        return info
+
+    #
+    spec_arg = spec_info['spec_arg']
+
+    #
+    if isinstance(spec_arg, list):
+        trace_generator = INFO_K_TRACE_GENERATOR in spec_arg
+
+    #
+    elif isinstance(spec_arg, dict):
+        trace_generator = bool(spec_arg.get(INFO_K_TRACE_GENERATOR, False))
+
+    #
+    else:
+        raise ValueError(spec_arg)
+
+    #
+    if trace_generator:
+        info[INFO_K_TRACE_GENERATOR] = True
+
+    #
+    return info
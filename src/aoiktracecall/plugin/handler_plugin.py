@@ -0,0 +1,360 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import get_config
+from aoiktracecall.spec import get_matched_spec_info
+
+
+# ----- Info dict keys -----
+# Tuple of names of handlers the traced function's events are passed to
+INFO_K_HANDLERS = 'handlers'
+
+
+# ----- Handler names -----
+# Print events, see `trace.trace_calls_in_specs`
+HANDLER_PRINT = 'print'
+
+# Aggregate call timing stats per URI, see `get_call_stats`
+HANDLER_STATS = 'stats'
+
+# Count calls per URI, see `get_call_counts`
+HANDLER_COUNT = 'count'
+
+
+# Map handler name to handler function
+_HANDLERS = {}
+
+
+def register_handler(name, handler):
+    """
+    Register handler that specs can select by name.
+
+    :param name: Handler name.
+
+    :param handler: Handler function.
+
+    :return: None.
+    """
+    _HANDLERS[name] = handler
+
+
+def get_handler(name, default=None):
+    """
+    Get registered handler.
+
+    :param name: Handler name.
+
+    :param default: Default value.
+
+    :return: Handler function, or `default` if not registered.
+    """
+    return _HANDLERS.get(name, default)
+
+
+def _to_handler_names(value):
+    # If is a single name
+    if isinstance(value, str):
+        return (value,)
+
+    # If is list of names
+    elif isinstance(value, (list, tuple)):
+        return tuple(value)
+
+    #
+    else:
+        raise ValueError(value)
+
+
+def get_spec_handler_names(spec_arg):
+    """
+    Get handler names selected by given spec argument.
+
+    :param spec_arg: Spec argument, i.e. `spec_arg` of parsed spec info.
+
+    :return: Tuple of handler names, or None if the spec not selects \
+        handlers.
+    """
+    # If the spec is dict having handlers
+    if isinstance(spec_arg, dict) and \
+            spec_arg.get(INFO_K_HANDLERS, None) is not None:
+        #
+        return _to_handler_names(spec_arg[INFO_K_HANDLERS])
+
+    #
+    return None
+
+
+def check_spec_handlers(parsed_specs, handlers):
+    """
+    Check handler names used by given specs and config `DEFAULT_HANDLERS` \
+        are defined.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :param handlers: Dict mapping handler name to handler function, in \
+        addition to registered handlers.
+
+    :return: None. Raise ValueError if a handler name is not defined.
+    """
+    # Handler names tuple list
+    name_tuple_s = [_to_handler_names(get_config('DEFAULT_HANDLERS'))]
+
+    # For each spec
+    for spec_info in parsed_specs.values():
+        # Get handler names
+        name_s = get_spec_handler_names(spec_info['spec_arg'])
+
+        #
+        if name_s is not None:
+            name_tuple_s.append(name_s)
+
+    # For each handler names tuple
+    for name_s in name_tuple_s:
+        # For each handler name
+        for name in name_s:
+            # If the handler is not defined
+            if name not in handlers and name not in _HANDLERS:
+                # Raise error
+                raise ValueError(
+                    'Handler is not defined: {}'.format(repr(name))
+                )
+
+
+def handler_filter(info, parsed_specs):
+    #
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
+
+    #
+    name_s = None
+
+    #
+    if spec_info is not None:
+        #
+        name_s = get_spec_handler_names(spec_info['spec_arg'])
+
+    # If the spec not selects handlers
+    if name_s is None:
+        # Use default
+        name_s = _to_handler_names(get_config('DEFAULT_HANDLERS'))
+
+    #
+    info[INFO_K_HANDLERS] = name_s
+
+    #
+    return info
+
+
+def _create_fanout_handler(handler_s):
+    # If one handler is used
+    if len(handler_s) == 1:
+        # Use the handler directly
+        return handler_s[0]
+
+    # Create handler passing each event to all handlers.
+    # Unlike `chain_filters`, a handler's result not affects the others.
+    def fanout_handler(info):
+        #
+        for handler in handler_s:
+            handler(info)
+
+        #
+        return info
+
+    #
+    return fanout_handler
+
+
+def create_dispatch_handler(handlers):
+    """
+    Create handler that passes events to the handlers selected by the \
+        traced function's spec, see `handler_filter`.
+
+    The created handler has specializer, see `util.set_specializer`, that
+    resolves the handlers of each wrapped function at wrap time, so each
+    function only calls the handlers it uses.
+
+    :param handlers: Dict mapping handler name to handler function, in \
+        addition to registered handlers.
+
+    :return: Handler function.
+    """
+    # Map handler names tuple to fan-out handler
+    fanout_handlers = {}
+
+    # Create function getting fan-out handler of given handler names
+    def get_fanout_handler(name_s):
+        #
+        fanout_handler = fanout_handlers.get(name_s, None)
+
+        #
+        if fanout_handler is None:
+            #
+            handler_s = []
+
+            #
+            for name in name_s:
+                #
+                handler = handlers.get(name, None) or _HANDLERS.get(name, None)
+
+                #
+                if handler is None:
+                    raise ValueError(
+                        'Handler is not defined: {}'.format(repr(name))
+                    )
+
+                #
+                handler_s.append(handler)
+
+            #
+            fanout_handler = _create_fanout_handler(handler_s)
+
+            #
+            fanout_handlers[name_s] = fanout_handler
+
+        #
+        return fanout_handler
+
+    # Create handler for calls not specialized
+    def dispatch_handler(info):
+        #
+        name_s = info.get(INFO_K_HANDLERS, None)
+
+        #
+        if name_s is None:
+            name_s = _to_handler_names(get_config('DEFAULT_HANDLERS'))
+
+        #
+        return get_fanout_handler(name_s)(info)
+
+    # Create specializer
+    def specialize(info):
+        #
+        name_s = info.get(INFO_K_HANDLERS, None)
+
+        # If the handlers are not resolved at wrap time
+        if name_s is None:
+            return dispatch_handler
+
+        # If no handler is used
+        if not name_s:
+            # Return False to stop the handler chain
+            return False
+
+        #
+        return get_fanout_handler(tuple(name_s))
+
+    #
+    dispatch_handler.specialize = specialize
+
+    #
+    return dispatch_handler
+
+
+# ----- Stats handler -----
+# Map URI to list of call count, total time, total self time, min time and
+# max time
+_CALL_STATS = {}
+
+
+def stats_handler(info):
+    """
+    Trace handler that aggregates call timing stats per URI.
+
+    :param info: Info dict.
+
+    :return: Info dict.
+    """
+    # If is not post-call event
+    if info['trace_hook_type'] != 'post_call':
+        return info
+
+    #
+    uri = info['onwrap_uri']
+
+    #
+    elapsed = info['elapsed']
+
+    #
+    stats = _CALL_STATS.get(uri, None)
+
+    #
+    if stats is None:
+        _CALL_STATS[uri] = [1, elapsed, info['self_time'], elapsed, elapsed]
+    else:
+        #
+        stats[0] += 1
+
+        stats[1] += elapsed
+
+        stats[2] += info['self_time']
+
+        #
+        if elapsed < stats[3]:
+            stats[3] = elapsed
+
+        #
+        if elapsed > stats[4]:
+            stats[4] = elapsed
+
+    #
+    return info
+
+
+def get_call_stats():
+    """
+    Get call timing stats aggregated by `stats_handler`.
+
+    :return: Dict mapping URI to dict with keys `count`, `total_time`, \
+        `self_time`, `min_time` and `max_time`, in seconds.
+    """
+    return dict(
+        (uri, {
+            'count': stats[0],
+            'total_time': stats[1],
+            'self_time': stats[2],
+            'min_time': stats[3],
+            'max_time': stats[4],
+        })
+        for uri, stats in list(_CALL_STATS.items())
+    )
+
+
+# ----- Count handler -----
+# Map URI to call count
+_CALL_COUNTS = {}
+
+
+def count_handler(info):
+    """
+    Trace handler that counts calls per URI.
+
+    :param info: Info dict.
+
+    :return: Info dict.
+    """
+    # If is pre-call event
+    if info['trace_hook_type'] == 'pre_call':
+        #
+        uri = info['onwrap_uri']
+
+        #
+        _CALL_COUNTS[uri] = _CALL_COUNTS.get(uri, 0) + 1
+
+    #
+    return info
+
+
+def get_call_counts():
+    """
+    Get call counts counted by `count_handler`.
+
+    :return: Dict mapping URI to call count.
+    """
+    return dict(_CALL_COUNTS)
+
+
+# Register built-in handlers
+register_handler(HANDLER_STATS, stats_handler)
+
+register_handler(HANDLER_COUNT, count_handler)
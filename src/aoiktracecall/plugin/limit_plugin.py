@@ -0,0 +1,52 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import get_config
+from aoiktracecall.spec import get_matched_spec_info
+
+
+# ----- Info dict keys -----
+# Tuple of max depth, max children and max rate.
+# Notice code at 4LMTS relies on this key.
+INFO_K_TRACE_LIMITS = 'trace_limits'
+
+
+# Map spec dict key to config key
+_LIMIT_KEYS = (
+    ('max_depth', 'TRACE_MAX_DEPTH'),
+    ('max_children', 'TRACE_MAX_CHILDREN'),
+    ('max_rate', 'TRACE_MAX_RATE'),
+)
+
+
+def limit_filter(info, parsed_specs):
+    #
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
+
+    #
+    spec_arg = spec_info['spec_arg'] if spec_info is not None else None
+
+    # Limit value list
+    limit_s = []
+
+    #
+    for spec_key, config_key in _LIMIT_KEYS:
+        # Get config value
+        value = get_config(config_key)
+
+        # If the spec is dict
+        if isinstance(spec_arg, dict):
+            # Use spec value if given
+            value = spec_arg.get(spec_key, value)
+
+        #
+        limit_s.append(value)
+
+    # If any limit is set
+    if any(value is not None for value in limit_s):
+        #
+        info[INFO_K_TRACE_LIMITS] = tuple(limit_s)
+
+    #
+    return info
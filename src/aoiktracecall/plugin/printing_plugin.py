@@ -3,6 +3,7 @@ from __future__ import absolute_import
 
 # Standard imports
 from inspect import isclass
+import os
 from pprint import pformat
 from traceback import format_exc
 
@@ -10,13 +11,17 @@ from traceback import format_exc
 from aoiktracecall.config import get_config
 from aoiktracecall.logging import print_error
 from aoiktracecall.logging import print_info
-from aoiktracecall.spec import find_matched_spec_info
+from aoiktracecall.spec import get_matched_spec_info
 from aoiktracecall.state import count_get
+from aoiktracecall.state import get_simple_task_id
 from aoiktracecall.state import get_simple_thread_id
+from aoiktracecall.state import STATE_BACKEND_CONTEXT
+from aoiktracecall.state import state_backend_get
 from aoiktracecall.util import format_func_args
 from aoiktracecall.util import format_func_name
 from aoiktracecall.util import indent_by_level
 from aoiktracecall.util import to_uri
+from aoiktracecall.wrap import ExceptionInfo
 from aoiktracecall.wrap import get_wrapped_obj
 from aoiktracecall.wrap import STATICMETHOD_TYPE
 
@@ -55,7 +60,7 @@ INFO_K_HIGHLIGHT = 'highlight'
 
 def printing_filter(info, parsed_specs):
     #
-    spec_info = find_matched_spec_info(info=info, parsed_specs=parsed_specs)
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
 
     #
     if spec_info is None:
@@ -126,17 +131,26 @@ def printing_handler(info, filter_func=None):
     # `self` argument value
     self_arg_value = None
 
+    # Get arguments bound by signature-preserving wrapper
+    bound_args = info.get('bound_args', None)
+
+    # If arguments are bound
+    if bound_args is not None:
+        # Get inspect info without inspecting function signature
+        inspect_info = bound_args.to_inspect_info()
+
     #
-    try:
-        # Inspect function arguments
-        inspect_info = inspect_arguments(
-            func=func,
-            args=args,
-            kwargs=kwargs,
-        )
-    #
-    except Exception:
-        inspect_info = None
+    else:
+        try:
+            # Inspect function arguments
+            inspect_info = inspect_arguments(
+                func=func,
+                args=args,
+                kwargs=kwargs,
+            )
+        #
+        except Exception:
+            inspect_info = None
 
     #
     args_inspect_info_debug_msg = None
@@ -290,12 +304,29 @@ def printing_handler(info, filter_func=None):
     #
     indent_text = indent_unit * level
 
+    # Simple task ID
+    simple_task_id = None
+
+    # If each asyncio task has its own call tree
+    if state_backend_get() == STATE_BACKEND_CONTEXT:
+        # Get simple task ID
+        simple_task_id = get_simple_task_id()
+
     #
-    if simple_thread_id != 0 or get_config('SHOW_MAIN_THREAD_ID'):
+    if simple_task_id is not None:
+        thread_text = ' T{}.A{}:'.format(simple_thread_id, simple_task_id)
+    elif simple_thread_id != 0 or get_config('SHOW_MAIN_THREAD_ID'):
         thread_text = ' T{}:'.format(simple_thread_id)
     else:
         thread_text = ''
 
+    # If need show process ID
+    if get_config('SHOW_PROCESS_ID'):
+        # Add process ID before thread ID
+        thread_text = ' P{}{}'.format(
+            os.getpid(), thread_text if thread_text else ':'
+        )
+
     #
     count_text = ' {}: '.format(count)
 
@@ -310,18 +341,41 @@ def printing_handler(info, filter_func=None):
             func_name=func_name_text,
             args_text='( {} )'.format(args_text) if args_text else ''
         )
+
+        # Get count of calls suppressed by rate limit since the URI's last
+        # traced call
+        rate_suppressed_count = info.get('rate_suppressed_count', None)
+
+        # If have suppressed calls
+        if rate_suppressed_count:
+            call_msg += '\n{indent}Suppressed by rate limit: {count}'.format(
+                indent=indent_text,
+                count=rate_suppressed_count,
+            )
     elif trace_hook_type == 'post_call':
         #
         call_result = info['call_result']
 
-        #
-        call_result_text = repr_func(call_result)
+        # If the exception propagated from a traced callee, which printed its
+        # traceback already
+        if isinstance(call_result, ExceptionInfo) and \
+                call_result.propagated and \
+                not get_config('PRINTING_PROPAGATED_EXCEPTION_TRACEBACK'):
+            # Get one-line text
+            call_result_text = call_result.format_short()
+        else:
+            #
+            call_result_text = repr_func(call_result)
 
         #
         call_result_text = call_result_text.replace('\n', '\n' + indent_text)
 
+        # Use the count stored when the event was buffered, if any
+        post_call_count = info.get('post_call_count', None)
+
         #
-        post_call_count = count_get()
+        if post_call_count is None:
+            post_call_count = count_get()
 
         if post_call_count == count:
             next_count_text = ''
@@ -331,18 +385,78 @@ def printing_handler(info, filter_func=None):
                 next_count=post_call_count + 1
             )
 
+        # Get count of calls below suppressed by limits
+        suppressed_count = info.get('suppressed_count', None)
+
+        #
+        if suppressed_count:
+            suppressed_text = '\n{indent}Suppressed: {count}'.format(
+                indent=indent_text,
+                count=suppressed_count,
+            )
+        else:
+            suppressed_text = ''
+
+        # Get duration text
+        elapsed = info.get('elapsed', None)
+
+        #
+        if elapsed is None:
+            elapsed_text = ''
+        else:
+            elapsed_text = ' ({:.6f}s, self {:.6f}s{})'.format(
+                elapsed,
+                info['self_time'],
+                ', cpu {:.6f}s'.format(info['cpu_time'])
+                if 'cpu_time' in info else '',
+            )
+
         # 5JKGC
         call_msg = (
             '{indent}-{thread}{count}===== {func_name} ===== <= {result}'
-            '{next_count}\n'
+            '{elapsed}{suppressed}{next_count}\n'
         ).format(
             indent=indent_text,
             thread=thread_text,
             count=count_text,
             func_name=func_name_text,
             result=call_result_text,
+            elapsed=elapsed_text,
+            suppressed=suppressed_text,
             next_count=next_count_text,
         )
+    elif trace_hook_type == 'gen_resume':
+        call_msg = (
+            '{indent}>{thread}{count}----- {func_name} ----- resume #{resume}'
+        ).format(
+            indent=indent_text,
+            thread=thread_text,
+            count=count_text,
+            func_name=func_name_text,
+            resume=info['resume_count'],
+        )
+    elif trace_hook_type in ('gen_yield', 'gen_finish'):
+        #
+        if trace_hook_type == 'gen_yield':
+            result_text = 'yield ' + repr_func(info['yield_value'])
+        else:
+            result_text = 'finish ' + repr_func(info['call_result'])
+
+        #
+        result_text = result_text.replace('\n', '\n' + indent_text)
+
+        #
+        call_msg = (
+            '{indent}<{thread}{count}===== {func_name} ===== <= {result}'
+            ' ({elapsed:.6f}s)\n'
+        ).format(
+            indent=indent_text,
+            thread=thread_text,
+            count=count_text,
+            func_name=func_name_text,
+            result=result_text,
+            elapsed=info['elapsed'],
+        )
     else:
         raise ValueError(trace_hook_type)
 
@@ -426,7 +540,7 @@ def printing_handler(info, filter_func=None):
         #
         if trace_hook_type == 'pre_call':
             pre_figlet_title = title
-        else:
+        elif trace_hook_type == 'post_call':
             post_figlet_title = title
 
     # Message list
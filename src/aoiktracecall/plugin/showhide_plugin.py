@@ -1,11 +1,10 @@
 # coding: utf-8
 from __future__ import absolute_import
 
-# Standard imports
-import threading
-
 # Internal imports
-from aoiktracecall.spec import find_matched_spec_info
+from aoiktracecall.spec import get_matched_spec_info
+from aoiktracecall.state import showhide_bits_get
+from aoiktracecall.state import showhide_bits_set
 
 
 # ----- Constants -----
@@ -43,14 +42,18 @@ INFO_K_SHOWHIDE_VALUES = {
 # ----- Info dict keys -----
 INFO_K_SHOWHIDE = 'showhide'
 
+# Opcode resolved from the showhide value, see `get_showhide_op`
+INFO_K_SHOWHIDE_OP = 'showhide_op'
+
+# Whether the wrapper can skip all handler work of the call if it is below a
+# call hiding calls below it.
+# Notice code at 5HSKP relies on this key.
+INFO_K_SKIP_WHEN_HIDDEN = 'skip_when_hidden'
+
 
 def showhide_filter(info, parsed_specs):
     #
-    spec_info = find_matched_spec_info(
-        info=info,
-        parsed_specs=parsed_specs,
-        need_log=True,
-    )
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
 
     #
     if spec_info is None:
@@ -101,77 +104,242 @@ def showhide_filter(info, parsed_specs):
         if info['showhide'] is False:
             return False
         else:
+            # Resolve opcode
+            op = info[INFO_K_SHOWHIDE_OP] = get_showhide_op(info['showhide'])
+
+            # If the call's visibility depends only on whether it is below a
+            # call hiding calls below it
+            if op == OP_SHOW_UNLESS_HIDDEN:
+                # Let the wrapper skip the call when hidden
+                info[INFO_K_SKIP_WHEN_HIDDEN] = True
+
             return info
 
 
-_TLocal = threading.local()
+def specs_use_hide_stack(parsed_specs):
+    """
+    Get whether any of given specs hides calls below a call.
 
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :return: Boolean.
+    """
+    # For each spec
+    for spec_info in parsed_specs.values():
+        #
+        spec_arg = spec_info['spec_arg']
+
+        #
+        if isinstance(spec_arg, dict):
+            value_s = [spec_arg.get(INFO_K_SHOWHIDE, None)]
+        else:
+            value_s = spec_arg
+
+        # If the spec uses a value that pushes a `hide` item to the stack.
+        # 3WO2X
+        if HIDE_TREE in value_s or HIDE_BELOW in value_s:
+            return True
+
+    #
+    return False
+
+
+# ----- Opcodes -----
+# Showhide values are resolved into opcodes at wrap time.
+
+# Show the call
+OP_SHOW = 0
+
+# Hide the call
+OP_HIDE = 1
+
+# Show the call unless it is below a call hiding calls below it
+OP_SHOW_UNLESS_HIDDEN = 2
+
+# Values that push to the show/hide bit stack
+OP_HIDE_TREE = 3
+
+OP_HIDE_BELOW = 4
+
+OP_SHOW_TREE = 5
+
+OP_SHOW_BELOW = 6
+
+
+# Map showhide value to opcode
+_SHOWHIDE_OPS = {
+    SHOW_THIS: OP_SHOW,
+    HIDE_THIS: OP_HIDE,
+    HIDE_TREE: OP_HIDE_TREE,
+    HIDE_BELOW: OP_HIDE_BELOW,
+    SHOW_TREE: OP_SHOW_TREE,
+    SHOW_BELOW: OP_SHOW_BELOW,
+}
+
+
+def get_showhide_op(showhide):
+    """
+    Get opcode of given showhide value.
+
+    :param showhide: Showhide value, i.e. None, True, False, or one of \
+        `INFO_K_SHOWHIDE_VALUES`.
+
+    :return: Opcode.
+    """
+    #
+    if showhide is None:
+        return OP_SHOW
+
+    #
+    if showhide is True:
+        return OP_SHOW_UNLESS_HIDDEN
 
-def showhide_handler(info):
     #
-    state_stack = getattr(_TLocal, 'state_stack', None)
+    if showhide is False:
+        return OP_HIDE
 
-    if state_stack is None:
-        state_stack = _TLocal.state_stack = []
+    #
+    op = _SHOWHIDE_OPS.get(showhide, None)
+
+    #
+    if op is None:
+        raise ValueError(showhide)
+
+    #
+    return op
 
+
+# Hook types that push to the show/hide bit stack.
+# A generator resume is handled like a call, and a generator yield or finish
+# is handled like a return.
+_PUSH_HOOK_TYPES = frozenset(('pre_call', 'gen_resume'))
+
+
+# Hook types that pop from the show/hide bit stack
+_POP_HOOK_TYPES = frozenset(('post_call', 'gen_yield', 'gen_finish'))
+
+
+def _push_or_pop(info, hide_bit):
+    # The show/hide stack is an integer used as bit stack. The lowest bit is
+    # the top item, 1 means hide calls below and 0 means show calls below.
+    # An empty stack is 0, i.e. same as show.
+    #
+    # Pop does not check the popped item is pushed by the same function, so
+    # push and pop must be balanced, which holds since they are done for the
+    # pre-call and post-call events of the same call.
     #
     trace_hook_type = info['trace_hook_type']
 
     #
-    func = info['func']
+    if trace_hook_type in _PUSH_HOOK_TYPES:
+        showhide_bits_set((showhide_bits_get() << 1) | hide_bit)
+    elif trace_hook_type in _POP_HOOK_TYPES:
+        showhide_bits_set(showhide_bits_get() >> 1)
+    else:
+        raise ValueError(trace_hook_type)
+
+
+def _show_handler(info):
+    return info
+
+
+def _hide_handler(info):
+    return False
+
 
+def _show_unless_hidden_handler(info):
+    # 3WO2X
+    return False if showhide_bits_get() & 1 else info
+
+
+def _hide_tree_handler(info):
     #
-    showhide = info.get(INFO_K_SHOWHIDE, None)
+    _push_or_pop(info, 1)
 
     #
-    if showhide is None:
-        return info
+    return False
 
+
+def _hide_below_handler(info):
     #
-    elif showhide is False:
-        return False
+    _push_or_pop(info, 1)
 
-    elif showhide is True:
-        # 3WO2X
-        if state_stack and state_stack[-1][0].startswith('hide'):
-            return False
-        else:
-            return info
+    #
+    return info
 
-    elif showhide == SHOW_THIS:
-        return info
 
-    elif showhide == HIDE_THIS:
-        return False
+def _show_tree_handler(info):
+    #
+    _push_or_pop(info, 0)
 
-    elif showhide in [
-            HIDE_TREE,
-            HIDE_BELOW,
-            SHOW_TREE,
-            SHOW_BELOW]:
-        if trace_hook_type == 'pre_call':
-            state_stack.append((showhide, func))
-        elif trace_hook_type == 'post_call':
-            if state_stack and state_stack[-1][1] is func:
-                state_stack.pop()
-        else:
-            raise ValueError(trace_hook_type)
+    #
+    return info
 
-        if showhide == HIDE_TREE:
-            return False
 
-        elif showhide == SHOW_TREE:
-            return info
+def _show_below_handler(info):
+    #
+    _push_or_pop(info, 0)
 
-        elif showhide == SHOW_BELOW:
-            return False
+    #
+    return False
+
+
+# Map opcode to handler
+_OP_HANDLERS = {
+    OP_SHOW: _show_handler,
+    OP_HIDE: _hide_handler,
+    OP_SHOW_UNLESS_HIDDEN: _show_unless_hidden_handler,
+    OP_HIDE_TREE: _hide_tree_handler,
+    OP_HIDE_BELOW: _hide_below_handler,
+    OP_SHOW_TREE: _show_tree_handler,
+    OP_SHOW_BELOW: _show_below_handler,
+}
 
-        elif showhide == HIDE_BELOW:
-            return info
 
-        else:
-            raise ValueError(showhide)
-    else:
-        raise ValueError(showhide)
+def showhide_specializer(info, use_hide_stack=True):
+    """
+    Specializer of `showhide_handler`, see `util.set_specializer`.
+
+    :param info: Wrapped function's info dict.
+
+    :param use_hide_stack: Whether any call hides calls below it, see \
+        `specs_use_hide_stack`.
+
+    :return: Handler of the call's opcode, None if the handler can be \
+        skipped, or False if the handler always stops the chain.
+    """
+    #
+    op = info.get(INFO_K_SHOWHIDE_OP, None)
+
+    #
+    if op is None:
+        op = get_showhide_op(info.get(INFO_K_SHOWHIDE, None))
+
+    # If the call is always shown
+    if op == OP_SHOW:
+        return None
+
+    # If the call is always hidden
+    if op == OP_HIDE:
+        return False
+
+    # If the call is shown unless below a hidden call, and no call is hidden
+    # with its callees
+    if op == OP_SHOW_UNLESS_HIDDEN and not use_hide_stack:
+        return None
+
+    #
+    return _OP_HANDLERS[op]
+
+
+def showhide_handler(info):
+    #
+    op = info.get(INFO_K_SHOWHIDE_OP, None)
+
+    # If the opcode is not resolved at wrap time
+    if op is None:
+        #
+        op = get_showhide_op(info.get(INFO_K_SHOWHIDE, None))
 
-    raise ValueError(showhide)
+    # Delegate call to the opcode's handler
+    return _OP_HANDLERS[op](info)
@@ -0,0 +1,453 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Standard imports
+import atexit
+import os
+import socket
+import struct
+import threading
+from traceback import format_exc
+
+# Internal imports
+from aoiktracecall.logging import print_error
+from aoiktracecall.state import fork_callback_add
+from aoiktracecall.state import get_simple_thread_id
+from aoiktracecall.state import get_timestamp
+
+
+# ----- Binary framing -----
+# Frame header: magic, process ID, payload length.
+# The payload is a sequence of records. Each record starts with a record type
+# byte.
+# Version 2 widens the event record's level field.
+_FRAME_MAGIC = b'ATC2'
+
+_FRAME_HEADER_STRUCT = struct.Struct('<4sII')
+
+# URI definition record: record type, URI ID, URI byte count.
+# Followed by URI bytes in UTF-8.
+_RECORD_TYPE_URI = 1
+
+_URI_RECORD_STRUCT = struct.Struct('<BIH')
+
+# Event record: record type, hook type code, URI ID, simple thread ID, level,
+# count, timestamp.
+# Level is a 32-bit integer so that deep recursion can not overflow it.
+_RECORD_TYPE_EVENT = 2
+
+_EVENT_RECORD_STRUCT = struct.Struct('<BBIHiqd')
+
+# Map hook type to hook type code
+HOOK_TYPE_CODES = {
+    'pre_call': 0,
+    'post_call': 1,
+    'gen_resume': 2,
+    'gen_yield': 3,
+    'gen_finish': 4,
+}
+
+# Map hook type code to hook type
+HOOK_TYPES = dict((code, name) for name, code in HOOK_TYPE_CODES.items())
+
+
+def encode_frame(pid, payload):
+    """
+    Encode frame header for given payload.
+
+    :param pid: Process ID.
+
+    :param payload: Payload bytes.
+
+    :return: Header bytes.
+    """
+    return _FRAME_HEADER_STRUCT.pack(_FRAME_MAGIC, pid, len(payload))
+
+
+def decode_frames(data, uri_table):
+    """
+    Decode complete frames at the start of given data.
+
+    :param data: Received bytes.
+
+    :param uri_table: Dict mapping URI ID to URI of the sending process. \
+        Updated with URI definition records decoded.
+
+    :return: Tuple of event dict list and count of bytes decoded. Event dicts \
+        have keys `pid`, `type`, `uri`, `thread`, `level`, `count` and `ts`.
+    """
+    # Event list
+    event_s = []
+
+    # Offset of next frame
+    offset = 0
+
+    # Header size
+    header_size = _FRAME_HEADER_STRUCT.size
+
+    # While have a complete frame header
+    while len(data) - offset >= header_size:
+        # Decode frame header
+        magic, pid, payload_size = _FRAME_HEADER_STRUCT.unpack_from(
+            data, offset
+        )
+
+        # If magic is invalid
+        if magic != _FRAME_MAGIC:
+            raise ValueError('Invalid frame magic: {!r}'.format(magic))
+
+        # If the frame payload is incomplete
+        if len(data) - offset - header_size < payload_size:
+            # Wait for more data
+            break
+
+        # Get payload offset
+        record_offset = offset + header_size
+
+        # Get payload end offset
+        payload_end = record_offset + payload_size
+
+        # While have records
+        while record_offset < payload_end:
+            # Get record type
+            record_type = bytearray(
+                data[record_offset:record_offset + 1]
+            )[0]
+
+            # If is URI definition record
+            if record_type == _RECORD_TYPE_URI:
+                #
+                _, uri_id, uri_size = _URI_RECORD_STRUCT.unpack_from(
+                    data, record_offset
+                )
+
+                #
+                record_offset += _URI_RECORD_STRUCT.size
+
+                #
+                uri_table[uri_id] = bytes(
+                    data[record_offset:record_offset + uri_size]
+                ).decode('utf-8')
+
+                #
+                record_offset += uri_size
+
+            # If is event record
+            elif record_type == _RECORD_TYPE_EVENT:
+                #
+                _, hook_code, uri_id, thread, level, count, timestamp = \
+                    _EVENT_RECORD_STRUCT.unpack_from(data, record_offset)
+
+                #
+                record_offset += _EVENT_RECORD_STRUCT.size
+
+                #
+                event_s.append({
+                    'pid': pid,
+                    'type': HOOK_TYPES.get(hook_code, hook_code),
+                    'uri': uri_table.get(uri_id, None),
+                    'thread': thread,
+                    'level': level,
+                    'count': count,
+                    'ts': timestamp,
+                })
+
+            # If record type is invalid
+            else:
+                raise ValueError(
+                    'Invalid record type: {!r}'.format(record_type)
+                )
+
+        # Move to next frame
+        offset = payload_end
+
+    # Return events and count of bytes decoded
+    return event_s, offset
+# ===== Binary framing =====
+
+
+class SocketEventSender(object):
+    """
+    Serialize trace events into a buffer and send them in batches to a \
+        collector over a Unix domain socket.
+
+    Adding an event only appends to the buffer. The buffer is sent when its
+    size reaches `batch_size`, when `flush_interval` seconds have passed since
+    the last send, at process exit, and before fork. If the collector is not
+    available, buffered events are dropped and counted in `dropped_count`.
+    """
+
+    def __init__(
+        self,
+        socket_path,
+        batch_size=64 * 1024,
+        flush_interval=1.0,
+        reconnect_interval=5.0,
+    ):
+        #
+        self.socket_path = socket_path
+
+        #
+        self.batch_size = batch_size
+
+        #
+        self.flush_interval = flush_interval
+
+        #
+        self.reconnect_interval = reconnect_interval
+
+        #
+        self.sent_count = 0
+
+        #
+        self.dropped_count = 0
+
+        #
+        self._init_process_state()
+
+        # Send buffered events at process exit
+        atexit.register(self.flush)
+
+        # Send buffered events before fork so they are not copied to the child
+        # process
+        fork_callback_add(self.flush, before=True)
+
+        # Use new connection and URI table in child process
+        fork_callback_add(self._init_process_state)
+
+    def _init_process_state(self):
+        #
+        self._pid = os.getpid()
+
+        #
+        self._lock = threading.Lock()
+
+        #
+        self._buffer = bytearray()
+
+        #
+        self._event_count = 0
+
+        # Map URI to URI ID
+        self._uri_ids = {}
+
+        #
+        self._socket = None
+
+        #
+        self._last_flush_time = get_timestamp()
+
+        #
+        self._last_connect_time = None
+
+    def add_event(self, info):
+        """
+        Add event for given info dict.
+
+        :param info: Info dict passed to trace handler.
+
+        :return: None.
+        """
+        # Get URI
+        uri = info['onwrap_uri']
+
+        #
+        with self._lock:
+            # Get URI ID
+            uri_id = self._uri_ids.get(uri, None)
+
+            # If the URI has no ID yet
+            if uri_id is None:
+                # Create URI ID
+                uri_id = self._uri_ids[uri] = len(self._uri_ids)
+
+                # Get URI bytes
+                uri_bytes = uri.encode('utf-8')
+
+                # Add URI definition record
+                self._buffer += _URI_RECORD_STRUCT.pack(
+                    _RECORD_TYPE_URI, uri_id, len(uri_bytes)
+                )
+
+                self._buffer += uri_bytes
+
+            # Add event record
+            self._buffer += _EVENT_RECORD_STRUCT.pack(
+                _RECORD_TYPE_EVENT,
+                HOOK_TYPE_CODES.get(info['trace_hook_type'], 255),
+                uri_id,
+                get_simple_thread_id() & 0xFFFF,
+                info['level'],
+                info['count'],
+                get_timestamp(),
+            )
+
+            #
+            self._event_count += 1
+
+            # If the buffer is full, or flush interval has passed
+            if len(self._buffer) >= self.batch_size or (
+                get_timestamp() - self._last_flush_time >= self.flush_interval
+            ):
+                # Send the buffer
+                self._flush_locked()
+
+    def flush(self):
+        """
+        Send buffered events.
+
+        :return: None.
+        """
+        #
+        with self._lock:
+            #
+            self._flush_locked()
+
+    def close(self):
+        """
+        Send buffered events and close connection.
+
+        :return: None.
+        """
+        #
+        with self._lock:
+            #
+            self._flush_locked()
+
+            #
+            if self._socket is not None:
+                #
+                self._socket.close()
+
+                #
+                self._socket = None
+
+    def _connect(self):
+        # Get current time
+        now = get_timestamp()
+
+        # If reconnect interval has not passed since last failed connect
+        if self._last_connect_time is not None and \
+                now - self._last_connect_time < self.reconnect_interval:
+            # Return None
+            return None
+
+        #
+        self._last_connect_time = now
+
+        # Create socket
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        #
+        try:
+            # Connect to collector
+            sock.connect(self.socket_path)
+        except (IOError, OSError):
+            #
+            sock.close()
+
+            # Return None
+            return None
+
+        # Return socket
+        return sock
+
+    def _flush_locked(self):
+        #
+        self._last_flush_time = get_timestamp()
+
+        # If no events
+        if not self._buffer:
+            # Ignore
+            return
+
+        # Get payload
+        payload = bytes(self._buffer)
+
+        # Get event count
+        event_count = self._event_count
+
+        # Clear buffer
+        self._buffer = bytearray()
+
+        #
+        self._event_count = 0
+
+        # If not connected
+        if self._socket is None:
+            # Connect to collector
+            self._socket = self._connect()
+
+        # If not connected
+        if self._socket is None:
+            # Drop the events
+            self.dropped_count += event_count
+
+            # URI definitions in the dropped payload are lost, so URIs must be
+            # defined again in later payloads
+            self._uri_ids = {}
+
+            # Return
+            return
+
+        # Get frame header
+        header = encode_frame(self._pid, payload)
+
+        #
+        try:
+            # If `sendmsg` is supported, in Python 3.3+
+            if hasattr(self._socket, 'sendmsg'):
+                # Send header and payload without concatenating them
+                sent_size = self._socket.sendmsg([header, payload])
+
+                # If not all data is sent
+                if sent_size < len(header) + len(payload):
+                    # Send the rest
+                    self._socket.sendall(
+                        (header + payload)[sent_size:]
+                    )
+            else:
+                # Send frame
+                self._socket.sendall(header + payload)
+
+            #
+            self.sent_count += event_count
+
+        except (IOError, OSError):
+            #
+            error_msg = (
+                '# Error when sending trace events to collector:'
+                '\n---\n{}---\n'
+            ).format(format_exc())
+
+            #
+            print_error(error_msg)
+
+            #
+            self._socket.close()
+
+            #
+            self._socket = None
+
+            # URIs must be defined again on next connection
+            self._uri_ids = {}
+
+            #
+            self.dropped_count += event_count
+
+
+def socket_handler(info, sender):
+    """
+    Trace handler that sends events to collector via given sender.
+
+    :param info: Info dict.
+
+    :param sender: SocketEventSender instance.
+
+    :return: Info dict.
+    """
+    # Add event
+    sender.add_event(info)
+
+    # Return info dict
+    return info
@@ -0,0 +1,151 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.spec import get_matched_spec_info
+from aoiktracecall.spec import get_spec_stats
+from aoiktracecall.spec import get_spec_stats_item
+from aoiktracecall.wrap import INFO_K_SKIP_HOOK
+
+
+# ----- Info dict keys -----
+# URI of the spec matching the traced object
+INFO_K_SPEC_URI = 'spec_uri'
+
+
+def spec_stats_filter(info, parsed_specs):
+    # Match the specs, counting the matched spec, and store the spec's URI
+    # in info dict key `spec_uri`. Filters chained after it reuse the match.
+    # Objects are never rejected.
+
+    #
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
+
+    #
+    if spec_info is not None:
+        #
+        info[INFO_K_SPEC_URI] = spec_info['spec_uri']
+
+        # Count calls skipped because hidden, for which handlers are not
+        # called
+        info[INFO_K_SKIP_HOOK] = spec_stats_skip_hook
+
+    #
+    return info
+
+
+def spec_stats_handler(info):
+    # Count calls per matched spec
+
+    # If is pre-call event
+    if info['trace_hook_type'] == 'pre_call':
+        #
+        spec_uri = info.get(INFO_K_SPEC_URI, None)
+
+        #
+        if spec_uri is not None:
+            #
+            get_spec_stats_item(spec_uri)[1] += 1
+
+    #
+    return info
+
+
+def spec_stats_skip_hook(info):
+    # Count a call of the function's spec skipped because it is hidden, see
+    # `wrap.INFO_K_SKIP_HOOK`
+    get_spec_stats_item(info[INFO_K_SPEC_URI])[1] += 1
+
+
+def spec_stats_specializer(info):
+    # Return handler counting calls of the function's spec, or None to skip
+    # the handler if the function not matches a spec
+
+    #
+    spec_uri = info.get(INFO_K_SPEC_URI, None)
+
+    # If the function not matches a spec
+    if spec_uri is None:
+        # Skip the handler
+        return None
+
+    # Get stats item, looked up once here instead of on each call
+    stats = get_spec_stats_item(spec_uri)
+
+    #
+    def handler(info):
+        # If is pre-call event
+        if info['trace_hook_type'] == 'pre_call':
+            #
+            stats[1] += 1
+
+        #
+        return info
+
+    #
+    return handler
+
+
+def format_spec_stats_report(parsed_specs, top_count=10):
+    """
+    Format report of dead specs and the specs most expensive to match.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :param top_count: Number of most expensive specs to list.
+
+    :return: Report text.
+    """
+    # Get stats
+    stats_dict = get_spec_stats()
+
+    # Default stats of specs not having stats
+    default_stats = {'matched': 0, 'calls': 0, 'match_time': 0.0, 'tests': 0}
+
+    # Get list of spec URI and stats, in matching order
+    item_s = [
+        (uri, stats_dict.get(uri, default_stats)) for uri in parsed_specs
+    ]
+
+    # Line list
+    line_s = []
+
+    # Get dead specs, i.e. specs that matched no objects
+    dead_uri_s = [uri for uri, stats in item_s if not stats['matched']]
+
+    #
+    line_s.append('# ----- Dead specs: {} of {} -----'.format(
+        len(dead_uri_s), len(item_s)
+    ))
+
+    #
+    line_s.extend(dead_uri_s)
+
+    # Get total matching time
+    total_time = sum(stats['match_time'] for _, stats in item_s)
+
+    #
+    line_s.append('# ----- Most expensive specs: total {:.6f}s -----'.format(
+        total_time
+    ))
+
+    # Sort by matching time
+    sorted_item_s = sorted(
+        item_s, key=lambda item: item[1]['match_time'], reverse=True
+    )
+
+    # For each of the most expensive specs
+    for uri, stats in sorted_item_s[:top_count]:
+        #
+        line_s.append(
+            '{:.6f}s {:>8} tests {:>6} matched {:>8} calls  {}'.format(
+                stats['match_time'],
+                stats['tests'],
+                stats['matched'],
+                stats['calls'],
+                uri,
+            )
+        )
+
+    # Return report text
+    return '\n'.join(line_s) + '\n'
@@ -0,0 +1,186 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import get_config
+from aoiktracecall.logging import print_info
+from aoiktracecall.spec import get_matched_spec_info
+from aoiktracecall.state import count_get
+from aoiktracecall.state import threshold_buffer_get
+from aoiktracecall.state import threshold_buffer_set
+from aoiktracecall.util import indent_by_level
+
+
+# ----- Info dict keys -----
+# Latency threshold in milliseconds of the traced function's calls
+INFO_K_THRESHOLD_MS = 'threshold_ms'
+
+
+def threshold_filter(info, parsed_specs):
+    #
+    threshold_ms = get_config('LATENCY_THRESHOLD_MS')
+
+    #
+    spec_info = get_matched_spec_info(info=info, parsed_specs=parsed_specs)
+
+    #
+    if spec_info is not None:
+        #
+        spec_arg = spec_info['spec_arg']
+
+        #
+        if isinstance(spec_arg, dict):
+            threshold_ms = spec_arg.get(INFO_K_THRESHOLD_MS, threshold_ms)
+
+    #
+    if threshold_ms is not None:
+        info[INFO_K_THRESHOLD_MS] = threshold_ms
+
+    #
+    return info
+
+
+def specs_have_threshold(parsed_specs):
+    """
+    Get whether latency threshold is used by config or given specs.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :return: Boolean.
+    """
+    # If default threshold is set
+    if get_config('LATENCY_THRESHOLD_MS') is not None:
+        return True
+
+    # For each spec
+    for spec_info in parsed_specs.values():
+        #
+        spec_arg = spec_info['spec_arg']
+
+        # If the spec sets threshold
+        if isinstance(spec_arg, dict) and \
+                spec_arg.get(INFO_K_THRESHOLD_MS, None) is not None:
+            return True
+
+    #
+    return False
+
+
+class ThresholdBuffer(object):
+    """
+    Events of a root call and its callees, buffered until the root call ends.
+    """
+
+    def __init__(self, func, level, threshold_ms, max_count):
+        # Root call's function
+        self.func = func
+
+        # Root call's level
+        self.level = level
+
+        #
+        self.threshold_ms = threshold_ms
+
+        #
+        self.max_count = max_count
+
+        # Buffered info dicts
+        self.infos = []
+
+        # Count of events dropped because the buffer is full
+        self.dropped_count = 0
+
+    def add(self, info):
+        # If the buffer is full
+        if len(self.infos) >= self.max_count:
+            #
+            self.dropped_count += 1
+
+            #
+            return
+
+        # If is post-call event
+        if info['trace_hook_type'] == 'post_call':
+            # Store current count for printing the next count later
+            info['post_call_count'] = count_get()
+
+        #
+        self.infos.append(info)
+
+
+def threshold_handler(info, handler):
+    """
+    Trace handler that buffers events of a call having latency threshold, \
+        and passes them to given handler only if the call is slow enough.
+
+    A call having `threshold_ms` in its info dict becomes a root call if no
+    call is being buffered in the current call tree. Events of the root call
+    and its callees are buffered, and discarded if the root call takes less
+    than the threshold. Events not under a root call are passed through.
+
+    Notice buffered arguments and results are formatted when passed to the
+    handler, i.e. after the root call ends.
+
+    :param info: Info dict.
+
+    :param handler: Handler to pass events to, e.g. `printing_handler`.
+
+    :return: Handler result, or False if the event is buffered or discarded.
+    """
+    # Get buffer of current call tree
+    buffer = threshold_buffer_get()
+
+    # If no call is being buffered
+    if buffer is None:
+        # Get threshold
+        threshold_ms = info.get(INFO_K_THRESHOLD_MS, None)
+
+        # If the call has no threshold, or the event is not a call start
+        if threshold_ms is None or info['trace_hook_type'] != 'pre_call':
+            # Pass through
+            return handler(info)
+
+        # Create buffer with the call as root call.
+        # A new buffer object is set, see `ContextLocal`.
+        buffer = threshold_buffer_set(ThresholdBuffer(
+            func=info['func'],
+            level=info['level'],
+            threshold_ms=threshold_ms,
+            max_count=get_config('LATENCY_THRESHOLD_BUFFER_MAX'),
+        ))
+
+    # If is not the root call's end event
+    if info['trace_hook_type'] != 'post_call' or \
+            info['func'] is not buffer.func or \
+            info['level'] != buffer.level:
+        # Add event to buffer
+        buffer.add(info)
+
+        # Return False to stop the handler chain
+        return False
+
+    # End buffering
+    threshold_buffer_set(None)
+
+    # If the root call is faster than the threshold
+    if info['elapsed'] * 1000 < buffer.threshold_ms:
+        # Discard the events
+        return False
+
+    # For each buffered event
+    for buffered_info in buffer.infos:
+        # Pass to handler
+        handler(buffered_info)
+
+    # If some events are dropped
+    if buffer.dropped_count:
+        # Get message
+        msg = '# Latency threshold buffer full, {} events dropped.'.format(
+            buffer.dropped_count
+        )
+
+        # Print message, indented as the root call's callees
+        print_info(indent_by_level(msg, level=buffer.level + 1), indent=False)
+
+    # Pass the root call's end event
+    return handler(info)
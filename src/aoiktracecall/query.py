@@ -0,0 +1,734 @@
+# coding: utf-8
+"""
+Query trace event files written by `aoiktracecall.collector`.
+
+Calls are reconstructed from events in streaming fashion, keeping only the
+call stack of each thread in memory. The store index of each file is used to
+skip to the requested time range, thread, or subtree.
+
+Usage:
+    python -m aoiktracecall.query [options] PATH [PATH ...]
+
+Examples:
+    # Calls under `pkg.service.Handler.handle` taking more than 50ms
+    python -m aoiktracecall.query --under pkg.service.Handler.handle \
+        --min-ms 50 DIR
+
+    # Top 20 URIs by self time in thread 3
+    python -m aoiktracecall.query --thread 3 --group-by-uri \
+        --sort self_time --top 20 DIR
+
+    # Events of the first call to `pkg.service.Handler.handle`
+    python -m aoiktracecall.query --subtree pkg.service.Handler.handle DIR
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+import heapq
+import json
+import os
+import sys
+
+# Internal imports
+from aoiktracecall.spec import get_spec_regex
+from aoiktracecall.store import TraceStore
+from aoiktracecall.store import get_thread_key
+
+
+# Map event type to whether it starts a call segment.
+# Generator resumes are treated as calls ending at the next yield or finish.
+_EVENT_TYPE_STARTS = {
+    'pre_call': True,
+    'gen_resume': True,
+    'post_call': False,
+    'gen_yield': False,
+    'gen_finish': False,
+}
+
+
+def get_event_file_paths(paths):
+    """
+    Get event file paths from given paths.
+
+    :param paths: List of event file paths or collector output directories.
+
+    :return: Event file path list.
+    """
+    # Event file path list
+    file_path_s = []
+
+    # For each path
+    for path in paths:
+        # If is directory
+        if os.path.isdir(path):
+            # Add event files in the directory
+            file_path_s.extend(
+                os.path.join(path, file_name)
+                for file_name in sorted(os.listdir(path))
+                if file_name.startswith('events.') and
+                file_name.endswith('.jsonl')
+            )
+        else:
+            # Add the file
+            file_path_s.append(path)
+
+    # Return event file path list
+    return file_path_s
+
+
+def _match_thread(thread_key, pid, thread):
+    # Get process ID text and thread ID text
+    pid_text, _, thread_text = thread_key.partition(':')
+
+    # Return whether matched
+    return (pid is None or pid_text == str(pid)) and \
+        (thread is None or thread_text == str(thread))
+
+
+def iter_calls(
+    store,
+    start_offset=0,
+    end_offset=None,
+    under=None,
+    until=None,
+):
+    """
+    Iterate calls reconstructed from events of given store.
+
+    Calls are yielded when they end, so a callee is yielded before its
+    caller. Calls started before `start_offset`, or not ended before
+    `end_offset`, are not yielded.
+
+    :param store: TraceStore instance.
+
+    :param start_offset: Byte offset to start reading at.
+
+    :param end_offset: Byte offset to stop reading after.
+
+    :param under: URI whose callees, direct or indirect, have the `under` \
+        key set to True.
+
+    :param until: Timestamp to stop reading after.
+
+    :return: Iterator of call dicts with keys `uri`, `pid`, `thread`, \
+        `level`, `start`, `end`, `duration`, `self_time`, `under`, `offset`, \
+        `count`.
+    """
+    # Map thread key to call stack.
+    # Each frame is a list of URI, level, start timestamp, byte offset,
+    # callees' total duration, whether the call is in the subtree of
+    # `under`, and call count.
+    stacks = {}
+
+    # For each event
+    for offset, event in store.iter_events(
+        start_offset=start_offset, end_offset=end_offset
+    ):
+        # Get timestamp
+        timestamp = event.get('ts', 0)
+
+        # If passed given end time
+        if until is not None and timestamp > until:
+            # Stop
+            break
+
+        # Get whether the event starts a call segment
+        is_start = _EVENT_TYPE_STARTS.get(event.get('type'), None)
+
+        # If the event type is unknown
+        if is_start is None:
+            # Ignore
+            continue
+
+        # Get URI
+        uri = event.get('uri')
+
+        # Get level
+        level = event.get('level')
+
+        # Get call stack of the thread
+        stack = stacks.setdefault(get_thread_key(event), [])
+
+        # If the event starts a call
+        if is_start:
+            # Get whether the caller is in the subtree of `under`
+            parent_in_subtree = bool(stack) and stack[-1][5]
+
+            # Push frame
+            stack.append([
+                uri,
+                level,
+                timestamp,
+                offset,
+                0,
+                parent_in_subtree or (under is not None and uri == under),
+                event.get('count'),
+            ])
+
+            #
+            continue
+
+        # Find the frame of the call.
+        # Frames above it are calls whose end events are missing.
+        frame_index = len(stack) - 1
+
+        while frame_index >= 0:
+            # Get frame
+            frame = stack[frame_index]
+
+            # If the frame matches
+            if frame[0] == uri and frame[1] == level:
+                # Stop
+                break
+
+            #
+            frame_index -= 1
+
+        # If the call started before the start offset
+        if frame_index < 0:
+            # Ignore
+            continue
+
+        # Get the call's frame
+        frame = stack[frame_index]
+
+        # Pop the frame and frames above it
+        del stack[frame_index:]
+
+        # Get duration
+        duration = timestamp - frame[2]
+
+        # If have caller
+        if stack:
+            # Add to caller's callees' total duration
+            stack[-1][4] += duration
+
+        # Yield call
+        yield {
+            'uri': uri,
+            'pid': event.get('pid'),
+            'thread': event.get('thread'),
+            'level': level,
+            'start': frame[2],
+            'end': timestamp,
+            'duration': duration,
+            'self_time': duration - frame[4],
+            'under': bool(stack) and stack[-1][5],
+            'offset': frame[3],
+            'count': frame[6],
+        }
+
+
+def query_calls(
+    stores,
+    uri=None,
+    pid=None,
+    thread=None,
+    under=None,
+    min_duration=None,
+    since=None,
+    until=None,
+):
+    """
+    Iterate calls matching given conditions.
+
+    :param stores: TraceStore list.
+
+    :param uri: URI regex the call's URI must match, as in specs.
+
+    :param pid: Process ID the call must be in.
+
+    :param thread: Simple thread ID the call must be in.
+
+    :param under: URI the call must be a callee, direct or indirect, of.
+
+    :param min_duration: Minimum duration in seconds.
+
+    :param since: Timestamp the call must start at or after.
+
+    :param until: Timestamp the call must end at or before.
+
+    :return: Iterator of call dicts, see `iter_calls`.
+    """
+    # Compile URI regex
+    uri_regex = get_spec_regex(uri) if uri is not None else None
+
+    # For each store
+    for store in stores:
+        # Byte offset range to read
+        start_offset = 0
+
+        end_offset = None
+
+        # If thread is given
+        if pid is not None or thread is not None:
+            # Get offset ranges of matched threads
+            range_s = [
+                store.get_thread_range(thread_key)
+                for thread_key in store.get_thread_keys()
+                if _match_thread(thread_key, pid, thread)
+            ]
+
+            # If no thread matched
+            if not range_s:
+                # Skip the store
+                continue
+
+            # Read only the matched threads' offset ranges
+            start_offset = min(first for first, _ in range_s)
+
+            end_offset = max(last for _, last in range_s)
+
+        # If start time is given
+        if since is not None:
+            # Skip to the start time
+            start_offset = max(start_offset, store.get_time_offset(since))
+
+        # For each call
+        for call_info in iter_calls(
+            store,
+            start_offset=start_offset,
+            end_offset=end_offset,
+            under=under,
+            until=until,
+        ):
+            # If the call does not match
+            if (pid is not None and str(call_info['pid']) != str(pid)) or \
+                (thread is not None and
+                    str(call_info['thread']) != str(thread)) or \
+                (under is not None and not call_info['under']) or \
+                (min_duration is not None and
+                    call_info['duration'] < min_duration) or \
+                (since is not None and call_info['start'] < since) or \
+                (uri_regex is not None and
+                    not uri_regex.match(call_info['uri'])):
+                # Ignore
+                continue
+
+            # Yield the call
+            yield call_info
+
+
+def group_by_uri(call_infos):
+    """
+    Aggregate given calls by URI.
+
+    :param call_infos: Iterable of call dicts.
+
+    :return: Dict mapping URI to dict with keys `uri`, `count`, `duration`, \
+        `self_time`, `max_duration`.
+    """
+    # Map URI to group dict
+    group_s = {}
+
+    # For each call
+    for call_info in call_infos:
+        # Get URI
+        uri = call_info['uri']
+
+        # Get group dict
+        group = group_s.get(uri, None)
+
+        # If the group is new
+        if group is None:
+            # Create group dict
+            group = group_s[uri] = {
+                'uri': uri,
+                'count': 0,
+                'duration': 0,
+                'self_time': 0,
+                'max_duration': 0,
+            }
+
+        # Update group dict
+        group['count'] += 1
+
+        group['duration'] += call_info['duration']
+
+        group['self_time'] += call_info['self_time']
+
+        group['max_duration'] = max(
+            group['max_duration'], call_info['duration']
+        )
+
+    # Return groups
+    return group_s
+
+
+def top_n(items, count, key='duration'):
+    """
+    Get the items with largest values of given key, in streaming fashion.
+
+    :param items: Iterable of call dicts or group dicts.
+
+    :param count: Number of items to get.
+
+    :param key: Key to sort by.
+
+    :return: Item list, largest first.
+    """
+    return heapq.nlargest(count, items, key=lambda item: item[key])
+
+
+def iter_subtree_events(store, uri, nth=0):
+    """
+    Iterate events of the given URI's n-th call and its callees.
+
+    The URI index is used to seek to near the call's first event.
+
+    :param store: TraceStore instance.
+
+    :param uri: URI of the subtree root call.
+
+    :param nth: Index of the call among the URI's calls in the store.
+
+    :return: Iterator of event dicts. Empty if no such call.
+    """
+    # Get offset of the URI's n-th call
+    start_offset = store.get_uri_offset(uri, nth=nth)
+
+    # If no such call
+    if start_offset is None:
+        # Stop
+        return
+
+    # Root call's thread key, and level
+    root_thread_key = None
+
+    root_level = None
+
+    # For each event starting from the root call
+    for _, event in store.iter_events(start_offset=start_offset):
+        # Get thread key
+        thread_key = get_thread_key(event)
+
+        # If is root call's first event
+        if root_thread_key is None:
+            # Store root call's thread key and level
+            root_thread_key = thread_key
+
+            root_level = event.get('level')
+
+        # If the event is in another thread
+        elif thread_key != root_thread_key:
+            # Ignore
+            continue
+
+        # Yield the event
+        yield event
+
+        # If is root call's end event
+        if event.get('type') == 'post_call' and \
+                event.get('uri') == uri and \
+                event.get('level') == root_level:
+            # Stop
+            break
+
+
+def format_call(call_info):
+    """
+    Format call dict to text.
+
+    :param call_info: Call dict.
+
+    :return: Text.
+    """
+    return '{:12.3f}ms {:12.3f}ms  P{} T{} L{}  {}'.format(
+        call_info['duration'] * 1000,
+        call_info['self_time'] * 1000,
+        call_info['pid'],
+        call_info['thread'],
+        call_info['level'],
+        call_info['uri'],
+    )
+
+
+def format_group(group):
+    """
+    Format group dict to text.
+
+    :param group: Group dict.
+
+    :return: Text.
+    """
+    return '{:8d} {:12.3f}ms {:12.3f}ms {:12.3f}ms  {}'.format(
+        group['count'],
+        group['duration'] * 1000,
+        group['self_time'] * 1000,
+        group['max_duration'] * 1000,
+        group['uri'],
+    )
+
+
+def format_event(event, root_level=0):
+    """
+    Format event dict to text.
+
+    :param event: Event dict.
+
+    :param root_level: Level to indent relative to.
+
+    :return: Text.
+    """
+    # Get event type
+    event_type = event.get('type')
+
+    # Get prefix
+    prefix = '>' if _EVENT_TYPE_STARTS.get(event_type, True) else '<'
+
+    # Return text
+    return '{}{} {}  {:.6f} {}'.format(
+        '  ' * max(event.get('level', 0) - root_level, 0),
+        prefix,
+        event.get('uri'),
+        event.get('ts', 0),
+        event_type,
+    )
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.query',
+        description='Query trace event files.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        'paths',
+        metavar='PATH',
+        nargs='+',
+        help='Event file, or collector output directory.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--uri',
+        dest='uri',
+        default=None,
+        help='URI regex the call\'s URI must match.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--pid',
+        dest='pid',
+        default=None,
+        help='Process ID the call must be in.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--thread',
+        dest='thread',
+        default=None,
+        help='Simple thread ID the call must be in.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--under',
+        dest='under',
+        default=None,
+        help='URI the call must be a callee of.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--min-ms',
+        dest='min_ms',
+        type=float,
+        default=None,
+        help='Minimum call duration in milliseconds.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--since',
+        dest='since',
+        type=float,
+        default=None,
+        help='Timestamp the call must start at or after.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--until',
+        dest='until',
+        type=float,
+        default=None,
+        help='Timestamp the call must end at or before.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--group-by-uri',
+        dest='group_by_uri',
+        action='store_true',
+        help='Aggregate calls by URI.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--sort',
+        dest='sort_key',
+        choices=['duration', 'self_time', 'count'],
+        default='duration',
+        help='Key to sort by when `--top` is given. Default is `duration`.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--top',
+        dest='top',
+        type=int,
+        default=None,
+        help='Show only this many calls or groups with largest sort key.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--subtree',
+        dest='subtree',
+        default=None,
+        help='Show events of the given URI\'s call and its callees.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--nth',
+        dest='nth',
+        type=int,
+        default=0,
+        help='Index of the call to show when `--subtree` is given.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--jsonl',
+        dest='jsonl',
+        action='store_true',
+        help='Write JSON lines instead of text.',
+    )
+
+    # Parse arguments
+    parsed_args = parser.parse_args(args)
+
+    # Create stores
+    store_s = [
+        TraceStore(file_path)
+        for file_path in get_event_file_paths(parsed_args.paths)
+    ]
+
+    # Get text formatting function
+    def format_item(item, format_func):
+        return json.dumps(item) if parsed_args.jsonl else format_func(item)
+
+    # If need extract subtree
+    if parsed_args.subtree is not None:
+        # Get the call's index in the current store
+        nth = parsed_args.nth
+
+        # For each store
+        for store in store_s:
+            # Get the URI's call count in the store
+            call_count = store.get_uri_call_count(parsed_args.subtree)
+
+            # If the call is not in the store
+            if nth >= call_count:
+                # Get the call's index in the next stores
+                nth -= call_count
+
+                # Try next store
+                continue
+
+            # Root level
+            root_level = None
+
+            # For each event in the subtree
+            for event in iter_subtree_events(
+                store, parsed_args.subtree, nth=nth
+            ):
+                # If is root call's first event
+                if root_level is None:
+                    # Store root level
+                    root_level = event.get('level', 0)
+
+                # Write event
+                sys.stdout.write(format_item(
+                    event,
+                    lambda event: format_event(event, root_level=root_level),
+                ) + '\n')
+
+            # Return exit code
+            return 0
+
+        # Write message
+        sys.stderr.write('# Error: Call not found: {} #{}\n'.format(
+            parsed_args.subtree, parsed_args.nth
+        ))
+
+        # Return exit code
+        return 1
+
+    # Get matched calls
+    call_info_s = query_calls(
+        store_s,
+        uri=parsed_args.uri,
+        pid=parsed_args.pid,
+        thread=parsed_args.thread,
+        under=parsed_args.under,
+        min_duration=(
+            parsed_args.min_ms / 1000.0
+            if parsed_args.min_ms is not None else None
+        ),
+        since=parsed_args.since,
+        until=parsed_args.until,
+    )
+
+    # If need aggregate calls by URI
+    if parsed_args.group_by_uri:
+        # Get groups
+        item_s = group_by_uri(call_info_s).values()
+
+        # Get formatting function
+        format_func = format_group
+
+        # If top N is not given
+        if parsed_args.top is None:
+            # Sort groups by URI
+            item_s = sorted(item_s, key=lambda group: group['uri'])
+    else:
+        # Use calls
+        item_s = call_info_s
+
+        # Get formatting function
+        format_func = format_call
+
+    # If top N is given
+    if parsed_args.top is not None:
+        # If sort key is not available for calls
+        if not parsed_args.group_by_uri and parsed_args.sort_key == 'count':
+            # Write message
+            sys.stderr.write(
+                '# Error: Sort key `count` requires `--group-by-uri`.\n'
+            )
+
+            # Return exit code
+            return 1
+
+        # Get top N items
+        item_s = top_n(item_s, parsed_args.top, key=parsed_args.sort_key)
+
+    # For each item
+    for item in item_s:
+        # Write item
+        sys.stdout.write(format_item(item, format_func) + '\n')
+
+    # Return exit code
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,13 +4,119 @@ from __future__ import absolute_import
 # Standard imports
 from collections import OrderedDict
 import re
+from timeit import default_timer
 
 # Internal imports
+from aoiktracecall.config import get_config
 from aoiktracecall.logging import print_debug
 from aoiktracecall.util import format_info_dict_uris
 from aoiktracecall.util import get_info_uris
 
 
+# ----- Info dict keys -----
+# Spec info of the first spec matching the traced object, or None, see
+# `get_matched_spec_info`
+INFO_K_SPEC_INFO = 'spec_info'
+
+
+# Sentinel for info dicts whose specs have not been matched
+_MISSING = object()
+
+
+# Map spec regex pattern to compiled regex matching whole URI
+_MAP_PATTERN_TO_REGEX = {}
+
+
+# Map spec URI to list of wrap-time match count, runtime call count, matching
+# time in seconds and matching test count, see config `SPEC_STATS`
+_SPEC_STATS = {}
+
+
+def get_spec_stats_item(uri):
+    """
+    Get stats item of given spec, created if not exists.
+
+    :param uri: Spec URI.
+
+    :return: List of wrap-time match count, runtime call count, matching \
+        time in seconds and matching test count. Callers update it in place.
+    """
+    # Get stats item
+    stats = _SPEC_STATS.get(uri, None)
+
+    # If stats item is not created
+    if stats is None:
+        # Create stats item
+        stats = _SPEC_STATS[uri] = [0, 0, 0.0, 0]
+
+    # Return stats item
+    return stats
+
+
+def get_spec_stats():
+    """
+    Get stats of specs collected when config `SPEC_STATS` is enabled.
+
+    :return: Dict mapping spec URI to dict with keys `matched`, `calls`, \
+        `match_time` and `tests`.
+    """
+    return dict(
+        (uri, {
+            'matched': stats[0],
+            'calls': stats[1],
+            'match_time': stats[2],
+            'tests': stats[3],
+        })
+        for uri, stats in list(_SPEC_STATS.items())
+    )
+
+
+def reset_spec_stats():
+    """
+    Reset stats of specs.
+
+    :return: None.
+    """
+    _SPEC_STATS.clear()
+
+
+def is_regex_uri(uri):
+    """
+    Test whether given spec URI is regex.
+
+    :param uri: Spec URI.
+
+    :return: Boolean.
+    """
+    return bool(re.search('[^_.0-9a-zA-Z]', uri))
+
+
+def get_spec_regex(pattern):
+    """
+    Get compiled regex of given spec regex pattern, cached by pattern.
+
+    The regex matches whole URI, i.e. pattern not ending with `$` is
+    appended with `$`.
+
+    :param pattern: Spec regex pattern.
+
+    :return: Compiled regex.
+    """
+    # Get compiled regex
+    regex = _MAP_PATTERN_TO_REGEX.get(pattern, None)
+
+    # If compiled regex is not cached
+    if regex is None:
+        # Compile regex
+        regex = re.compile(pattern if pattern.endswith('$') else pattern + '$')
+
+        # Cache compiled regex
+        _MAP_PATTERN_TO_REGEX[pattern] = regex
+
+    # Return compiled regex
+    return regex
+
+
 def parse_specs(specs):
     #
     obj_uris_dict = OrderedDict()
@@ -53,13 +159,16 @@ def parse_specs(specs):
                 raise ValueError(spec)
 
             #
-            is_regex = bool(re.search('[^_.0-9a-zA-Z]', uri))
+            is_regex = is_regex_uri(uri)
 
             #
             info['regex'] = is_regex
 
             #
             if is_regex:
+                # Compile regex once, raising error early if invalid
+                get_spec_regex(uri)
+
                 re_spec_s.append((uri, info))
             else:
                 exact_spec_s.append((uri, info))
@@ -74,13 +183,32 @@ def parse_specs(specs):
     return obj_uris_dict
 
 
-def find_matched_spec_info(info, parsed_specs, need_log=False):
+def find_matched_spec_info(
+    info, parsed_specs, need_log=False, need_stats=False
+):
+    """
+    Find the first spec matching given info dict's URIs.
+
+    :param info: Info dict.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :param need_log: Whether print debug message.
+
+    :param need_stats: Whether time the matching tests and count the match \
+        in the specs' stats if config `SPEC_STATS` is enabled.
+
+    :return: Matched spec info, or None.
+    """
     # Get URI list
     uri_s = get_info_uris(info)
 
     #
     uris_text = format_info_dict_uris(info)
 
+    # Whether time matching tests of each spec
+    need_time = need_stats and get_config('SPEC_STATS')
+
     #
     for pattern, spec_info in parsed_specs.items():
         #
@@ -89,9 +217,7 @@ def find_matched_spec_info(info, parsed_specs, need_log=False):
         #
         if is_regex:
             #
-            if not pattern.endswith('$'):
-                #
-                pattern += '$'
+            regex = get_spec_regex(pattern)
 
         #
         uri = None
@@ -99,6 +225,11 @@ def find_matched_spec_info(info, parsed_specs, need_log=False):
         #
         matched = None
 
+        #
+        if need_time:
+            #
+            start_time = default_timer()
+
         #
         for uri in uri_s:
             #
@@ -106,7 +237,7 @@ def find_matched_spec_info(info, parsed_specs, need_log=False):
                 #
                 if is_regex:
                     #
-                    matched = bool(re.match(pattern, uri))
+                    matched = bool(regex.match(uri))
                 #
                 else:
                     #
@@ -115,17 +246,38 @@ def find_matched_spec_info(info, parsed_specs, need_log=False):
                 #
                 if matched:
                     #
-                    if need_log:
-                        #
-                        msg = 'Matched URIs: {}\nMatched spec: {}'.format(
-                            uris_text, spec_info
-                        )
+                    break
 
-                        #
-                        print_debug(msg)
+        #
+        if need_time:
+            #
+            stats = get_spec_stats_item(pattern)
 
-                    #
-                    return spec_info
+            #
+            stats[2] += default_timer() - start_time
+
+            #
+            stats[3] += 1
+
+        #
+        if matched:
+            #
+            if need_time:
+                #
+                get_spec_stats_item(pattern)[0] += 1
+
+            #
+            if need_log:
+                #
+                msg = 'Matched URIs: {}\nMatched spec: {}'.format(
+                    uris_text, spec_info
+                )
+
+                #
+                print_debug(msg)
+
+            #
+            return spec_info
 
     else:
         #
@@ -138,3 +290,36 @@ def find_matched_spec_info(info, parsed_specs, need_log=False):
 
         #
         return None
+
+
+def get_matched_spec_info(info, parsed_specs):
+    """
+    Get the first spec matching given info dict's URIs, matching the specs \
+        once per info dict.
+
+    The first call matches the specs, with stats collected if config
+    `SPEC_STATS` is enabled, and stores the result in info dict key
+    `spec_info`. Later calls, e.g. by filters chained after
+    `showhide_filter`, read the stored result.
+
+    :param info: Info dict.
+
+    :param parsed_specs: Parsed specs returned by `parse_specs`.
+
+    :return: Matched spec info, or None.
+    """
+    # Get stored spec info
+    spec_info = info.get(INFO_K_SPEC_INFO, _MISSING)
+
+    # If the specs have not been matched
+    if spec_info is _MISSING:
+        # Match the specs
+        spec_info = info[INFO_K_SPEC_INFO] = find_matched_spec_info(
+            info=info,
+            parsed_specs=parsed_specs,
+            need_log=True,
+            need_stats=True,
+        )
+
+    #
+    return spec_info
@@ -0,0 +1,1066 @@
+# coding: utf-8
+"""
+Load specs from JSON or INI spec files.
+
+JSON format:
+    {
+        "include": ["base.json"],
+        "config": {"LATENCY_THRESHOLD_MS": 50},
+        "specs": [
+            ["pkg.mod", true],
+            ["pkg\\.mod\\.[^_.]+", true],
+            ["pkg.mod.Foo.helper", "hide_tree"],
+            ["pkg.mod.Foo.run", {"threshold_ms": 20, "handlers": "stats"}]
+        ],
+        "env": {
+            "prod": {"config": {...}, "specs": [...]}
+        }
+    }
+
+INI format:
+    [include]
+    files =
+        base.ini
+
+    [config]
+    LATENCY_THRESHOLD_MS = 50
+
+    [specs]
+    pkg.mod = true
+    pkg\\.mod\\.[^_.]+ = true
+    pkg.mod.Foo.helper = hide_tree
+
+    [spec pkg.mod.Foo.run]
+    threshold_ms = 20
+    handlers = stats
+
+    [env:prod specs]
+    pkg.mod.Foo.helper = hide_this
+
+INI values are decoded as JSON if possible, e.g. `true` and `20`, otherwise
+as comma-separated words. Sections prefixed with `env:NAME ` apply only in
+environment NAME.
+
+Included files are loaded first. Specs of a later file or environment
+override specs of the same URI, keeping the original position.
+
+Usage:
+    python -m aoiktracecall.specfile [--env ENV] [--check] FILE
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from argparse import ArgumentParser
+from collections import OrderedDict
+import json
+import os.path
+import re
+import sys
+
+# Internal imports
+from aoiktracecall.config import _CONFIG_DICT
+from aoiktracecall.plugin.generator_plugin import INFO_K_TRACE_GENERATOR
+from aoiktracecall.plugin.handler_plugin import INFO_K_HANDLERS
+from aoiktracecall.plugin.printing_plugin import INFO_K_HIGHLIGHT
+from aoiktracecall.plugin.showhide_plugin import INFO_K_SHOWHIDE
+from aoiktracecall.plugin.showhide_plugin import INFO_K_SHOWHIDE_VALUES
+from aoiktracecall.plugin.threshold_plugin import INFO_K_THRESHOLD_MS
+from aoiktracecall.spec import get_spec_regex
+from aoiktracecall.spec import is_regex_uri
+
+try:
+    # Python 3
+    from configparser import Error as ConfigParserError
+    from configparser import RawConfigParser
+except ImportError:
+    # Python 2
+    from ConfigParser import Error as ConfigParserError
+    from ConfigParser import RawConfigParser
+
+try:
+    # Python 3.11+
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+
+# Environment variable giving default environment name
+ENV_VAR_NAME = 'AOIKTRACECALL_ENV'
+
+
+# Allowed keys of spec file and environment dicts
+_FILE_KEYS = ('include', 'config', 'specs', 'env')
+
+_ENV_KEYS = ('config', 'specs')
+
+
+# Allowed keys of spec dict and their value types
+_SPEC_DICT_KEYS = {
+    INFO_K_SHOWHIDE: (bool, str),
+    INFO_K_TRACE_GENERATOR: (bool,),
+    INFO_K_THRESHOLD_MS: (int, float),
+    INFO_K_HANDLERS: (str, list),
+    'max_depth': (int,),
+    'max_children': (int,),
+    'max_rate': (int, float),
+    # Highlight keys, see `printing_plugin.printing_filter`
+    'enabled': (bool,),
+    'title': (str,),
+}
+
+
+# Value types of config keys whose types are not derived from default values.
+# Other keys' types are derived from default values, see
+# `_get_config_value_types`.
+_CONFIG_VALUE_TYPES = {
+    'HANDLER_BREAKER_FAILURES': (int, type(None)),
+    'WRAP_DECISION_CACHE_PATH': (str, type(None)),
+    'LATENCY_THRESHOLD_MS': (int, float, type(None)),
+    'TRACE_MAX_DEPTH': (int, type(None)),
+    'TRACE_MAX_CHILDREN': (int, type(None)),
+    'TRACE_MAX_RATE': (int, float, type(None)),
+    'AUTO_DISARM_MAX_RATE': (int, float, type(None)),
+    'AUTO_DISARM_MAX_OVERHEAD': (int, float, type(None)),
+    'PRINTING_COLLAPSE_REPEATS': (int, type(None)),
+}
+
+
+# Allowed values of spec list
+_SPEC_LIST_VALUES = [True, False, INFO_K_HIGHLIGHT, INFO_K_TRACE_GENERATOR] + \
+    sorted(INFO_K_SHOWHIDE_VALUES)
+
+
+class SpecFileError(ValueError):
+    """
+    Error of invalid spec file.
+    """
+    pass
+
+
+def _is_str(value):
+    # Python 2 JSON strings are unicode
+    return isinstance(value, (str, type(u'')))
+
+
+def _is_type(value, type_s):
+    # If expects string
+    if str in type_s and _is_str(value):
+        return True
+
+    # Boolean is not number
+    if isinstance(value, bool) and bool not in type_s:
+        return False
+
+    #
+    return isinstance(value, type_s)
+
+
+def _get_config_value_types(key):
+    # Get explicit value types
+    type_s = _CONFIG_VALUE_TYPES.get(key, None)
+
+    # If have explicit value types
+    if type_s is not None:
+        return type_s
+
+    # Get default value
+    default_value = _CONFIG_DICT[key]
+
+    # If is boolean
+    if isinstance(default_value, bool):
+        return (bool,)
+
+    # If is number
+    if isinstance(default_value, (int, float)):
+        return (int, float)
+
+    # If is name list, e.g. `DEFAULT_HANDLERS`.
+    # INI values of single word are decoded as string.
+    if isinstance(default_value, (list, tuple)):
+        return (str, list)
+
+    # If is None, allow any type
+    if default_value is None:
+        return None
+
+    #
+    return (type(default_value),)
+
+
+def validate_config(key, value, location=''):
+    """
+    Validate config item.
+
+    :param key: Config key, must be in `config._CONFIG_DICT`.
+
+    :param value: Config value.
+
+    :param location: Location text used in error message.
+
+    :return: None. Raise SpecFileError if the config item is invalid.
+    """
+    # If the key is not config key
+    if not _is_str(key) or key not in _CONFIG_DICT:
+        raise SpecFileError('{}Unknown config key: {!r}'.format(
+            location, key
+        ))
+
+    # Get allowed value types
+    type_s = _get_config_value_types(key)
+
+    # If the value type is not allowed
+    if type_s is not None and not _is_type(value, type_s):
+        raise SpecFileError('{}Invalid config value of {!r}: {!r}'.format(
+            location, key, value
+        ))
+
+
+def validate_spec(uri, spec_arg, location=''):
+    """
+    Validate spec.
+
+    :param uri: Spec URI.
+
+    :param spec_arg: Spec argument, i.e. value, list or dict.
+
+    :param location: Location text used in error message.
+
+    :return: None. Raise SpecFileError if the spec is invalid.
+    """
+    # If the URI is not string
+    if not _is_str(uri) or not uri:
+        raise SpecFileError('{}Invalid spec URI: {!r}'.format(location, uri))
+
+    # If the URI is regex
+    if is_regex_uri(uri):
+        try:
+            get_spec_regex(uri)
+        except re.error as e:
+            raise SpecFileError('{}Invalid spec regex: {!r}: {}'.format(
+                location, uri, e
+            ))
+
+    # If the spec argument is dict
+    if isinstance(spec_arg, dict):
+        # For each key
+        for key, value in spec_arg.items():
+            # Get allowed value types
+            type_s = _SPEC_DICT_KEYS.get(key, None)
+
+            # If the key is not known
+            if type_s is None:
+                raise SpecFileError('{}Unknown spec key of {!r}: {!r}'.format(
+                    location, uri, key
+                ))
+
+            # If the value type is not allowed, None means default
+            if value is not None and not _is_type(value, type_s):
+                raise SpecFileError(
+                    '{}Invalid spec value of {!r}: {!r}: {!r}'.format(
+                        location, uri, key, value
+                    )
+                )
+
+        # Get showhide value
+        showhide = spec_arg.get(INFO_K_SHOWHIDE, None)
+
+        # If showhide value is not valid
+        if _is_str(showhide) and showhide not in INFO_K_SHOWHIDE_VALUES:
+            raise SpecFileError(
+                '{}Invalid spec value of {!r}: {!r}: {!r}'.format(
+                    location, uri, INFO_K_SHOWHIDE, showhide
+                )
+            )
+
+    # If the spec argument is not dict
+    else:
+        # For each value
+        for value in (
+            spec_arg if isinstance(spec_arg, list) else [spec_arg]
+        ):
+            # If the value is not allowed
+            if not any(
+                value is allowed_value if isinstance(value, bool) else
+                value == allowed_value
+                for allowed_value in _SPEC_LIST_VALUES
+            ):
+                raise SpecFileError(
+                    '{}Invalid spec value of {!r}: {!r}'.format(
+                        location, uri, value
+                    )
+                )
+
+
+def _decode_ini_value(text):
+    # Try decoding as JSON
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # Split by comma
+    word_s = [x.strip() for x in text.split(',') if x.strip()]
+
+    # If is single word
+    if len(word_s) == 1:
+        return word_s[0]
+
+    # If is multiple words
+    return word_s
+
+
+def _read_ini_file(file_path):
+    # Create parser.
+    # Only `=` is delimiter since spec regexes may contain `:`.
+    try:
+        parser = RawConfigParser(delimiters=('=',))
+    except TypeError:
+        # Python 2
+        parser = RawConfigParser()
+
+    # Keep key case
+    parser.optionxform = str
+
+    # Read file
+    with open(file_path) as ini_file:
+        try:
+            # Python 3
+            if hasattr(parser, 'read_file'):
+                parser.read_file(ini_file)
+            # Python 2
+            else:
+                parser.readfp(ini_file)
+        except ConfigParserError as e:
+            raise SpecFileError('{}: Invalid INI: {}'.format(file_path, e))
+
+    # Result dict
+    data = OrderedDict()
+
+    # For each section
+    for section in parser.sections():
+        # Get environment name and section name
+        if section.startswith('env:'):
+            env_name, _, section_name = section[len('env:'):].partition(' ')
+
+            # Get environment dict
+            target = data.setdefault('env', OrderedDict()).setdefault(
+                env_name, OrderedDict()
+            )
+        else:
+            section_name = section
+
+            target = data
+
+        # Strip spaces
+        section_name = section_name.strip()
+
+        # Get items
+        item_s = parser.items(section)
+
+        # If is include section
+        if section_name == 'include' and target is data:
+            # For each item
+            for _, value in item_s:
+                # Add file paths, one per line
+                data.setdefault('include', []).extend(
+                    x.strip() for x in value.split('\n') if x.strip()
+                )
+
+        # If is config section
+        elif section_name == 'config':
+            # Add config items
+            target.setdefault('config', OrderedDict()).update(
+                (key, _decode_ini_value(value)) for key, value in item_s
+            )
+
+        # If is specs section
+        elif section_name == 'specs':
+            # Add specs
+            target.setdefault('specs', []).extend(
+                [key, _decode_ini_value(value)] for key, value in item_s
+            )
+
+        # If is spec dict section
+        elif section_name.startswith('spec '):
+            # Get URI
+            uri = section_name[len('spec '):].strip()
+
+            # Add spec
+            target.setdefault('specs', []).append([uri, OrderedDict(
+                (key, _decode_ini_value(value)) for key, value in item_s
+            )])
+
+        #
+        else:
+            raise SpecFileError('{}: Unknown section: {!r}'.format(
+                file_path, section
+            ))
+
+    # Return result dict
+    return data
+
+
+def _read_json_file(file_path):
+    # Read file
+    with open(file_path) as json_file:
+        try:
+            data = json.load(json_file, object_pairs_hook=OrderedDict)
+        except ValueError as e:
+            raise SpecFileError('{}: Invalid JSON: {}'.format(file_path, e))
+
+    # If is not dict
+    if not isinstance(data, dict):
+        raise SpecFileError('{}: Top-level value must be object.'.format(
+            file_path
+        ))
+
+    # Return result dict
+    return data
+
+
+def read_spec_file(file_path):
+    """
+    Read spec file without handling includes and environments.
+
+    :param file_path: Spec file path. File extension `.ini` or `.cfg` means \
+        INI format, otherwise JSON format.
+
+    :return: Dict with keys `include`, `config`, `specs` and `env`, see \
+        module docstring.
+    """
+    # If is INI file
+    if os.path.splitext(file_path)[1].lower() in ('.ini', '.cfg'):
+        return _read_ini_file(file_path)
+    else:
+        return _read_json_file(file_path)
+
+
+def _to_spec_s(spec_item_s, location):
+    # If is not list
+    if not isinstance(spec_item_s, list):
+        raise SpecFileError('{}`specs` must be list.'.format(location))
+
+    # Spec list
+    spec_s = []
+
+    # For each spec item
+    for index, spec_item in enumerate(spec_item_s):
+        # Get item location
+        item_location = '{}specs[{}]: '.format(location, index)
+
+        # If is list of URI and arguments
+        if isinstance(spec_item, list):
+            # If not have arguments
+            if len(spec_item) < 2:
+                raise SpecFileError(
+                    '{}Spec must have URI and argument.'.format(item_location)
+                )
+
+            #
+            uri = spec_item[0]
+
+            #
+            if len(spec_item) == 2:
+                spec_arg = spec_item[1]
+            else:
+                spec_arg = list(spec_item[1:])
+
+        # If is dict with URI
+        elif isinstance(spec_item, dict) and 'uri' in spec_item:
+            #
+            spec_arg = OrderedDict(spec_item)
+
+            #
+            uri = spec_arg.pop('uri')
+
+        #
+        else:
+            raise SpecFileError('{}Invalid spec: {!r}'.format(
+                item_location, spec_item
+            ))
+
+        # Validate the spec
+        validate_spec(uri, spec_arg, item_location)
+
+        # Add spec
+        spec_s.append((uri, spec_arg))
+
+    # Return spec list
+    return spec_s
+
+
+def _merge_specs(spec_dict, spec_s, location, duplicate_s):
+    # Set of URIs in the spec list
+    uri_s = set()
+
+    # For each spec
+    for uri, spec_arg in spec_s:
+        # If the URI is in the same spec list before, the earlier spec is
+        # unreachable
+        if uri in uri_s:
+            duplicate_s.append(
+                '{}Duplicate spec {}, earlier one ignored.'.format(
+                    location, uri
+                )
+            )
+
+        #
+        uri_s.add(uri)
+
+        # A spec of existing URI, e.g. from included file, replaces the
+        # existing one in place
+        spec_dict[uri] = spec_arg
+
+
+def _load_part(data, location, result, key_s):
+    # For each key
+    for key in data:
+        # If the key is not allowed
+        if key not in key_s:
+            raise SpecFileError('{}Unknown key: {!r}'.format(location, key))
+
+    # Get config dict
+    part_config_dict = data.get('config', None) or {}
+
+    # If is not dict
+    if not isinstance(part_config_dict, dict):
+        raise SpecFileError('{}`config` must be object.'.format(location))
+
+    # For each config item
+    for key, value in part_config_dict.items():
+        # Validate config item
+        validate_config(key, value, location=location)
+
+    # Merge config
+    result['config'].update(part_config_dict)
+
+    # Merge specs
+    _merge_specs(
+        result['specs'],
+        _to_spec_s(data.get('specs', None) or [], location),
+        location,
+        result['duplicates'],
+    )
+
+
+def _load_file(file_path, env, result, loading_path_s):
+    # Get absolute path
+    abs_path = os.path.abspath(file_path)
+
+    # If the file is being loaded
+    if abs_path in loading_path_s:
+        raise SpecFileError('{}: Circular include.'.format(file_path))
+
+    #
+    loading_path_s.append(abs_path)
+
+    # Read the file
+    data = read_spec_file(file_path)
+
+    # Get include paths
+    include_path_s = data.get('include', None) or []
+
+    # If is single path
+    if _is_str(include_path_s):
+        include_path_s = [include_path_s]
+
+    # For each include path
+    for include_path in include_path_s:
+        # Load included file, relative to this file
+        _load_file(
+            os.path.join(os.path.dirname(abs_path), include_path),
+            env=env,
+            result=result,
+            loading_path_s=loading_path_s,
+        )
+
+    # Load this file's config and specs
+    _load_part(
+        data,
+        location='{}: '.format(file_path),
+        result=result,
+        key_s=_FILE_KEYS,
+    )
+
+    # Get environment dicts
+    env_dict = data.get('env', None) or {}
+
+    # If is not dict
+    if not isinstance(env_dict, dict):
+        raise SpecFileError('{}: `env` must be object.'.format(file_path))
+
+    # If have the environment
+    if env and env in env_dict:
+        # Load the environment's config and specs
+        _load_part(
+            env_dict[env],
+            location='{}: env {}: '.format(file_path, env),
+            result=result,
+            key_s=_ENV_KEYS,
+        )
+
+    #
+    loading_path_s.pop()
+
+
+def load_spec_file(file_path, env=None):
+    """
+    Load spec file, with included files and environment overrides.
+
+    :param file_path: Spec file path.
+
+    :param env: Environment name. Default is environment variable \
+        `AOIKTRACECALL_ENV`.
+
+    :return: Dict with keys `specs`, list of (URI, argument) tuples for \
+        `parse_specs`, `config`, config dict, and `duplicates`, list of \
+        texts about specs ignored because the same spec list has a later \
+        spec of the same URI.
+    """
+    # If environment name is not given
+    if env is None:
+        # Use environment variable
+        env = os.environ.get(ENV_VAR_NAME, None)
+
+    # Result dict
+    result = {
+        # Map URI to spec argument
+        'specs': OrderedDict(),
+        'config': OrderedDict(),
+        'duplicates': [],
+    }
+
+    # Load the file
+    _load_file(
+        file_path,
+        env=env,
+        result=result,
+        loading_path_s=[],
+    )
+
+    # Convert spec dict to list
+    result['specs'] = list(result['specs'].items())
+
+    # Return result
+    return result
+
+
+# ----- Check -----
+def _get_repeat_ops():
+    return (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+
+def _get_sub_patterns(op, av):
+    # If is repeat
+    if op in _get_repeat_ops():
+        return [av[2]]
+
+    # If is group
+    if op is sre_constants.SUBPATTERN:
+        return [av[-1]]
+
+    # If is branch
+    if op is sre_constants.BRANCH:
+        return list(av[1])
+
+    # If is lookahead or lookbehind
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [av[1]]
+
+    #
+    return []
+
+
+def _is_unbounded_repeat(op, av):
+    return op in _get_repeat_ops() and av[1] == sre_constants.MAXREPEAT
+
+
+def _is_any_repeat(op, av):
+    # If is unbounded repeat of any character
+    return _is_unbounded_repeat(op, av) and len(av[2]) == 1 and \
+        list(av[2])[0][0] is sre_constants.ANY
+
+
+def _find_backtracking(sub_pattern, in_unbounded_repeat, issue_s):
+    # Previous item
+    prev_item = None
+
+    # For each item
+    for op, av in sub_pattern:
+        # Whether is unbounded repeat
+        is_unbounded = _is_unbounded_repeat(op, av)
+
+        # If is unbounded repeat in unbounded repeat
+        if is_unbounded and in_unbounded_repeat:
+            issue_s.add('nested unbounded repeats, e.g. `(a+)+`')
+
+        # If is adjacent unbounded repeats of any character
+        if prev_item is not None and _is_any_repeat(op, av) and \
+                _is_any_repeat(*prev_item):
+            issue_s.add('adjacent unbounded wildcards, e.g. `.*.*`')
+
+        # For each sub pattern
+        for sub in _get_sub_patterns(op, av):
+            _find_backtracking(sub, in_unbounded_repeat or is_unbounded,
+                               issue_s)
+
+        #
+        prev_item = (op, av)
+
+
+def find_backtracking_issues(pattern):
+    """
+    Find regex constructs that can cause slow backtracking.
+
+    :param pattern: Regex pattern.
+
+    :return: Sorted list of issue texts.
+    """
+    # Issue set
+    issue_s = set()
+
+    # Find issues in parsed pattern
+    _find_backtracking(sre_parse.parse(pattern), False, issue_s)
+
+    # Return issue list
+    return sorted(issue_s)
+
+
+# Candidate character orders for example strings.
+# The second order prefers `.` so that wildcards reach into child URIs.
+_EXAMPLE_CHARS_S = ('aZ0_.-', '.-_0Za')
+
+
+def _example_char(op, av, example_chars):
+    # If is literal
+    if op is sre_constants.LITERAL:
+        return chr(av)
+
+    # Candidate characters
+    char_s = example_chars
+
+    # If is character class
+    if op is sre_constants.IN:
+        # Add first characters of the class's literals and ranges
+        char_s += ''.join(
+            chr(sub_av) if sub_op is sre_constants.LITERAL else chr(sub_av[0])
+            for sub_op, sub_av in av
+            if sub_op in (sre_constants.LITERAL, sre_constants.RANGE)
+        )
+
+    # Get regex matching one character like the item
+    regex = re.compile(_char_item_regex(op, av))
+
+    # Get a character matched by the item, or None
+    for char in char_s:
+        if regex.match(char):
+            return char
+
+    #
+    return None
+
+
+def _char_item_regex(op, av):
+    # Get regex matching one character like given parsed item
+    if op is sre_constants.LITERAL:
+        return re.escape(chr(av))
+
+    if op is sre_constants.NOT_LITERAL:
+        return '[^{}]'.format(re.escape(chr(av)))
+
+    if op is sre_constants.ANY:
+        return '.'
+
+    if op is sre_constants.IN:
+        # Build character class text
+        part_s = []
+
+        #
+        negate = False
+
+        #
+        for sub_op, sub_av in av:
+            if sub_op is sre_constants.NEGATE:
+                negate = True
+            elif sub_op is sre_constants.LITERAL:
+                part_s.append(re.escape(chr(sub_av)))
+            elif sub_op is sre_constants.RANGE:
+                part_s.append('{}-{}'.format(
+                    re.escape(chr(sub_av[0])), re.escape(chr(sub_av[1]))
+                ))
+            elif sub_op is sre_constants.CATEGORY:
+                part_s.append({
+                    sre_constants.CATEGORY_DIGIT: r'\d',
+                    sre_constants.CATEGORY_NOT_DIGIT: r'\D',
+                    sre_constants.CATEGORY_SPACE: r'\s',
+                    sre_constants.CATEGORY_NOT_SPACE: r'\S',
+                    sre_constants.CATEGORY_WORD: r'\w',
+                    sre_constants.CATEGORY_NOT_WORD: r'\W',
+                }.get(sub_av, r'\w'))
+            else:
+                raise ValueError(sub_op)
+
+        #
+        return '[{}{}]'.format('^' if negate else '', ''.join(part_s))
+
+    #
+    raise ValueError(op)
+
+
+def _build_example(sub_pattern, repeat_extra, example_chars):
+    # Text part list
+    part_s = []
+
+    # For each item
+    for op, av in sub_pattern:
+        # If is one-character item
+        if op in (
+            sre_constants.LITERAL,
+            sre_constants.NOT_LITERAL,
+            sre_constants.ANY,
+            sre_constants.IN,
+        ):
+            #
+            char = _example_char(op, av, example_chars)
+
+            #
+            if char is None:
+                return None
+
+            #
+            part_s.append(char)
+
+        # If is repeat
+        elif op in _get_repeat_ops():
+            #
+            min_count, max_count, sub = av
+
+            # Get repeat count
+            count = min_count + repeat_extra
+
+            #
+            if max_count != sre_constants.MAXREPEAT:
+                count = min(count, max_count)
+
+            # Get example of the repeated pattern
+            text = _build_example(sub, repeat_extra, example_chars)
+
+            #
+            if text is None:
+                return None
+
+            #
+            part_s.append(text * count)
+
+        # If is group
+        elif op is sre_constants.SUBPATTERN:
+            #
+            text = _build_example(av[-1], repeat_extra, example_chars)
+
+            #
+            if text is None:
+                return None
+
+            #
+            part_s.append(text)
+
+        # If is branch
+        elif op is sre_constants.BRANCH:
+            # Use the first branch
+            text = _build_example(av[1][0], repeat_extra, example_chars)
+
+            #
+            if text is None:
+                return None
+
+            #
+            part_s.append(text)
+
+        # If is anchor
+        elif op is sre_constants.AT:
+            continue
+
+        # If is not supported
+        else:
+            return None
+
+    # Return example
+    return ''.join(part_s)
+
+
+def get_example_uris(pattern):
+    """
+    Get example URIs matched by given spec regex.
+
+    :param pattern: Spec regex.
+
+    :return: List of example URIs, maybe empty if examples can not be \
+        generated.
+    """
+    # Example list
+    example_s = []
+
+    # Get compiled regex, matched like `spec.find_matched_spec_info`
+    regex = get_spec_regex(pattern)
+
+    # Get parsed pattern
+    try:
+        sub_pattern = sre_parse.parse(pattern)
+    except Exception:
+        return example_s
+
+    # For each count of extra repeats and candidate character order
+    for repeat_extra, example_chars in (
+        (0, _EXAMPLE_CHARS_S[0]),
+        (2, _EXAMPLE_CHARS_S[0]),
+        (2, _EXAMPLE_CHARS_S[1]),
+    ):
+        #
+        try:
+            example = _build_example(sub_pattern, repeat_extra, example_chars)
+        except (ValueError, OverflowError):
+            example = None
+
+        # If the example is valid
+        if example and regex.match(example) and example not in example_s:
+            example_s.append(example)
+
+    # Return example list
+    return example_s
+
+
+def check_specs(specs):
+    """
+    Check specs for regex specs shadowed by earlier regex specs and regexes \
+        that can cause slow backtracking.
+
+    Exact specs are matched before regex specs so they are not checked.
+
+    :param specs: List of (URI, argument) tuples.
+
+    :return: List of issue texts.
+    """
+    # Issue list
+    issue_s = []
+
+    # Regex list of specs before the current one
+    prev_regex_s = []
+
+    # For each spec
+    for uri, _ in specs:
+        # If is not regex
+        if not is_regex_uri(uri):
+            continue
+
+        # Get matching pattern, same as `spec.get_spec_regex`
+        pattern = uri if uri.endswith('$') else uri + '$'
+
+        # Find slow backtracking constructs
+        for issue in find_backtracking_issues(pattern):
+            issue_s.append('{}: Slow regex: {}'.format(uri, issue))
+
+        # Get example URIs
+        example_s = get_example_uris(uri)
+
+        # If have examples
+        if example_s:
+            # For each previous regex spec
+            for prev_uri, prev_regex in prev_regex_s:
+                # If the previous spec matches all examples
+                if all(prev_regex.match(x) for x in example_s):
+                    issue_s.append(
+                        '{}: May be shadowed by earlier spec {}'.format(
+                            uri, prev_uri
+                        )
+                    )
+
+                    break
+
+        # Add regex
+        prev_regex_s.append((uri, get_spec_regex(uri)))
+
+    # Return issue list
+    return issue_s
+
+
+def main(args=None):
+    # Create argument parser
+    parser = ArgumentParser(
+        prog='python -m aoiktracecall.specfile',
+        description='Load and check spec file.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        'path',
+        metavar='PATH',
+        help='Spec file path.',
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--env',
+        dest='env',
+        default=None,
+        help='Environment name. Default is env var `{}`.'.format(
+            ENV_VAR_NAME
+        ),
+    )
+
+    # Add argument
+    parser.add_argument(
+        '--check',
+        dest='check',
+        action='store_true',
+        help='Report shadowed and overridden specs and slow regexes.',
+    )
+
+    # Parse arguments
+    args = parser.parse_args(args)
+
+    #
+    try:
+        # Load spec file
+        result = load_spec_file(args.path, env=args.env)
+    except (SpecFileError, IOError, OSError) as e:
+        # Print error
+        sys.stderr.write('Error: {}\n'.format(e))
+
+        #
+        return 1
+
+    # If need check
+    if args.check:
+        # Check specs
+        issue_s = result['duplicates'] + check_specs(result['specs'])
+
+        # For each issue
+        for issue in issue_s:
+            # Print issue
+            print(issue)
+
+        # Print summary
+        print('{} specs, {} issues.'.format(
+            len(result['specs']), len(issue_s)
+        ))
+
+        #
+        return 2 if issue_s else 0
+
+    # Print loaded specs and config
+    print(json.dumps(
+        OrderedDict([
+            ('specs', result['specs']),
+            ('config', result['config']),
+        ]),
+        indent=4,
+    ))
+
+    #
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,11 @@
 from __future__ import absolute_import
 
 # Standard imports
+import os
+import sys
 import threading
+import time
+import weakref
 
 
 try:
@@ -13,6 +17,14 @@ except ImportError:
     from thread import get_ident
 
 
+try:
+    # Python 3.7+
+    import contextvars
+except ImportError:
+    # Python 2 and Python 3.6-
+    contextvars = None
+
+
 # ----- ThreadLocal -----
 class ThreadLocal(threading.local):
 
@@ -35,6 +47,128 @@ _ThreadLocal = ThreadLocal()
 # ===== ThreadLocal =====
 
 
+# ----- ContextLocal -----
+class ContextLocal(object):
+    """
+    Same API as `ThreadLocal` but values are stored in context variables.
+
+    Under asyncio, each task runs in a copy of its creator's context, so
+    values set in one task are not seen by other tasks interleaved on the
+    same thread.
+
+    Values stored must be treated as immutable because a copied context
+    shares value objects with the original context.
+    """
+
+    def __init__(self):
+        # Map attribute name to context variable
+        self._vars = {}
+
+        #
+        self._lock = threading.Lock()
+
+    def _get_var(self, attr_name):
+        #
+        var = self._vars.get(attr_name, None)
+
+        #
+        if var is None:
+            #
+            with self._lock:
+                #
+                var = self._vars.get(attr_name, None)
+
+                #
+                if var is None:
+                    #
+                    var = self._vars[attr_name] = contextvars.ContextVar(
+                        'aoiktracecall.' + attr_name
+                    )
+
+        #
+        return var
+
+    def get(self, attr_name, default=None):
+        return self._get_var(attr_name).get(default)
+
+    def set(self, attr_name, value):
+        self._get_var(attr_name).set(value)
+        return value
+
+    def add(self, attr_name, diff, default=None):
+        new_value = self.get(attr_name, default=default) + diff
+        self.set(attr_name, new_value)
+        return new_value
+
+
+# Created in `state_backend_set`
+_ContextLocal = None
+# ===== ContextLocal =====
+
+
+# ----- State backend APIs -----
+# Thread-based backend
+STATE_BACKEND_THREAD = 'thread'
+
+# Context-variable-based backend
+STATE_BACKEND_CONTEXT = 'context'
+
+#
+_STATE_BACKEND = STATE_BACKEND_THREAD
+
+# Storage of level and show/hide states.
+# Count is always stored in `_ThreadLocal` so that counts are unique in a
+# thread's output.
+_StateLocal = _ThreadLocal
+
+
+def state_backend_get():
+    return _STATE_BACKEND
+
+
+def state_backend_set(backend):
+    """
+    Set storage backend of level and show/hide states.
+
+    Use `STATE_BACKEND_CONTEXT` when tracing asyncio code so that each task
+    has its own call tree. Should be called before tracing starts.
+
+    :param backend: `STATE_BACKEND_THREAD` or `STATE_BACKEND_CONTEXT`.
+
+    :return: None.
+    """
+    #
+    global _STATE_BACKEND
+    global _StateLocal
+    global _ContextLocal
+
+    #
+    if backend == STATE_BACKEND_THREAD:
+        #
+        _StateLocal = _ThreadLocal
+
+    elif backend == STATE_BACKEND_CONTEXT:
+        #
+        if contextvars is None:
+            raise ValueError(
+                'State backend `{}` requires Python 3.7+.'.format(backend)
+            )
+
+        #
+        if _ContextLocal is None:
+            _ContextLocal = ContextLocal()
+
+        #
+        _StateLocal = _ContextLocal
+
+    else:
+        raise ValueError(backend)
+
+    #
+    _STATE_BACKEND = backend
+# ===== State backend APIs =====
+
+
 # ----- Count APIs -----
 def count_get():
     return _ThreadLocal.get('_COUNT', default=0)
@@ -51,18 +185,139 @@ def count_add(value, default=0):
 
 # ----- Level APIs -----
 def level_get():
-    return _ThreadLocal.get('_LEVEL', default=-1)
+    return _StateLocal.get('_LEVEL', default=-1)
 
 
 def level_set(value):
-    return _ThreadLocal.set('_LEVEL', value)
+    return _StateLocal.set('_LEVEL', value)
 
 
 def level_add(value, default=-1):
-    return _ThreadLocal.add('_LEVEL', value, default=default)
+    return _StateLocal.add('_LEVEL', value, default=default)
 # ===== Level APIs =====
 
 
+# ----- Child time APIs -----
+def child_time_get():
+    """
+    Get total time of ended traced calls in the current call tree, \
+        counting only the outermost ones.
+
+    :return: Seconds.
+    """
+    return _StateLocal.get('_CHILD_TIME', default=0.0)
+
+
+def child_time_set(value):
+    return _StateLocal.set('_CHILD_TIME', value)
+# ===== Child time APIs =====
+
+
+# ----- Last exception APIs -----
+def last_exception_get():
+    """
+    Get last exception seen by a wrapper in the current call tree.
+
+    :return: Tuple of exception ID, exception type, level, raise level and \
+        raise URI, or None.
+    """
+    return _StateLocal.get('_LAST_EXCEPTION', default=None)
+
+
+def last_exception_set(value):
+    return _StateLocal.set('_LAST_EXCEPTION', value)
+# ===== Last exception APIs =====
+
+
+# ----- Show/hide stack APIs -----
+def showhide_bits_get():
+    """
+    Get show/hide stack.
+
+    :return: Integer used as bit stack, see `showhide_plugin._push_or_pop`.
+    """
+    return _StateLocal.get('_SHOWHIDE_BITS', default=0)
+
+
+def showhide_bits_set(value):
+    """
+    Set show/hide stack.
+
+    :param value: Integer used as bit stack.
+
+    :return: Given value.
+    """
+    return _StateLocal.set('_SHOWHIDE_BITS', value)
+# ===== Show/hide stack APIs =====
+
+
+# ----- Latency threshold buffer APIs -----
+def threshold_buffer_get():
+    """
+    Get latency threshold buffer of the current call tree.
+
+    :return: Buffer object, or None if no call is being buffered.
+    """
+    return _StateLocal.get('_THRESHOLD_BUFFER', default=None)
+
+
+def threshold_buffer_set(value):
+    """
+    Set latency threshold buffer of the current call tree.
+
+    :param value: Buffer object, or None.
+
+    :return: Given value.
+    """
+    return _StateLocal.set('_THRESHOLD_BUFFER', value)
+# ===== Latency threshold buffer APIs =====
+
+
+# ----- Limit stack APIs -----
+def limit_stack_get():
+    """
+    Get limit stack of the current call tree.
+
+    :return: Tuple of limit frame objects, see `wrap._LimitFrame`.
+    """
+    return _StateLocal.get('_LIMIT_STACK', default=())
+
+
+def limit_stack_set(value):
+    """
+    Set limit stack of the current call tree.
+
+    :param value: Tuple of limit frame objects. Must be a new tuple instead \
+        of a changed one, see `ContextLocal`.
+
+    :return: Given value.
+    """
+    return _StateLocal.set('_LIMIT_STACK', value)
+# ===== Limit stack APIs =====
+
+
+# ----- Collapse state APIs -----
+def collapse_state_get():
+    """
+    Get repeated-call collapse state of the current call tree.
+
+    :return: Run object, see `plugin.collapse_plugin.CollapseRun`, or None.
+    """
+    return _StateLocal.get('_COLLAPSE_STATE', default=None)
+
+
+def collapse_state_set(value):
+    """
+    Set repeated-call collapse state of the current call tree.
+
+    :param value: Run object, or None.
+
+    :return: Given value.
+    """
+    return _StateLocal.set('_COLLAPSE_STATE', value)
+# ===== Collapse state APIs =====
+
+
 # ----- Thread APIs -----
 MAIN_THREAD_ID = get_ident()
 
@@ -92,6 +347,70 @@ def get_simple_thread_id(thread_id=None):
 # ===== Thread APIs =====
 
 
+# ----- Task APIs -----
+_SIMPLE_TASK_ID_MAX = 0
+
+_SIMPLE_TASK_ID_DICT = weakref.WeakKeyDictionary()
+
+_SIMPLE_TASK_ID_DICT_LOCK = threading.Lock()
+
+
+def get_current_task():
+    """
+    Get current asyncio task.
+
+    :return: Current task, or None if not running in a task.
+    """
+    # Get asyncio module if it has been imported
+    asyncio = sys.modules.get('asyncio', None)
+
+    # If asyncio is not used
+    if asyncio is None:
+        return None
+
+    # Python 3.7+
+    current_task = getattr(asyncio, 'current_task', None)
+
+    # Python 3.6-
+    if current_task is None:
+        current_task = asyncio.Task.current_task
+
+    #
+    try:
+        return current_task()
+    # Raised if no running event loop in Python 3.7+
+    except RuntimeError:
+        return None
+
+
+def get_simple_task_id(task=None):
+    """
+    Get simple ID of given or current asyncio task.
+
+    :param task: Task. Default is current task.
+
+    :return: Simple task ID starting from 1, or None if not running in a task.
+    """
+    #
+    if task is None:
+        task = get_current_task()
+
+        #
+        if task is None:
+            return None
+
+    with _SIMPLE_TASK_ID_DICT_LOCK:
+        simple_task_id = _SIMPLE_TASK_ID_DICT.get(task, None)
+
+        if simple_task_id is None:
+            global _SIMPLE_TASK_ID_MAX
+            _SIMPLE_TASK_ID_MAX += 1
+            simple_task_id = _SIMPLE_TASK_ID_DICT[task] = _SIMPLE_TASK_ID_MAX
+
+    return simple_task_id
+# ===== Task APIs =====
+
+
 # ----- Filter APIs -----
 _FILTER = None
 
@@ -198,3 +517,94 @@ def call_existwrap_set(callback):
     global _CALL_EXISTWRAP_CALLBACK
 
     _CALL_EXISTWRAP_CALLBACK = callback
+
+
+# ----- Clock APIs -----
+# Python 3.3+.
+# System-wide on Linux, so timestamps of different processes are comparable.
+_monotonic = getattr(time, 'monotonic', None) or time.time
+
+
+def get_timestamp():
+    """
+    Get monotonic timestamp in seconds.
+
+    :return: Timestamp.
+    """
+    return _monotonic()
+# ===== Clock APIs =====
+
+
+# ----- Fork APIs -----
+_BEFORE_FORK_CALLBACKS = []
+
+_FORK_CALLBACKS = []
+
+
+def fork_callback_add(callback, before=False):
+    """
+    Add callback to be called in child process after fork.
+
+    :param callback: Callback function without arguments.
+
+    :param before: Whether call the callback in parent process before fork \
+        instead, e.g. to flush buffers that would otherwise be copied to the \
+        child process.
+
+    :return: None.
+    """
+    if before:
+        _BEFORE_FORK_CALLBACKS.append(callback)
+    else:
+        _FORK_CALLBACKS.append(callback)
+
+
+def _call_before_fork_callbacks():
+    for callback in _BEFORE_FORK_CALLBACKS:
+        callback()
+
+
+def _reset_state_after_fork():
+    # The forking thread becomes the child's main thread. Other threads do
+    # not exist in the child, so drop their simple IDs and recreate locks
+    # they may have held.
+
+    #
+    global MAIN_THREAD_ID
+    global _SIMPLE_ID_MAX
+    global _SIMPLE_ID_DICT
+    global _SIMPLE_ID_DICT_LOCK
+    global _SIMPLE_TASK_ID_MAX
+    global _SIMPLE_TASK_ID_DICT
+    global _SIMPLE_TASK_ID_DICT_LOCK
+
+    #
+    MAIN_THREAD_ID = get_ident()
+
+    _SIMPLE_ID_MAX = 0
+
+    _SIMPLE_ID_DICT = {
+        MAIN_THREAD_ID: 0,
+    }
+
+    _SIMPLE_ID_DICT_LOCK = threading.Lock()
+
+    #
+    _SIMPLE_TASK_ID_MAX = 0
+
+    _SIMPLE_TASK_ID_DICT = weakref.WeakKeyDictionary()
+
+    _SIMPLE_TASK_ID_DICT_LOCK = threading.Lock()
+
+    #
+    for callback in _FORK_CALLBACKS:
+        callback()
+
+
+# Python 3.7+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(
+        before=_call_before_fork_callbacks,
+        after_in_child=_reset_state_after_fork,
+    )
+# ===== Fork APIs =====
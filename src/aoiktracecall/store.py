@@ -0,0 +1,427 @@
+# coding: utf-8
+"""
+Indexed store of trace event files.
+
+An event file contains one JSON event per line, with keys `pid`, `thread`,
+`ts`, `type`, `uri`, `level` and `count`, as written by
+`aoiktracecall.collector`. Events of each thread must be in timestamp order.
+
+The index of an event file is stored in a sidecar file and contains:
+- Per-URI `pre_call` event count, and byte offset of every N-th of them.
+- Per-thread first and last event byte offsets and event count.
+- Time-range index, i.e. the byte offset and timestamp of every N-th event.
+
+Index building and event reading are done in streaming fashion, so files
+larger than memory are supported.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import bisect
+import json
+import os
+
+
+# Index file format version
+_INDEX_FORMAT_VERSION = 2
+
+# Default number of events between time-range index entries
+TIME_INDEX_STEP = 1000
+
+# Default number of a URI's `pre_call` events between the URI's index entries
+URI_INDEX_STEP = 100
+
+
+def get_index_file_path(file_path):
+    """
+    Get index file path of given event file.
+
+    :param file_path: Event file path.
+
+    :return: Index file path.
+    """
+    return file_path + '.idx.json'
+
+
+def get_thread_key(event):
+    """
+    Get key identifying the thread of given event across processes.
+
+    :param event: Event dict.
+
+    :return: Key text like `PID:THREAD`.
+    """
+    return '{}:{}'.format(event.get('pid', ''), event.get('thread', ''))
+
+
+def iter_file_events(file_path, start_offset=0, end_offset=None):
+    """
+    Iterate events in given event file.
+
+    :param file_path: Event file path.
+
+    :param start_offset: Byte offset to start reading at. Must be the start \
+        of a line.
+
+    :param end_offset: Byte offset to stop reading after. Default is read to \
+        the end.
+
+    :return: Iterator of (byte offset, event dict).
+    """
+    # Open event file
+    with open(file_path, 'rb') as event_file:
+        # Seek to start offset
+        event_file.seek(start_offset)
+
+        # Current offset
+        offset = start_offset
+
+        #
+        while True:
+            # If end offset is passed
+            if end_offset is not None and offset > end_offset:
+                # Stop
+                break
+
+            # Read a line
+            line = event_file.readline()
+
+            # If reached the end
+            if not line:
+                # Stop
+                break
+
+            # Get line offset
+            line_offset = offset
+
+            # Update current offset
+            offset += len(line)
+
+            # Strip the line
+            line = line.strip()
+
+            # If the line is empty
+            if not line:
+                # Ignore
+                continue
+
+            #
+            try:
+                # Load event
+                event = json.loads(line.decode('utf-8'))
+            except ValueError:
+                # Ignore partial line
+                continue
+
+            # Yield line offset and event
+            yield line_offset, event
+
+
+def build_index(
+    file_path,
+    time_index_step=TIME_INDEX_STEP,
+    uri_index_step=URI_INDEX_STEP,
+):
+    """
+    Build index of given event file.
+
+    :param file_path: Event file path.
+
+    :param time_index_step: Number of events between time-range index \
+        entries.
+
+    :param uri_index_step: Number of a URI's `pre_call` events between the \
+        URI's index entries.
+
+    :return: Index dict.
+    """
+    # Map URI to dict with keys `count`, and `offsets` containing byte offset
+    # of every `uri_index_step`-th `pre_call` event of the URI
+    uris = {}
+
+    # Map thread key to dict with keys `first`, `last` and `count`
+    threads = {}
+
+    # List of (timestamp, byte offset)
+    time_index = []
+
+    # Event count
+    event_count = 0
+
+    # For each event
+    for offset, event in iter_file_events(file_path):
+        # If is call event
+        if event.get('type') == 'pre_call':
+            # Get URI info
+            uri_info = uris.get(event.get('uri'), None)
+
+            # If the URI is first seen
+            if uri_info is None:
+                # Create URI info
+                uri_info = uris[event.get('uri')] = {
+                    'count': 0,
+                    'offsets': [],
+                }
+
+            # If need add URI index entry
+            if uri_info['count'] % uri_index_step == 0:
+                # Add URI index entry
+                uri_info['offsets'].append(offset)
+
+            # Increment the URI's call count
+            uri_info['count'] += 1
+
+        # Get thread key
+        thread_key = get_thread_key(event)
+
+        # Get thread info
+        thread_info = threads.get(thread_key, None)
+
+        # If the thread is first seen
+        if thread_info is None:
+            # Create thread info
+            thread_info = threads[thread_key] = {
+                'first': offset,
+                'last': offset,
+                'count': 0,
+            }
+
+        # Update thread info
+        thread_info['last'] = offset
+
+        thread_info['count'] += 1
+
+        # If need add time-range index entry
+        if event_count % time_index_step == 0:
+            # Add time-range index entry
+            time_index.append((event.get('ts', 0), offset))
+
+        # Increment event count
+        event_count += 1
+
+    # Get file stat
+    stat = os.stat(file_path)
+
+    # Return index
+    return {
+        'version': _INDEX_FORMAT_VERSION,
+        'file_size': stat.st_size,
+        'file_mtime': stat.st_mtime,
+        'event_count': event_count,
+        'uri_index_step': uri_index_step,
+        'uris': uris,
+        'threads': threads,
+        'time_index': time_index,
+    }
+
+
+class TraceStore(object):
+    """
+    Event file with its index.
+
+    The index is loaded from the sidecar index file if it is up to date, and
+    otherwise built and saved.
+    """
+
+    def __init__(self, file_path, save_index=True):
+        #
+        self.file_path = file_path
+
+        #
+        self.save_index = save_index
+
+        # Loaded in `load_index`
+        self._index = None
+
+    @property
+    def index(self):
+        # If index is not loaded
+        if self._index is None:
+            # Load index
+            self.load_index()
+
+        # Return index
+        return self._index
+
+    def load_index(self):
+        """
+        Load index, building it if not exists or outdated.
+
+        :return: Index dict.
+        """
+        # Get index file path
+        index_file_path = get_index_file_path(self.file_path)
+
+        # Get event file stat
+        stat = os.stat(self.file_path)
+
+        #
+        index = None
+
+        #
+        try:
+            # Open index file
+            with open(index_file_path, 'r') as index_file:
+                # Load index
+                index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            pass
+
+        # If the index is not loaded, or is outdated
+        if not isinstance(index, dict) or \
+                index.get('version') != _INDEX_FORMAT_VERSION or \
+                index.get('file_size') != stat.st_size or \
+                index.get('file_mtime') != stat.st_mtime:
+            # Build index
+            index = build_index(self.file_path)
+
+            # If need save index
+            if self.save_index:
+                #
+                try:
+                    # Open index file
+                    with open(index_file_path, 'w') as index_file:
+                        # Save index
+                        json.dump(index, index_file)
+                except (IOError, OSError):
+                    pass
+
+        #
+        self._index = index
+
+        # Return index
+        return index
+
+    def get_uris(self):
+        """
+        Get URIs having call events.
+
+        :return: URI list.
+        """
+        return sorted(self.index['uris'])
+
+    def get_uri_call_count(self, uri):
+        """
+        Get number of given URI's `pre_call` events.
+
+        :param uri: URI.
+
+        :return: Call count.
+        """
+        # Get URI info
+        uri_info = self.index['uris'].get(uri, None)
+
+        # Return call count
+        return 0 if uri_info is None else uri_info['count']
+
+    def get_uri_offset(self, uri, nth=0):
+        """
+        Get byte offset of given URI's n-th `pre_call` event.
+
+        Only every N-th offset is indexed, so events are read from the nearest
+        index entry before the event.
+
+        :param uri: URI.
+
+        :param nth: Index of the event among the URI's `pre_call` events.
+
+        :return: Byte offset, or None if no such event.
+        """
+        # Get URI info
+        uri_info = self.index['uris'].get(uri, None)
+
+        # If no such event
+        if uri_info is None or not 0 <= nth < uri_info['count']:
+            return None
+
+        # Get URI index step
+        uri_index_step = self.index['uri_index_step']
+
+        # Get the nearest index entry's event index and byte offset
+        entry_index, skip_count = divmod(nth, uri_index_step)
+
+        start_offset = uri_info['offsets'][entry_index]
+
+        # For each event starting from the index entry's event
+        for offset, event in self.iter_events(start_offset=start_offset):
+            # If is the URI's call event
+            if event.get('type') == 'pre_call' and event.get('uri') == uri:
+                # If is the n-th event
+                if skip_count == 0:
+                    # Return the event's byte offset
+                    return offset
+
+                #
+                skip_count -= 1
+
+        # The event file is changed since indexed
+        return None
+
+    def get_thread_keys(self):
+        """
+        Get thread keys, see `get_thread_key`.
+
+        :return: Thread key list.
+        """
+        return sorted(self.index['threads'])
+
+    def get_thread_range(self, thread_key):
+        """
+        Get byte offset range of given thread's events.
+
+        :param thread_key: Thread key, see `get_thread_key`.
+
+        :return: Tuple of first and last event byte offsets, or None if the \
+            thread has no events.
+        """
+        # Get thread info
+        thread_info = self.index['threads'].get(thread_key, None)
+
+        # If the thread has no events
+        if thread_info is None:
+            return None
+
+        # Return offset range
+        return thread_info['first'], thread_info['last']
+
+    def get_time_offset(self, timestamp):
+        """
+        Get byte offset to start reading at to get events at or after given \
+            timestamp.
+
+        :param timestamp: Timestamp.
+
+        :return: Byte offset.
+        """
+        # Get time-range index
+        time_index = self.index['time_index']
+
+        # Get timestamp list
+        timestamp_s = [entry[0] for entry in time_index]
+
+        # Find last entry whose timestamp is before given timestamp.
+        # Events of different threads may be slightly out of order, so start
+        # one entry earlier.
+        entry_index = bisect.bisect_left(timestamp_s, timestamp) - 2
+
+        # If no such entry
+        if entry_index < 0:
+            # Start at the beginning
+            return 0
+
+        # Return the entry's byte offset
+        return time_index[entry_index][1]
+
+    def iter_events(self, start_offset=0, end_offset=None):
+        """
+        Iterate events.
+
+        :param start_offset: Byte offset to start reading at.
+
+        :param end_offset: Byte offset to stop reading after.
+
+        :return: Iterator of (byte offset, event dict).
+        """
+        return iter_file_events(
+            self.file_path, start_offset=start_offset, end_offset=end_offset
+        )
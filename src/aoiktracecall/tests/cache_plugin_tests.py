@@ -0,0 +1,137 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of wrap decision cache.
+"""
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.plugin.cache_plugin import create_cached_filter
+from aoiktracecall.tests.helpers import import_source
+
+
+def _create_info(module, attr_name):
+    # Create info dict
+    return {
+        'info_type': 'callable',
+        'module': module,
+        'onwrap_uri': '{}.{}'.format(module.__name__, attr_name),
+        'origin_uri': '{}.{}'.format(module.__name__, attr_name),
+        'attr_name': attr_name,
+        'showhide': None,
+    }
+
+
+def _create_filter(call_s):
+    # Create filter accepting `func` and rejecting others
+    def filter(info):
+        #
+        call_s.append(info['attr_name'])
+
+        #
+        if info['attr_name'] != 'func':
+            return False
+
+        # Add item
+        info['trace_limits'] = (3, None, (1, 2))
+
+        # Change item
+        info['showhide'] = 'hide_below'
+
+        #
+        return info
+
+    #
+    return filter
+
+
+def test_cached_filter(tmp_path):
+    """
+    Test decisions loaded from cache file equal the filter's results.
+    """
+    # Import module
+    module = import_source(tmp_path, 'def func(): pass\n')
+
+    # Get cache file path
+    file_path = str(tmp_path / 'cache.json')
+
+    # Filter call list
+    call_s = []
+
+    # Create cached filter
+    cached_filter = create_cached_filter(
+        _create_filter(call_s),
+        file_path=file_path,
+        specs_hash='hash',
+        save_at_exit=False,
+    )
+
+    # Filter
+    result = cached_filter(_create_info(module, 'func'))
+
+    #
+    assert cached_filter(_create_info(module, 'other')) is False
+
+    # Save cache file
+    cached_filter.cache.save()
+
+    # Create cached filter loading the cache file
+    cached_filter = create_cached_filter(
+        _create_filter(call_s),
+        file_path=file_path,
+        specs_hash='hash',
+        save_at_exit=False,
+    )
+
+    # Filter again
+    cached_result = cached_filter(_create_info(module, 'func'))
+
+    #
+    assert cached_filter(_create_info(module, 'other')) is False
+
+    # Ensure the filter is not called again
+    assert call_s == ['func', 'other']
+
+    # Ensure cached results equal the filter's results, including tuples and
+    # changed items
+    assert cached_result == result
+
+    assert cached_result['trace_limits'] == (3, None, (1, 2))
+
+    assert cached_result['showhide'] == 'hide_below'
+
+    #
+    assert cached_filter.cache.hit_count == 2
+
+
+def test_cached_filter_case_specs_changed(tmp_path):
+    """
+    Test cache file of other specs is not used.
+    """
+    # Import module
+    module = import_source(tmp_path, 'def func(): pass\n')
+
+    # Get cache file path
+    file_path = str(tmp_path / 'cache.json')
+
+    # Filter call list
+    call_s = []
+
+    #
+    for specs_hash in ('hash', 'hash2'):
+        # Create cached filter
+        cached_filter = create_cached_filter(
+            _create_filter(call_s),
+            file_path=file_path,
+            specs_hash=specs_hash,
+            save_at_exit=False,
+        )
+
+        #
+        cached_filter(_create_info(module, 'func'))
+
+        #
+        cached_filter.cache.save()
+
+    # Ensure the filter is called for each specs
+    assert call_s == ['func', 'func']
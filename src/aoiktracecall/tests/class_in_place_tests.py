@@ -0,0 +1,116 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of tracing classes in place.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import datetime
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+import datetime
+
+
+class Outer(object):
+
+    class A(object):
+
+        def __init__(self, x):
+            self.x = x
+
+    Date = datetime.date
+
+
+class Sub(Outer):
+    pass
+'''
+
+
+def _trace(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    # Pass events to the recording handler
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace classes in place
+    set_config('WRAP_CLASS_IN_PLACE', True)
+
+    # Trace the module
+    with capture_output() as message_s:
+        trace_module(
+            module,
+            [
+                (module.__name__, True),
+                (module.__name__ + r'\.[^_.]+', True),
+                (module.__name__ + r'\.[^_.]+\.[^_.]+', True),
+            ],
+            handlers={'record': recorder},
+        )
+
+    # Ensure no errors
+    assert message_s == []
+
+    #
+    return module, event_s
+
+
+def test_wrap_class_in_place(tmp_path):
+    """
+    Test instantiation of a class hooked in place is reported once, \
+        though the class is wrapped again as a base class attribute.
+    """
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Get class
+    cls = module.Outer.A
+
+    # Ensure the class is not replaced
+    assert module.Sub.A is cls
+
+    #
+    obj = cls(1)
+
+    # Ensure the instance keeps the original type
+    assert type(obj) is cls
+
+    assert obj.x == 1
+
+    # Ensure the call is reported once
+    assert [hook_type for hook_type, _ in event_s] == ['pre_call', 'post_call']
+
+
+def test_wrap_class_in_place_case_builtin_type(tmp_path):
+    """
+    Test a class whose attributes can not be set is replaced with a \
+        subclass instead.
+    """
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Ensure the built-in type is not changed
+    assert '__init__' not in vars(datetime.date)
+
+    # Ensure the class is replaced with a subclass
+    assert module.Outer.Date is not datetime.date
+
+    assert issubclass(module.Outer.Date, datetime.date)
+
+    #
+    assert module.Outer.Date(2020, 1, 2) == datetime.date(2020, 1, 2)
+
+    # Ensure the call is reported
+    assert [hook_type for hook_type, _ in event_s] == ['pre_call', 'post_call']
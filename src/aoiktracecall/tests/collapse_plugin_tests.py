@@ -0,0 +1,70 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of collapsing repeated calls when printing.
+"""
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def top(count):
+    for _ in range(count):
+        child()
+
+
+def child():
+    return 1
+'''
+
+
+def _call(tmp_path, count):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Collapse runs of at least 3 repeated calls
+    set_config('PRINTING_COLLAPSE_REPEATS', 3)
+
+    # Trace the module
+    trace_module(module, [
+        (module.__name__, True),
+        (module.__name__ + r'\.[^_.]+', True),
+    ])
+
+    #
+    with capture_output() as message_s:
+        #
+        module.top(count)
+
+    #
+    return module, message_s
+
+
+def test_collapse_handler(tmp_path):
+    #
+    module, message_s = _call(tmp_path, 5)
+
+    # Ensure calls after the first are printed as a summary line
+    assert [message.split()[:2] for message in message_s] == [
+        ['+', '1:'],
+        ['+', '2:'],
+        ['-', '2:'],
+        ['x', '4'],
+        ['-', '1:'],
+    ]
+
+    #
+    assert 'more calls to {}.child'.format(module.__name__) in message_s[3]
+
+
+def test_collapse_handler_case_below_threshold(tmp_path):
+    #
+    _, message_s = _call(tmp_path, 3)
+
+    # Ensure repeats fewer than the threshold are printed in full
+    assert len(message_s) == 2 + 2 * 3
@@ -0,0 +1,184 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of streaming trace events to the collector.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import json
+import os
+import socket
+import threading
+import time
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.collector import INDEX_FILE_NAME
+from aoiktracecall.collector import TraceCollector
+from aoiktracecall.collector import get_event_file_name
+from aoiktracecall.plugin.socket_plugin import SocketEventSender
+from aoiktracecall.plugin.socket_plugin import decode_frames
+from aoiktracecall.plugin.socket_plugin import encode_frame
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'),
+    reason='Requires Unix domain socket.',
+)
+
+
+def _get_info(hook_type, uri, level, count):
+    # Return info dict as passed to trace handler
+    return {
+        'trace_hook_type': hook_type,
+        'onwrap_uri': uri,
+        'level': level,
+        'count': count,
+    }
+
+
+def test_socket_event_sender(tmp_path):
+    # Create collector
+    collector = TraceCollector(
+        str(tmp_path / 'collector.sock'), str(tmp_path / 'output')
+    )
+
+    collector.start()
+
+    # Serve in another thread
+    thread = threading.Thread(
+        target=collector.serve_forever, kwargs={'poll_interval': 0.01}
+    )
+
+    thread.start()
+
+    #
+    try:
+        # Create sender sending only when flushed
+        sender = SocketEventSender(
+            collector.socket_path, flush_interval=3600
+        )
+
+        # Add events
+        sender.add_event(_get_info('pre_call', 'pkg.outer', 0, 1))
+
+        sender.add_event(_get_info('pre_call', 'pkg.inner', 1, 2))
+
+        sender.add_event(_get_info('post_call', 'pkg.inner', 1, 2))
+
+        sender.add_event(_get_info('post_call', 'pkg.outer', 0, 1))
+
+        # Ensure events are buffered
+        assert sender.sent_count == 0
+
+        # Send events
+        sender.close()
+
+        #
+        assert (sender.sent_count, sender.dropped_count) == (4, 0)
+
+        # Wait for the collector to receive the events
+        deadline = time.time() + 5
+
+        while collector.event_count < 4 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        # Stop the collector
+        collector.shutdown()
+
+        thread.join()
+
+    # Read event file
+    with open(os.path.join(
+        collector.output_dir, get_event_file_name(os.getpid())
+    )) as event_file:
+        event_s = [json.loads(line) for line in event_file]
+
+    #
+    assert [
+        (event['type'], event['uri'], event['level'], event['count'])
+        for event in event_s
+    ] == [
+        ('pre_call', 'pkg.outer', 0, 1),
+        ('pre_call', 'pkg.inner', 1, 2),
+        ('post_call', 'pkg.inner', 1, 2),
+        ('post_call', 'pkg.outer', 0, 1),
+    ]
+
+    # Read index file
+    with open(
+        os.path.join(collector.output_dir, INDEX_FILE_NAME)
+    ) as index_file:
+        index = json.load(index_file)
+
+    #
+    assert index['event_count'] == 4
+
+    assert index['uris'] == {'pkg.outer': 2, 'pkg.inner': 2}
+
+
+def test_socket_event_sender_case_no_collector(tmp_path):
+    # Create sender without collector
+    sender = SocketEventSender(str(tmp_path / 'missing.sock'))
+
+    #
+    sender.add_event(_get_info('pre_call', 'pkg.outer', 0, 1))
+
+    # Send events
+    sender.flush()
+
+    # Ensure the events are dropped and counted
+    assert (sender.sent_count, sender.dropped_count) == (0, 1)
+
+
+def test_decode_frames_case_partial_frame(tmp_path):
+    # Get payload with a URI definition record and an event record, as
+    # buffered by `SocketEventSender`
+    sender = SocketEventSender(
+        str(tmp_path / 'missing.sock'), flush_interval=3600
+    )
+
+    sender.add_event(_get_info('pre_call', 'pkg.outer', 0, 1))
+
+    payload = bytes(sender._buffer)
+
+    data = encode_frame(123, payload) + payload
+
+    # Decode all but the last byte
+    uri_table = {}
+
+    assert decode_frames(data[:-1], uri_table) == ([], 0)
+
+    # Decode the complete frame
+    event_s, decoded_size = decode_frames(data, uri_table)
+
+    #
+    assert decoded_size == len(data)
+
+    assert [(event['pid'], event['uri']) for event in event_s] == \
+        [(123, 'pkg.outer')]
+
+    # Ensure invalid data is rejected
+    with pytest.raises(ValueError):
+        decode_frames(b'XXXX' + data[4:], {})
+
+
+def test_decode_frames_case_deep_level(tmp_path):
+    # Create sender sending only when flushed
+    sender = SocketEventSender(
+        str(tmp_path / 'missing.sock'), flush_interval=3600
+    )
+
+    # Add event of a call deeper than a 16-bit level can hold
+    sender.add_event(_get_info('pre_call', 'pkg.outer', 70000, 1))
+
+    #
+    payload = bytes(sender._buffer)
+
+    # Ensure the level is decoded unchanged
+    event_s, _ = decode_frames(encode_frame(123, payload) + payload, {})
+
+    assert [event['level'] for event in event_s] == [70000]
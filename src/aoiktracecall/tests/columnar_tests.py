@@ -0,0 +1,94 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of columnar export.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import json
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.columnar import ColumnarTrace
+from aoiktracecall.columnar import export_event_files
+
+
+def _export(tmp_path, chunk_size=2):
+    # Get event file path
+    file_path = str(tmp_path / 'events.1.jsonl')
+
+    # Write events of two calls to `outer`, each calling `inner`
+    with open(file_path, 'w') as event_file:
+        # For each event
+        for index, (event_type, uri, level, timestamp) in enumerate([
+            ('pre_call', 'pkg.outer', 0, 1.0),
+            ('pre_call', 'pkg.inner', 1, 1.5),
+            ('post_call', 'pkg.inner', 1, 2.0),
+            ('post_call', 'pkg.outer', 0, 4.0),
+            ('pre_call', 'pkg.outer', 0, 5.0),
+            ('pre_call', 'pkg.inner', 1, 6.0),
+            ('post_call', 'pkg.inner', 1, 8.0),
+            ('post_call', 'pkg.outer', 0, 9.0),
+        ]):
+            # Write event
+            event_file.write(json.dumps({
+                'pid': 1,
+                'thread': 0,
+                'ts': timestamp,
+                'type': event_type,
+                'uri': uri,
+                'level': level,
+                'count': index,
+            }) + '\n')
+
+    # Get output directory path
+    output_dir = str(tmp_path / 'columnar')
+
+    # Export calls, in multiple chunks
+    assert export_event_files(
+        [file_path], output_dir, chunk_size=chunk_size
+    ) == 4
+
+    # Load columnar trace
+    return ColumnarTrace(output_dir)
+
+
+def test_export_event_files(tmp_path):
+    # Export and load
+    trace = _export(tmp_path)
+
+    #
+    assert trace.row_count == 4
+
+    assert len(trace.chunk_names) == 2
+
+    # Calls are in end order, so callees are before their callers
+    assert [trace.uris[uri_id] for uri_id in trace.column('uri_id')] == \
+        ['pkg.inner', 'pkg.outer', 'pkg.inner', 'pkg.outer']
+
+    #
+    assert list(trace.column('level')) == [1, 0, 1, 0]
+
+    #
+    assert [
+        end - start for start, end in
+        zip(trace.column('start_ns'), trace.column('end_ns'))
+    ] == [500000000, 3000000000, 2000000000, 4000000000]
+
+
+def test_columnar_trace_analysis(tmp_path):
+    #
+    pytest.importorskip('numpy')
+
+    # Export and load
+    trace = _export(tmp_path)
+
+    # Ensure each callee's parent is found
+    assert list(trace.parents()) == [1, -1, 3, -1]
+
+    # Ensure self times exclude callees' durations
+    assert list(trace.self_times()) == \
+        [500000000, 2500000000, 2000000000, 2000000000]
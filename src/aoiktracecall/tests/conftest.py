@@ -0,0 +1,103 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains test fixtures.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import sys
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall import config
+from aoiktracecall import spec
+from aoiktracecall import trace
+from aoiktracecall import wrap
+from aoiktracecall.plugin import handler_plugin
+from aoiktracecall.state import collapse_state_set
+from aoiktracecall.state import count_set
+from aoiktracecall.state import filter_set
+from aoiktracecall.state import handler_set
+from aoiktracecall.state import last_exception_set
+from aoiktracecall.state import level_set
+from aoiktracecall.state import limit_stack_set
+from aoiktracecall.state import showhide_bits_set
+from aoiktracecall.state import STATE_BACKEND_THREAD
+from aoiktracecall.state import state_backend_set
+from aoiktracecall.state import threshold_buffer_set
+
+
+@pytest.fixture(autouse=True)
+def isolate_globals():
+    """
+    Restore configs, import hooks and global tracing state after each test.
+    """
+    # Keep configs
+    config_dict = dict(config._CONFIG_DICT)
+
+    # Keep import hooks, replaced by `trace_calls_in_specs`
+    meta_path = list(sys.meta_path)
+
+    #
+    yield
+
+    # Restore configs
+    config._CONFIG_DICT.clear()
+
+    config._CONFIG_DICT.update(config_dict)
+
+    # Restore import hooks
+    sys.meta_path = meta_path
+
+    # Reset `trace_calls_in_specs` state
+    trace._TRACE_CONTEXT.clear()
+
+    filter_set(None)
+
+    handler_set(None)
+
+    # Reset wrapper registries
+    wrap._MAP_MODULE_OR_CLASS_TO_WRAP_INFOS.clear()
+
+    wrap._MAP_CALLABLE_TO_WRAP_INFOS.clear()
+
+    wrap._HANDLER_BREAKERS.clear()
+
+    wrap._HANDLER_ERROR_REPORTS.clear()
+
+    del wrap._WRAP_CANDIDATES[:]
+
+    wrap._AUTO_DISARMED_URIS.clear()
+
+    wrap._RATE_BUCKETS.clear()
+
+    wrap._EXCEPTION_COUNTS.clear()
+
+    # Reset `stats` and `count` handlers' results
+    handler_plugin._CALL_STATS.clear()
+
+    handler_plugin._CALL_COUNTS.clear()
+
+    # Reset spec stats
+    spec.reset_spec_stats()
+
+    # Reset state backend
+    state_backend_set(STATE_BACKEND_THREAD)
+
+    # Reset call tree state of the current thread
+    count_set(0)
+
+    level_set(-1)
+
+    showhide_bits_set(0)
+
+    limit_stack_set(())
+
+    threshold_buffer_set(None)
+
+    collapse_state_set(None)
+
+    last_exception_set(None)
@@ -0,0 +1,122 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of tracing generator resumes.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import asyncio
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def gen():
+    yield 1
+    yield 2
+    return 'done'
+
+
+def plaingen():
+    yield 1
+
+
+async def agen():
+    yield 1
+    yield 2
+'''
+
+
+def _trace(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder(
+        info_keys=('resume_count', 'yield_value', 'call_result')
+    )
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.gen', [True, 'trace_generator']),
+            (module.__name__ + '.agen', {'trace_generator': True}),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    return module, event_s
+
+
+def test_traced_generator(tmp_path):
+    #
+    module, event_s = _trace(tmp_path)
+
+    #
+    assert list(module.gen()) == [1, 2]
+
+    # Ensure each resume is reported after the call creating the generator
+    assert [event[0] for event in event_s] == [
+        'pre_call',
+        'post_call',
+        'gen_resume',
+        'gen_yield',
+        'gen_resume',
+        'gen_yield',
+        'gen_resume',
+        'gen_finish',
+    ]
+
+    #
+    assert [event[2:4] for event in event_s[2:6]] == \
+        [(1, None), (1, 1), (2, None), (2, 2)]
+
+    # Ensure the generator's return value is reported
+    assert event_s[-1][4] == 'done'
+
+
+def test_traced_generator_case_not_enabled(tmp_path):
+    #
+    module, event_s = _trace(tmp_path)
+
+    #
+    assert list(module.plaingen()) == [1]
+
+    # Ensure resumes are not reported
+    assert [event[0] for event in event_s] == ['pre_call', 'post_call']
+
+
+def test_traced_async_generator(tmp_path):
+    #
+    module, event_s = _trace(tmp_path)
+
+    #
+    async def consume():
+        return [value async for value in module.agen()]
+
+    #
+    assert asyncio.run(consume()) == [1, 2]
+
+    #
+    assert [event[0] for event in event_s] == [
+        'pre_call',
+        'post_call',
+        'gen_resume',
+        'gen_yield',
+        'gen_resume',
+        'gen_yield',
+        'gen_resume',
+        'gen_finish',
+    ]
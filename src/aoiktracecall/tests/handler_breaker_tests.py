@@ -0,0 +1,191 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of handler circuit breakers.
+"""
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+from aoiktracecall.wrap import get_handler_breaker_counts
+
+
+_SOURCE = '''
+def outer():
+    return inner()
+
+
+def inner():
+    return 1
+
+
+def other():
+    return 2
+'''
+
+
+def _trace(tmp_path, fail_uri_s, showhide=True):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Event list
+    event_s = []
+
+    # Create handler failing in events of given functions
+    def handler(info):
+        #
+        name = info['onwrap_uri'].rpartition('.')[2]
+
+        #
+        if name in fail_uri_s:
+            raise ValueError(name)
+
+        #
+        event_s.append((info['trace_hook_type'], name))
+
+        #
+        return info
+
+    # Pass events to the handler
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.outer', showhide),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': handler},
+    )
+
+    #
+    return module, event_s
+
+
+def test_handler_breaker_case_opened(tmp_path):
+    """
+    Test the handler is skipped after consecutive failures.
+    """
+    #
+    set_config('HANDLER_BREAKER_FAILURES', 2)
+
+    #
+    module, event_s = _trace(tmp_path, ['other'])
+
+    #
+    with capture_output() as message_s:
+        for _ in range(4):
+            assert module.other() == 2
+
+    # Ensure the first failure is reported and the second opens the breaker
+    assert len(message_s) == 2
+
+    assert 'handler disabled' not in message_s[0]
+
+    assert 'handler disabled' in message_s[1]
+
+    # Ensure no events are handled
+    assert event_s == []
+
+    # Ensure counters
+    count_s = get_handler_breaker_counts()
+
+    assert len(count_s) == 1
+
+    assert list(count_s.values())[0] == {
+        'failures': 2,
+        'total_failures': 2,
+        'skipped': 3,
+        'opened': 1,
+        'open': True,
+    }
+
+
+def test_handler_breaker_case_opened_in_pre_call(tmp_path):
+    """
+    Test the post-call event of a call whose pre-call event opened the \
+        breaker is still handled, so stateful handlers stay balanced.
+    """
+    #
+    set_config('HANDLER_BREAKER_FAILURES', 1)
+
+    #
+    module, event_s = _trace(tmp_path, ['outer'], showhide='hide_below')
+
+    #
+    with capture_output() as message_s:
+        assert module.outer() == 1
+
+    # Ensure the breaker is opened once
+    assert len([msg for msg in message_s if 'handler disabled' in msg]) == 1
+
+    # Ensure the post-call event is handled, counted as failure
+    assert event_s == []
+
+    assert list(get_handler_breaker_counts().values())[0][
+        'total_failures'
+    ] == 2
+
+    # Ensure calls after it are not hidden
+    del event_s[:]
+
+    assert module.other() == 2
+
+    assert event_s == [('pre_call', 'other'), ('post_call', 'other')]
+
+    # Ensure calls skipped by the open breaker skip both events, so calls
+    # below them are not hidden
+    del event_s[:]
+
+    assert module.outer() == 1
+
+    assert event_s == [('pre_call', 'inner'), ('post_call', 'inner')]
+
+    del event_s[:]
+
+    #
+    assert module.other() == 2
+
+    assert event_s == [('pre_call', 'other'), ('post_call', 'other')]
+
+
+def test_handler_breaker_case_global_scope(tmp_path):
+    """
+    Test functions sharing a handler share one breaker in global scope, \
+        though each function has its own specialized handler.
+    """
+    #
+    set_config('HANDLER_BREAKER_FAILURES', 1)
+
+    #
+    set_config('HANDLER_BREAKER_SCOPE', 'global')
+
+    # `hide_below` makes the function's specialized handler differ from the
+    # other functions'
+    module, event_s = _trace(
+        tmp_path, ['outer', 'inner', 'other'], showhide='hide_below'
+    )
+
+    #
+    with capture_output() as message_s:
+        assert module.other() == 2
+
+        assert module.outer() == 1
+
+    # Ensure one breaker is opened
+    assert len([msg for msg in message_s if 'handler disabled' in msg]) == 1
+
+    #
+    count_s = get_handler_breaker_counts()
+
+    assert len(count_s) == 1
+
+    assert list(count_s.values())[0]['opened'] == 1
+
+    # Ensure the calls after the breaker is opened are skipped
+    assert list(count_s.values())[0]['skipped'] == 2
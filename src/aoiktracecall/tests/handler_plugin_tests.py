@@ -0,0 +1,155 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of per-spec handler selection.
+"""
+from __future__ import absolute_import
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall import spec
+from aoiktracecall.config import set_config
+from aoiktracecall.plugin.handler_plugin import get_call_counts
+from aoiktracecall.plugin.handler_plugin import get_call_stats
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def top():
+    return child()
+
+
+def child():
+    return 1
+'''
+
+
+def _trace(tmp_path, top_spec_arg, handlers=None):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.top', top_spec_arg),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers=handlers,
+    )
+
+    #
+    return module
+
+
+def test_spec_handlers(tmp_path):
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    #
+    module = _trace(
+        tmp_path,
+        {'handlers': ['record', 'count']},
+        handlers={'record': recorder},
+    )
+
+    #
+    with capture_output() as message_s:
+        module.top()
+
+    # Ensure the spec's handlers get only the spec's calls
+    assert [
+        (hook_type, uri.rpartition('.')[2]) for hook_type, uri in event_s
+    ] == [('pre_call', 'top'), ('post_call', 'top')]
+
+    assert get_call_counts() == {module.__name__ + '.top': 1}
+
+    # Ensure other calls go to the default `print` handler
+    assert len(message_s) == 2
+
+    assert module.__name__ + '.child' in message_s[0]
+
+
+def test_spec_handlers_case_stats(tmp_path):
+    # Pass events of all calls to the `stats` handler
+    set_config('DEFAULT_HANDLERS', 'stats')
+
+    #
+    module = _trace(tmp_path, True)
+
+    #
+    with capture_output() as message_s:
+        module.top()
+
+        module.top()
+
+    # Ensure nothing is printed
+    assert message_s == []
+
+    # Ensure calls are aggregated per URI
+    call_stats = get_call_stats()
+
+    assert sorted(call_stats) == \
+        [module.__name__ + '.child', module.__name__ + '.top']
+
+    stats = call_stats[module.__name__ + '.top']
+
+    assert stats['count'] == 2
+
+    assert stats['min_time'] <= stats['max_time'] <= stats['total_time']
+
+    assert stats['self_time'] <= stats['total_time']
+
+
+def test_spec_handlers_case_empty(tmp_path):
+    #
+    module = _trace(tmp_path, {'handlers': []})
+
+    #
+    with capture_output() as message_s:
+        module.top()
+
+    # Ensure the spec's calls are not passed to any handler
+    assert len(message_s) == 2
+
+    assert module.__name__ + '.top' not in ''.join(message_s)
+
+
+def test_spec_handlers_case_undefined(tmp_path):
+    # Ensure undefined handler names are rejected before wrapping
+    with pytest.raises(ValueError, match='Handler is not defined'):
+        _trace(tmp_path, {'handlers': 'missing'})
+
+
+def test_spec_handlers_case_matched_once(tmp_path, monkeypatch):
+    # Spec match count
+    match_count_s = [0]
+
+    # Get original function
+    find_matched_spec_info = spec.find_matched_spec_info
+
+    # Count spec matches
+    def counting_find_matched_spec_info(*args, **kwargs):
+        #
+        match_count_s[0] += 1
+
+        #
+        return find_matched_spec_info(*args, **kwargs)
+
+    #
+    monkeypatch.setattr(
+        spec, 'find_matched_spec_info', counting_find_matched_spec_info
+    )
+
+    #
+    _trace(tmp_path, {'handlers': 'count', 'max_depth': 1})
+
+    # Ensure the specs are matched once for each of the module, `top` and
+    # `child`, not once per filter
+    assert match_count_s[0] == 3
@@ -0,0 +1,159 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains test helpers.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from contextlib import contextmanager
+import importlib
+import logging
+import os
+import sys
+import textwrap
+
+# Internal imports
+from aoiktracecall.logging import get_error_logger
+from aoiktracecall.logging import get_info_logger
+from aoiktracecall.spec import parse_specs
+from aoiktracecall.trace import _create_trace_funcs
+from aoiktracecall.trace import trace_calls_in_obj
+
+
+# Count of modules created by `import_source`, used in module names
+_MODULE_COUNT = [0]
+
+
+def import_source(dir_path, source, name=None):
+    """
+    Write given source to a module file and import it.
+
+    :param dir_path: Directory path to write the module file in.
+
+    :param source: Module source, dedented.
+
+    :param name: Module name. Default is a unique name.
+
+    :return: Module.
+    """
+    # If module name is not given
+    if name is None:
+        # Get unique name
+        _MODULE_COUNT[0] += 1
+
+        name = 'aoiktracecall_test_mod_{}'.format(_MODULE_COUNT[0])
+
+    # Write module file
+    with open(os.path.join(str(dir_path), name + '.py'), 'w') as file:
+        file.write(textwrap.dedent(source))
+
+    # Add the directory to module search paths
+    sys.path.insert(0, str(dir_path))
+
+    try:
+        # Import the module
+        return importlib.import_module(name)
+    finally:
+        # Remove the directory from module search paths
+        sys.path.remove(str(dir_path))
+
+
+def trace_module(
+    module,
+    specs,
+    handlers=None,
+    printing_handler_filter_func=None,
+):
+    """
+    Trace given module's callables according to given specs, like \
+        `trace_calls_in_specs` but without hooking the module finder.
+
+    :param module: Module.
+
+    :param specs: Specs.
+
+    :param handlers: Dict mapping handler name to handler function.
+
+    :param printing_handler_filter_func: `printing_handler`'s filter function.
+
+    :return: Tuple of trace filter and trace handler.
+    """
+    # Create trace filter and trace handler
+    trace_filter, trace_handler = _create_trace_funcs(
+        parse_specs(specs),
+        printing_handler_filter_func=printing_handler_filter_func,
+        handlers=handlers,
+    )
+
+    # Wrap the module's callables
+    trace_calls_in_obj(module, filter=trace_filter, handler=trace_handler)
+
+    #
+    return trace_filter, trace_handler
+
+
+def create_recorder(info_keys=()):
+    """
+    Create handler that records events.
+
+    :param info_keys: Keys of info dict values to add to each event.
+
+    :return: Tuple of event list and handler. Each event is a tuple of hook \
+        type, URI, and values of given info dict keys.
+    """
+    # Event list
+    event_s = []
+
+    #
+    def handler(info):
+        #
+        event_s.append((info['trace_hook_type'], info['onwrap_uri']) + tuple(
+            info.get(key, None) for key in info_keys
+        ))
+
+        #
+        return info
+
+    #
+    return event_s, handler
+
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        #
+        logging.Handler.__init__(self)
+
+        # Message list
+        self.messages = []
+
+    def emit(self, record):
+        #
+        self.messages.append(record.getMessage())
+
+
+@contextmanager
+def capture_output():
+    """
+    Capture messages sent to the info logger and error logger.
+
+    :return: Context manager giving the message list.
+    """
+    # Create logging handler
+    handler = _ListHandler()
+
+    # Get loggers
+    logger_s = (get_info_logger(), get_error_logger())
+
+    # Add logging handler
+    for logger in logger_s:
+        logger.addHandler(handler)
+
+    try:
+        #
+        yield handler.messages
+    finally:
+        # Remove logging handler
+        for logger in logger_s:
+            logger.removeHandler(handler)
@@ -0,0 +1,113 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of call depth, fan-out and rate limits.
+"""
+from __future__ import absolute_import
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def top(count):
+    for _ in range(count):
+        child()
+
+
+def child():
+    return leaf()
+
+
+def leaf():
+    return 1
+'''
+
+
+def _trace(tmp_path, top_spec_arg=True, leaf_spec_arg=True):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder(info_keys=('suppressed_count',))
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.top', top_spec_arg),
+            (module.__name__ + '.leaf', leaf_spec_arg),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    return module, event_s
+
+
+def _get_short_events(event_s):
+    # Return events with function names instead of URIs
+    return [
+        (hook_type, uri.rpartition('.')[2], suppressed_count)
+        for hook_type, uri, suppressed_count in event_s
+    ]
+
+
+def test_limits_case_depth_and_fan_out(tmp_path):
+    #
+    module, event_s = _trace(
+        tmp_path, top_spec_arg={'max_depth': 1, 'max_children': 2}
+    )
+
+    #
+    module.top(3)
+
+    # Ensure calls deeper than max depth, and children after max children,
+    # are suppressed and counted in their callers' post-call events
+    assert _get_short_events(event_s) == [
+        ('pre_call', 'top', None),
+        ('pre_call', 'child', None),
+        ('post_call', 'child', 1),
+        ('pre_call', 'child', None),
+        ('post_call', 'child', 1),
+        ('post_call', 'top', 2),
+    ]
+
+
+def test_limits_case_config(tmp_path):
+    # Limit depth of all calls
+    set_config('TRACE_MAX_DEPTH', 0)
+
+    #
+    module, event_s = _trace(tmp_path)
+
+    #
+    module.top(2)
+
+    # Ensure callees of the outermost limited call are suppressed
+    assert _get_short_events(event_s) == [
+        ('pre_call', 'top', None),
+        ('post_call', 'top', 4),
+    ]
+
+
+def test_limits_case_rate(tmp_path):
+    #
+    module, event_s = _trace(tmp_path, leaf_spec_arg={'max_rate': 2})
+
+    #
+    module.top(5)
+
+    # Ensure calls over the rate are suppressed. The rate window may roll
+    # over during the loop.
+    leaf_count = _get_short_events(event_s).count(('pre_call', 'leaf', None))
+
+    assert 2 <= leaf_count < 5
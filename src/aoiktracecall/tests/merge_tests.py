@@ -0,0 +1,129 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of per-process trace files and merging them.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import io
+import json
+import logging
+import os
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.logging import ProcessFileHandler
+from aoiktracecall.merge import merge_trace_files
+
+
+def _write_records(file_path, record_s):
+    # Open trace file
+    with open(file_path, 'w') as trace_file:
+        # For each record
+        for record in record_s:
+            # Write record
+            trace_file.write(json.dumps(record) + '\n')
+
+
+def test_merge_trace_files(tmp_path):
+    # Write trace files, each ordered by timestamp
+    file_path_1 = str(tmp_path / 'trace.1.jsonl')
+
+    file_path_2 = str(tmp_path / 'trace.2.jsonl')
+
+    _write_records(file_path_1, [
+        {'pid': 1, 'thread': 0, 'ts': 1.0, 'text': 'a'},
+        {'pid': 1, 'thread': 0, 'ts': 3.0, 'text': 'c\nd'},
+    ])
+
+    _write_records(file_path_2, [
+        {'pid': 2, 'thread': 1, 'ts': 2.0, 'text': 'b'},
+    ])
+
+    # Add partial line written by a killed process
+    with open(file_path_2, 'a') as trace_file:
+        trace_file.write('{"pid": 2, "ts"')
+
+    #
+    output_file = io.StringIO()
+
+    # Merge trace files
+    assert merge_trace_files([file_path_1, file_path_2], output_file) == 3
+
+    # Ensure records are ordered by timestamp and prefixed
+    assert output_file.getvalue().splitlines() == [
+        '[P1 T0] a',
+        '[P2 T1] b',
+        '[P1 T0] c',
+        '[P1 T0] d',
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires fork.')
+def test_process_file_handler_case_fork(tmp_path):
+    # Create logger writing to per-process trace files
+    logger = logging.getLogger('aoiktracecall.tests.merge_tests')
+
+    logger.propagate = False
+
+    logger.setLevel(logging.INFO)
+
+    handler = ProcessFileHandler(str(tmp_path / 'trace.{pid}.jsonl'))
+
+    logger.addHandler(handler)
+
+    #
+    try:
+        #
+        logger.info('parent before fork')
+
+        # Fork child process
+        pid = os.fork()
+
+        # If is child process
+        if pid == 0:
+            #
+            try:
+                #
+                logger.info('child')
+
+                #
+                handler.flush()
+            finally:
+                # Exit without running parent's cleanup
+                os._exit(0)
+
+        # Wait for child process
+        os.waitpid(pid, 0)
+
+        #
+        logger.info('parent after fork')
+    finally:
+        #
+        logger.removeHandler(handler)
+
+        #
+        handler.close()
+
+    # Get trace file paths
+    file_path_s = sorted(str(path) for path in tmp_path.iterdir())
+
+    # Ensure each process wrote its own file
+    assert file_path_s == sorted([
+        handler.get_file_path(os.getpid()), handler.get_file_path(pid)
+    ])
+
+    #
+    output_file = io.StringIO()
+
+    # Merge trace files
+    merge_trace_files(file_path_s, output_file)
+
+    # Ensure records are in one timeline, and the parent's record before
+    # fork is not written again by the child
+    assert [
+        line.partition('] ')[2] for line in output_file.getvalue().splitlines()
+    ] == ['parent before fork', 'child', 'parent after fork']
@@ -0,0 +1,95 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Standard imports
+import json
+
+# Internal imports
+from aoiktracecall.query import iter_subtree_events
+from aoiktracecall.query import query_calls
+from aoiktracecall.store import TraceStore
+from aoiktracecall.store import build_index
+
+
+def _write_events(tmp_path, call_count):
+    # Get event file path
+    file_path = str(tmp_path / 'events.1.jsonl')
+
+    # Timestamp
+    timestamp = 0
+
+    # Open event file
+    with open(file_path, 'w') as event_file:
+        # For each call
+        for index in range(call_count):
+            # For each event of the call and its callee
+            for event_type, uri, level in (
+                ('pre_call', 'pkg.outer', 1),
+                ('pre_call', 'pkg.outer_inner', 2),
+                ('post_call', 'pkg.outer_inner', 2),
+                ('post_call', 'pkg.outer', 1),
+            ):
+                # Write event
+                event_file.write(json.dumps({
+                    'pid': 1,
+                    'thread': 1,
+                    'ts': timestamp,
+                    'type': event_type,
+                    'uri': uri,
+                    'level': level,
+                    'count': index,
+                }) + '\n')
+
+                # Increment timestamp
+                timestamp += 1
+
+    # Return event file path
+    return file_path
+
+
+def test_uri_index_is_sparse(tmp_path):
+    # Write events
+    file_path = _write_events(tmp_path, 25)
+
+    # Build index
+    index = build_index(file_path, uri_index_step=10)
+
+    # Only every 10th call's offset is indexed
+    assert index['uris']['pkg.outer']['count'] == 25
+
+    assert len(index['uris']['pkg.outer']['offsets']) == 3
+
+
+def test_iter_subtree_events(tmp_path):
+    # Write events
+    file_path = _write_events(tmp_path, 25)
+
+    # Create store with sparse URI index
+    store = TraceStore(file_path, save_index=False)
+
+    store._index = build_index(file_path, uri_index_step=10)
+
+    # For each call index, including ones between index entries
+    for nth in (0, 9, 10, 17, 24):
+        # Get the call's events
+        event_s = list(iter_subtree_events(store, 'pkg.outer', nth=nth))
+
+        # The call's events are found
+        assert [event['count'] for event in event_s] == [nth] * 4
+
+    # No such call
+    assert list(iter_subtree_events(store, 'pkg.outer', nth=25)) == []
+
+
+def test_query_calls_uri_matches_whole_uri(tmp_path):
+    # Write events
+    file_path = _write_events(tmp_path, 2)
+
+    # Query calls by URI regex
+    call_info_s = list(query_calls(
+        [TraceStore(file_path, save_index=False)], uri='pkg\\.outer'
+    ))
+
+    # The callee whose URI has the regex as prefix is not matched
+    assert [call_info['uri'] for call_info in call_info_s] == \
+        ['pkg.outer', 'pkg.outer']
@@ -0,0 +1,203 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of show/hide handling.
+"""
+from __future__ import absolute_import
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall import wrap
+from aoiktracecall.config import set_config
+from aoiktracecall.plugin.showhide_plugin import get_showhide_op
+from aoiktracecall.plugin.showhide_plugin import showhide_handler
+from aoiktracecall.state import showhide_bits_get
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def top():
+    try:
+        middle()
+    except KeyError:
+        return 'caught'
+
+
+def middle():
+    return bottom()
+
+
+def bottom():
+    raise KeyError('bottom')
+'''
+
+
+def _trace(tmp_path, top_showhide='hide_below'):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    # Pass events to the recording handler
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.top', top_showhide),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    return module, event_s
+
+
+@pytest.mark.parametrize('counting', [True, False])
+@pytest.mark.parametrize('preserve_signature', [True, False])
+def test_hidden_subtree_exception_case_short_circuit(
+    tmp_path, counting, preserve_signature
+):
+    """
+    Test exception propagating through calls skipped below `hide_below`.
+    """
+    #
+    set_config('HIDDEN_SUBTREE_COUNTING', counting)
+
+    #
+    set_config('WRAP_PRESERVE_SIGNATURE', preserve_signature)
+
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Ensure the traced program's exception is not replaced
+    assert module.top() == 'caught'
+
+    # Ensure hidden calls are skipped
+    assert [uri.rpartition('.')[2] for _, uri in event_s] == ['top', 'top']
+
+    # Ensure the skipped calls are not visible to later calls
+    assert module.middle.__name__ == 'middle'
+
+    with pytest.raises(KeyError):
+        module.middle()
+
+    #
+    assert [
+        (hook_type, uri.rpartition('.')[2]) for hook_type, uri in event_s[2:]
+    ] == [
+        ('pre_call', 'middle'),
+        ('pre_call', 'bottom'),
+        ('post_call', 'bottom'),
+        ('post_call', 'middle'),
+    ]
+
+
+_TREE_SOURCE = '''
+def top():
+    return middle()
+
+
+def middle():
+    return bottom()
+
+
+def bottom():
+    return 1
+'''
+
+
+@pytest.mark.parametrize('showhide, name_s', [
+    (None, ['top', 'middle', 'bottom']),
+    ('show_this', ['top', 'middle', 'bottom']),
+    ('hide_this', ['middle', 'bottom']),
+    ('show_tree', ['top', 'middle', 'bottom']),
+    ('hide_tree', []),
+    ('show_below', ['middle', 'bottom']),
+    ('hide_below', ['top']),
+])
+def test_showhide_ops(tmp_path, showhide, name_s):
+    # Import module
+    module = import_source(tmp_path, _TREE_SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.top', showhide),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    assert module.top() == 1
+
+    # Ensure the expected calls are shown
+    assert [
+        uri.rpartition('.')[2] for hook_type, uri in event_s
+        if hook_type == 'pre_call'
+    ] == name_s
+
+    # Ensure the show/hide bit stack is balanced
+    assert showhide_bits_get() == 0
+
+
+def test_showhide_handler():
+    # Ensure pushes and pops are balanced on the bit stack
+    pre_info = {'showhide': 'hide_below', 'trace_hook_type': 'pre_call'}
+
+    assert showhide_handler(pre_info) is pre_info
+
+    assert showhide_bits_get() == 1
+
+    # Ensure calls below are hidden
+    assert showhide_handler({'showhide': True}) is False
+
+    #
+    post_info = dict(pre_info, trace_hook_type='post_call')
+
+    assert showhide_handler(post_info) is post_info
+
+    assert showhide_bits_get() == 0
+
+    # Ensure calls not below a hidden call are shown
+    info = {'showhide': True}
+
+    assert showhide_handler(info) is info
+
+    # Ensure invalid values are rejected
+    with pytest.raises(ValueError):
+        get_showhide_op('hide_some')
+
+
+def test_hidden_subtree_case_no_config_lookup(tmp_path, monkeypatch):
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Ensure configs are resolved at wrap time, not looked up on each call
+    def get_config(key):
+        raise AssertionError(key)
+
+    monkeypatch.setattr(wrap, 'get_config', get_config)
+
+    #
+    assert module.top() == 'caught'
+
+    #
+    assert [uri.rpartition('.')[2] for _, uri in event_s] == ['top', 'top']
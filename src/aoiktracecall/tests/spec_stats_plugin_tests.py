@@ -0,0 +1,159 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of spec stats.
+"""
+from __future__ import absolute_import
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall import spec
+from aoiktracecall import trace
+from aoiktracecall.config import set_config
+from aoiktracecall.plugin.spec_stats_plugin import format_spec_stats_report
+from aoiktracecall.spec import find_matched_spec_info
+from aoiktracecall.spec import get_spec_stats
+from aoiktracecall.spec import parse_specs
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+def top():
+    return middle()
+
+
+def middle():
+    return bottom()
+
+
+def bottom():
+    return 'bottom'
+'''
+
+
+def _get_specs(module):
+    #
+    return [
+        (module.__name__, True),
+        (module.__name__ + '.top', 'hide_below'),
+        (module.__name__ + r'\.[^_.]+', True),
+        (module.__name__ + '.missing', True),
+    ]
+
+
+@pytest.mark.parametrize('short_circuit', [True, False])
+def test_spec_stats(tmp_path, monkeypatch, short_circuit):
+    """
+    Test calls are counted per spec, including calls skipped because hidden.
+    """
+    #
+    set_config('SPEC_STATS', True)
+
+    #
+    set_config('HIDDEN_SUBTREE_SHORT_CIRCUIT', short_circuit)
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    # Get specs
+    specs = _get_specs(module)
+
+    # Spec match count
+    match_count_s = [0]
+
+    # Count spec matches
+    def counting_find_matched_spec_info(*args, **kwargs):
+        #
+        match_count_s[0] += 1
+
+        #
+        return find_matched_spec_info(*args, **kwargs)
+
+    #
+    monkeypatch.setattr(
+        spec, 'find_matched_spec_info', counting_find_matched_spec_info
+    )
+
+    # Trace the module
+    trace_module(module, specs, handlers={'record': recorder})
+
+    # Ensure the specs are matched once for each of the module and its 3
+    # functions, including by the spec stats filter
+    assert match_count_s[0] == 4
+
+    # Call the function
+    assert module.top() == 'bottom'
+
+    # Get stats
+    stats_dict = get_spec_stats()
+
+    # Ensure calls hidden below `top` are counted either way
+    assert stats_dict[module.__name__ + '.top']['calls'] == 1
+
+    assert stats_dict[module.__name__ + r'\.[^_.]+']['calls'] == 2
+
+    # Ensure each object is matched once. Exact specs are tested before
+    # regex specs.
+    assert dict(
+        (uri[len(module.__name__):], item['tests'])
+        for uri, item in stats_dict.items()
+    ) == {
+        '': 4,
+        '.top': 3,
+        '.missing': 2,
+        r'\.[^_.]+': 2,
+    }
+
+    assert dict(
+        (uri[len(module.__name__):], item['matched'])
+        for uri, item in stats_dict.items()
+    ) == {
+        '': 1,
+        '.top': 1,
+        '.missing': 0,
+        r'\.[^_.]+': 2,
+    }
+
+    # Ensure matching without stats, e.g. by `reload_specs`, is not counted
+    find_matched_spec_info({'onwrap_uri': module.__name__}, parse_specs(specs))
+
+    assert get_spec_stats() == stats_dict
+
+    # Ensure the dead spec is reported
+    report = format_spec_stats_report(parse_specs(specs))
+
+    assert module.__name__ + '.missing' in report
+
+
+def test_spec_stats_case_report_registered_once(tmp_path, monkeypatch):
+    #
+    set_config('SPEC_STATS', True)
+
+    # Registered function list
+    func_s = []
+
+    #
+    monkeypatch.setattr(trace.atexit, 'register', func_s.append)
+
+    #
+    monkeypatch.setattr(trace, '_SPEC_STATS_REPORT_REGISTERED', [False])
+
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Trace twice
+    for _ in range(2):
+        trace.trace_calls_in_specs(_get_specs(module))
+
+    # Ensure the report is printed once at exit
+    assert len(func_s) == 1
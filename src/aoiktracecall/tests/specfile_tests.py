@@ -0,0 +1,80 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+# Standard imports
+import json
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.specfile import SpecFileError
+from aoiktracecall.specfile import load_spec_file
+from aoiktracecall.specfile import main
+
+
+def _write_file(tmp_path, file_name, text):
+    # Get file path
+    file_path = str(tmp_path / file_name)
+
+    # Write file
+    with open(file_path, 'w') as spec_file:
+        spec_file.write(text)
+
+    # Return file path
+    return file_path
+
+
+def test_load_spec_file_config(tmp_path):
+    # Write INI spec file
+    file_path = _write_file(tmp_path, 'specs.ini', '\n'.join([
+        '[config]',
+        'LATENCY_THRESHOLD_MS = 50',
+        'DEFAULT_HANDLERS = print, stats',
+        'SPEC_STATS = true',
+    ]))
+
+    # Load spec file
+    result = load_spec_file(file_path)
+
+    # Config items are loaded
+    assert result['config'] == {
+        'LATENCY_THRESHOLD_MS': 50,
+        'DEFAULT_HANDLERS': ['print', 'stats'],
+        'SPEC_STATS': True,
+    }
+
+
+@pytest.mark.parametrize('config_dict', [
+    # Unknown key
+    {'LATENCY_THRESHOLD_M': 50},
+    # Number expected
+    {'LATENCY_THRESHOLD_MS': '50'},
+    # Boolean expected
+    {'SPEC_STATS': 1},
+    # Integer expected
+    {'TRACE_MAX_DEPTH': 1.5},
+])
+def test_load_spec_file_case_invalid_config(tmp_path, config_dict):
+    # Write JSON spec file
+    file_path = _write_file(
+        tmp_path, 'specs.json', json.dumps({'config': config_dict})
+    )
+
+    # Loading fails
+    with pytest.raises(SpecFileError):
+        load_spec_file(file_path)
+
+
+def test_main_check_case_unknown_config_key(tmp_path, capsys):
+    # Write JSON spec file with typo in config key
+    file_path = _write_file(tmp_path, 'specs.json', json.dumps({
+        'config': {'LATENCY_THRESHOLD_M': 50},
+        'specs': [['pkg.mod', True]],
+    }))
+
+    # Checking fails
+    assert main(['--check', file_path]) != 0
+
+    # The key is reported
+    assert 'LATENCY_THRESHOLD_M' in capsys.readouterr().err
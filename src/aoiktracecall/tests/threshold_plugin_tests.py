@@ -0,0 +1,104 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of latency threshold mode.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from functools import partial
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.plugin.threshold_plugin import threshold_handler
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+import time
+
+
+def top(seconds):
+    return child(seconds)
+
+
+def child(seconds):
+    time.sleep(seconds)
+    return seconds
+'''
+
+
+def test_threshold_handler(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler behind threshold handler
+    event_s, recorder = create_recorder()
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + '.top', {'threshold_ms': 20}),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': partial(threshold_handler, handler=recorder)},
+    )
+
+    # Ensure events of a fast call tree are discarded
+    module.top(0)
+
+    assert event_s == []
+
+    # Ensure events of a slow call tree are passed in order
+    module.top(0.03)
+
+    assert [
+        (hook_type, uri.rpartition('.')[2]) for hook_type, uri in event_s
+    ] == [
+        ('pre_call', 'top'),
+        ('pre_call', 'child'),
+        ('post_call', 'child'),
+        ('post_call', 'top'),
+    ]
+
+    # Ensure calls not under a call having threshold are passed through
+    del event_s[:]
+
+    module.child(0)
+
+    assert [hook_type for hook_type, _ in event_s] == \
+        ['pre_call', 'post_call']
+
+
+def test_threshold_handler_case_config(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Print only call trees slower than 20ms
+    set_config('LATENCY_THRESHOLD_MS', 20)
+
+    # Trace the module
+    trace_module(module, [
+        (module.__name__, True),
+        (module.__name__ + '.top', True),
+    ])
+
+    #
+    with capture_output() as message_s:
+        # Call fast and slow
+        module.top(0)
+
+        module.top(0.03)
+
+    # Ensure only the slow call is printed
+    assert len(message_s) == 2
+
+    assert '=> ( seconds=0.03 )' in message_s[0]
@@ -0,0 +1,239 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of tracing already-loaded modules.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import logging
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.spec import parse_specs
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.trace import _create_trace_funcs
+from aoiktracecall.trace import reload_specs
+from aoiktracecall.trace import trace_calls_in_modules
+from aoiktracecall.trace import trace_calls_in_specs
+
+
+_SOURCE = '''
+def outer():
+    return inner()
+
+
+def inner():
+    return 'inner'
+'''
+
+
+def test_trace_calls_in_modules(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Create trace filter and trace handler
+    trace_filter, trace_handler = _create_trace_funcs(
+        parse_specs([
+            (module.__name__, True),
+            (module.__name__ + r'\.[^_.]+', True),
+        ]),
+        handlers={'record': recorder},
+    )
+
+    # Progress list
+    progress_s = []
+
+    # Trace the module
+    report = trace_calls_in_modules(
+        [module],
+        filter=trace_filter,
+        handler=trace_handler,
+        progress=lambda *args: progress_s.append(args),
+    )
+
+    #
+    assert report['wrapped_count'] == 2
+
+    #
+    assert progress_s == [(1, 1, module.__name__)]
+
+    #
+    assert module.outer() == 'inner'
+
+    #
+    assert [uri.rpartition('.')[2] for _, uri in event_s] == \
+        ['outer', 'inner', 'inner', 'outer']
+
+
+def test_trace_calls_in_modules_case_default_modules():
+    # Analyse all loaded modules, rejecting all objects
+    report = trace_calls_in_modules(
+        filter=lambda info: None, handler=lambda info: info
+    )
+
+    # Get names of analysed modules
+    analysed_name_s = set(
+        module_report['module_name'] for module_report in report['modules']
+    )
+
+    # Ensure the tracer and modules it calls when handling events are excluded
+    for module_name in (
+        'aoiktracecall',
+        'aoiktracecall.trace',
+        'aoiktracecall.wrap',
+        logging.__name__,
+    ):
+        assert module_name not in analysed_name_s
+
+    # Ensure other modules are included
+    assert 'json' in analysed_name_s
+
+
+def _trace_calls_in_specs(module, specs, in_modules=False):
+    # Create recording handler
+    event_s, recorder = create_recorder()
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # If trace the loaded module in bulk
+    if in_modules:
+        # Create trace filter and trace handler
+        trace_filter, trace_handler = _create_trace_funcs(
+            parse_specs(specs), handlers={'record': recorder}
+        )
+
+        # Wrap the module, filtering in the analysis phase
+        trace_calls_in_modules(
+            [module], filter=trace_filter, handler=trace_handler
+        )
+
+    # Trace according to the specs.
+    # The module finder wraps loaded modules not wrapped yet.
+    trace_calls_in_specs(specs, handlers={'record': recorder})
+
+    #
+    return event_s
+
+
+def _call_outer(module, event_s):
+    #
+    del event_s[:]
+
+    #
+    assert module.outer() == 'inner'
+
+    # Return names of called functions
+    return [
+        uri.rpartition('.')[2] for hook_type, uri in event_s
+        if hook_type == 'pre_call'
+    ]
+
+
+def test_reload_specs(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    #
+    event_s = _trace_calls_in_specs(module, [
+        (module.__name__, True),
+        (module.__name__ + r'\.[^_.]+', True),
+    ])
+
+    #
+    assert _call_outer(module, event_s) == ['outer', 'inner']
+
+    # Hide `outer` and stop matching `inner`
+    count_s = reload_specs([
+        (module.__name__, True),
+        (module.__name__ + '.outer', 'hide_this'),
+    ])
+
+    # Ensure `outer` is updated in place and `inner` is disarmed
+    assert count_s['updated'] == 1
+
+    assert count_s['disarmed'] == 1
+
+    assert _call_outer(module, event_s) == []
+
+    # Show `outer` again
+    count_s = reload_specs([
+        (module.__name__, True),
+        (module.__name__ + '.outer', True),
+    ])
+
+    #
+    assert count_s['updated'] == 1
+
+    assert _call_outer(module, event_s) == ['outer']
+
+
+@pytest.mark.parametrize('in_modules', [False, True])
+def test_reload_specs_case_showhide(tmp_path, in_modules):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    #
+    event_s = _trace_calls_in_specs(module, [
+        (module.__name__, True),
+        (module.__name__ + '.outer', 'hide_tree'),
+        (module.__name__ + r'\.[^_.]+', True),
+    ], in_modules=in_modules)
+
+    #
+    assert _call_outer(module, event_s) == []
+
+    # Show `inner` below the hidden `outer`
+    reload_specs([
+        (module.__name__, True),
+        (module.__name__ + '.outer', 'hide_tree'),
+        (module.__name__ + '.inner', 'show_tree'),
+    ], full=True)
+
+    # Ensure `inner` is filtered again from its info dict before filtering
+    assert _call_outer(module, event_s) == ['inner']
+
+
+def test_reload_specs_case_record_candidates(tmp_path):
+    # Record objects rejected by the trace filter
+    set_config('WRAP_RECORD_CANDIDATES', True)
+
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    #
+    event_s = _trace_calls_in_specs(module, [
+        (module.__name__, True),
+        (module.__name__ + '.outer', True),
+    ])
+
+    #
+    assert _call_outer(module, event_s) == ['outer']
+
+    # Match `inner`
+    count_s = reload_specs([
+        (module.__name__, True),
+        (module.__name__ + r'\.[^_.]+', True),
+    ])
+
+    # Ensure the newly matched function is wrapped
+    assert count_s['wrapped'] == 1
+
+    assert _call_outer(module, event_s) == ['outer', 'inner']
+
+
+def test_reload_specs_case_not_traced():
+    # Ensure reloading before tracing is rejected
+    with pytest.raises(ValueError):
+        reload_specs([])
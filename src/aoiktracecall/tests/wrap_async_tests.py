@@ -0,0 +1,107 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of coroutine wrappers and the contextvars state \
+    backend.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import asyncio
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.state import level_get
+from aoiktracecall.state import STATE_BACKEND_CONTEXT
+from aoiktracecall.state import STATE_BACKEND_THREAD
+from aoiktracecall.state import state_backend_set
+from aoiktracecall.tests.helpers import create_recorder
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+
+
+_SOURCE = '''
+import asyncio
+
+
+async def main():
+    return await asyncio.gather(task('a'), task('b'))
+
+
+async def task(name):
+    await asyncio.sleep(0)
+    return await leaf(name)
+
+
+async def leaf(name):
+    await asyncio.sleep(0)
+    return name
+'''
+
+
+def _trace(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Create recording handler
+    event_s, recorder = create_recorder(info_keys=('level',))
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    return module, event_s
+
+
+def test_coroutine_wrapper_case_context_backend(tmp_path):
+    #
+    state_backend_set(STATE_BACKEND_CONTEXT)
+
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Run interleaved tasks
+    assert asyncio.run(module.main()) == ['a', 'b']
+
+    # Ensure each task has its own call tree
+    assert sorted(set(
+        (uri.rpartition('.')[2], level) for _, uri, level in event_s
+    )) == [('leaf', 2), ('main', 0), ('task', 1)]
+
+    # Ensure pre-call is reported when the coroutine runs, not when created
+    assert event_s[0][0] == 'pre_call' and event_s[-1][0] == 'post_call'
+
+    assert event_s[-1][1].endswith('.main')
+
+
+def test_coroutine_wrapper_case_thread_backend(tmp_path):
+    #
+    module, event_s = _trace(tmp_path)
+
+    # Run interleaved tasks
+    assert asyncio.run(module.main()) == ['a', 'b']
+
+    # Interleaved tasks share the thread's level, but it is restored
+    assert level_get() == -1
+
+
+def test_state_backend_set_case_invalid():
+    #
+    with pytest.raises(ValueError):
+        state_backend_set('invalid')
+
+    #
+    state_backend_set(STATE_BACKEND_THREAD)
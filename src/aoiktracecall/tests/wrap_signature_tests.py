@@ -0,0 +1,108 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of signature-preserving wrappers.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import inspect
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+from aoiktracecall.wrap_signature import BoundArguments
+
+
+_SOURCE = '''
+def add(a, b=2, *args, c, d=4, **kwargs):
+    return (a, b, args, c, d, kwargs)
+'''
+
+
+def _trace(tmp_path, handlers=None):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Get original function
+    func = module.add
+
+    # Use generated wrappers, without wrapper class
+    set_config('WRAP_PRESERVE_SIGNATURE', True)
+
+    set_config('WRAP_USING_WRAPPER_CLASS', False)
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + r'\.[^_.]+', True),
+        ],
+        handlers=handlers,
+    )
+
+    #
+    return module, func
+
+
+def test_signature_wrapper(tmp_path):
+    # Info dict list
+    info_s = []
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    #
+    module, func = _trace(tmp_path, handlers={
+        'record': lambda info: info_s.append(info) or info,
+    })
+
+    # Ensure the wrapper is a plain function with the same signature
+    assert module.add is not func
+
+    assert inspect.isfunction(module.add)
+
+    assert inspect.signature(module.add) == inspect.signature(func)
+
+    assert module.add.__name__ == 'add'
+
+    # Ensure the call is forwarded
+    assert module.add(1, 5, 6, c=3, e=5) == (1, 5, (6,), 3, 4, {'e': 5})
+
+    # Ensure arguments are bound by name
+    bound_args = info_s[0]['bound_args']
+
+    assert isinstance(bound_args, BoundArguments)
+
+    assert dict(bound_args.arguments) == {
+        'a': 1,
+        'b': 5,
+        'c': 3,
+        'd': 4,
+        'args': (6,),
+        'kwargs': {'e': 5},
+    }
+
+    # Ensure invalid arguments raise like the function, before tracing
+    with pytest.raises(TypeError):
+        module.add()
+
+    assert len(info_s) == 2
+
+
+def test_signature_wrapper_case_printing(tmp_path):
+    #
+    module, _ = _trace(tmp_path)
+
+    #
+    with capture_output() as message_s:
+        module.add(1, c=3)
+
+    # Ensure bound arguments are printed
+    assert 'a=1, b=2' in message_s[0]
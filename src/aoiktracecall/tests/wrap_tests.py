@@ -0,0 +1,251 @@
+# coding: utf-8
+# pylint: disable=missing-docstring
+"""
+This module contains tests of wrappers.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import time
+from types import MethodType
+
+# External imports
+import pytest
+
+# Internal imports
+from aoiktracecall.config import set_config
+from aoiktracecall.tests.helpers import capture_output
+from aoiktracecall.tests.helpers import import_source
+from aoiktracecall.tests.helpers import trace_module
+from aoiktracecall.wrap import CallWrapper
+from aoiktracecall.wrap import ExceptionInfo
+from aoiktracecall.wrap import get_auto_disarmed_uris
+from aoiktracecall.wrap import get_exception_counts
+from aoiktracecall.wrap import get_wrapped_obj
+
+
+_SOURCE = '''
+import time
+
+
+def top(seconds):
+    time.sleep(seconds)
+    return child(seconds)
+
+
+def child(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    return bottom()
+
+
+def bottom():
+    raise KeyError('bottom')
+
+
+class Foo(object):
+
+    def run(self, value):
+        return (self, value)
+'''
+
+
+def _trace(tmp_path):
+    # Import module
+    module = import_source(tmp_path, _SOURCE)
+
+    # Info dict list
+    info_s = []
+
+    # Create handler recording info dicts
+    def recorder(info):
+        #
+        info_s.append(info)
+
+        #
+        return info
+
+    #
+    set_config('DEFAULT_HANDLERS', ('record',))
+
+    # Trace the module
+    trace_module(
+        module,
+        [
+            (module.__name__, True),
+            (module.__name__ + r'\.[^_.]+', True),
+            (module.__name__ + r'\.Foo\.[^_.]+', True),
+        ],
+        handlers={'record': recorder},
+    )
+
+    #
+    return module, info_s
+
+
+def _get_post_call_infos(info_s):
+    # Return map of function name to post-call info dict
+    return dict(
+        (info['onwrap_uri'].rpartition('.')[2], info) for info in info_s
+        if info['trace_hook_type'] == 'post_call'
+    )
+
+
+def test_timing(tmp_path):
+    #
+    module, info_s = _trace(tmp_path)
+
+    #
+    module.top(0.01)
+
+    #
+    post_info_s = _get_post_call_infos(info_s)
+
+    # Ensure each call has timing info
+    for info in post_info_s.values():
+        #
+        assert info['end_time'] - info['start_time'] == \
+            pytest.approx(info['elapsed'])
+
+        #
+        assert 0 < info['self_time'] <= info['elapsed']
+
+    # Ensure callee's time is not in caller's self time
+    assert post_info_s['top']['elapsed'] >= 0.02
+
+    assert post_info_s['top']['self_time'] < \
+        post_info_s['top']['elapsed'] - post_info_s['child']['elapsed'] + \
+        0.005
+
+    # Ensure durations are printed
+    set_config('DEFAULT_HANDLERS', ('print',))
+
+    module = import_source(tmp_path, _SOURCE)
+
+    trace_module(module, [
+        (module.__name__, True),
+        (module.__name__ + '.child', True),
+    ])
+
+    with capture_output() as message_s:
+        module.child(0)
+
+    assert 's, self ' in message_s[-1]
+
+
+def test_exception_info(tmp_path):
+    #
+    module, info_s = _trace(tmp_path)
+
+    #
+    with pytest.raises(KeyError):
+        module.fail()
+
+    # Get call results
+    post_info_s = _get_post_call_infos(info_s)
+
+    bottom_result = post_info_s['bottom']['call_result']
+
+    fail_result = post_info_s['fail']['call_result']
+
+    # Ensure the raise call and the propagated call are told apart
+    assert isinstance(bottom_result, ExceptionInfo)
+
+    assert not bottom_result.propagated
+
+    assert fail_result.propagated
+
+    assert fail_result.raise_uri == module.__name__ + '.bottom'
+
+    assert fail_result.exc_type is KeyError
+
+    # Ensure short text has no traceback, and full text is rendered lazily
+    assert fail_result._text is None
+
+    assert '\n' not in fail_result.format_short()
+
+    assert 'Traceback' in str(fail_result)
+
+    # Ensure exceptions are counted per URI
+    assert get_exception_counts() == {
+        module.__name__ + '.bottom': {'raised': 1, 'propagated': 0},
+        module.__name__ + '.fail': {'raised': 0, 'propagated': 1},
+    }
+
+
+def test_call_wrapper_binding(tmp_path):
+    # Use wrapper class for all wrappers
+    set_config('WRAP_USING_WRAPPER_CLASS', True)
+
+    #
+    module, info_s = _trace(tmp_path)
+
+    # Get the method's wrapper
+    wrapper = vars(module.Foo)['run']
+
+    #
+    assert isinstance(get_wrapped_obj(wrapper), type(lambda: None))
+
+    # Ensure accessing on instance gives bound method of the new call,
+    # skipping `CallWrapper.__call__`
+    foo = module.Foo()
+
+    method = foo.run
+
+    assert isinstance(method, MethodType)
+
+    assert not isinstance(method.__func__, CallWrapper)
+
+    assert method(1) == (foo, 1)
+
+    # Ensure accessing on class gives the wrapper
+    assert module.Foo.run is wrapper
+
+    assert module.Foo.run(foo, 2) == (foo, 2)
+
+    # Ensure both calls are traced
+    assert [
+        info['args'][1:] for info in info_s
+        if info['trace_hook_type'] == 'pre_call'
+    ] == [(1,), (2,)]
+
+
+def test_auto_disarm(tmp_path):
+    # Disarm wrappers called more than 100 times per 10ms
+    set_config('AUTO_DISARM_MAX_RATE', 100 / 0.01)
+
+    set_config('AUTO_DISARM_WINDOW', 0.01)
+
+    #
+    module, info_s = _trace(tmp_path)
+
+    # Get the child's URI
+    uri = module.__name__ + '.child'
+
+    # Call the child until it is disarmed
+    deadline = time.time() + 5
+
+    with capture_output() as message_s:
+        while uri not in get_auto_disarmed_uris() and \
+                time.time() < deadline:
+            module.child(0)
+
+    #
+    assert get_auto_disarmed_uris() == [uri]
+
+    assert message_s[-1].startswith('# Auto-disarmed ' + uri)
+
+    # Ensure the disarmed wrapper calls the function without tracing
+    info_count = len(info_s)
+
+    assert module.child(0) == 0
+
+    assert len(info_s) == info_count
+
+    # Ensure wrappers within budget are not disarmed
+    module.top(0)
+
+    assert len(info_s) == info_count + 2
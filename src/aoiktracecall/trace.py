@@ -2,22 +2,50 @@
 from __future__ import absolute_import
 
 # Standard imports
+import atexit
 from functools import partial
 import inspect
+import os
+import signal
 import sys
+import threading
+from timeit import default_timer
+import traceback
 from types import ModuleType
 
 # Internal imports
 from aoiktracecall.config import get_config
+from aoiktracecall.config import set_configs
 from aoiktracecall.importer import module_finder_factory
 from aoiktracecall.logging import print_debug
+from aoiktracecall.logging import print_error
 from aoiktracecall.logging import print_info
+from aoiktracecall.plugin.cache_plugin import create_cached_filter
+from aoiktracecall.plugin.cache_plugin import get_specs_hash
+from aoiktracecall.plugin.collapse_plugin import create_collapse_handler
 from aoiktracecall.plugin.exception_plugin import reject_exception
+from aoiktracecall.plugin.generator_plugin import generator_filter
+from aoiktracecall.plugin.handler_plugin import check_spec_handlers
+from aoiktracecall.plugin.handler_plugin import create_dispatch_handler
+from aoiktracecall.plugin.handler_plugin import handler_filter
+from aoiktracecall.plugin.handler_plugin import HANDLER_PRINT
+from aoiktracecall.plugin.limit_plugin import limit_filter
 from aoiktracecall.plugin.printing_plugin import printing_filter
 from aoiktracecall.plugin.printing_plugin import printing_handler
 from aoiktracecall.plugin.showhide_plugin import showhide_filter
 from aoiktracecall.plugin.showhide_plugin import showhide_handler
+from aoiktracecall.plugin.showhide_plugin import showhide_specializer
+from aoiktracecall.plugin.showhide_plugin import specs_use_hide_stack
+from aoiktracecall.plugin.spec_stats_plugin import format_spec_stats_report
+from aoiktracecall.plugin.spec_stats_plugin import spec_stats_filter
+from aoiktracecall.plugin.spec_stats_plugin import spec_stats_handler
+from aoiktracecall.plugin.spec_stats_plugin import spec_stats_specializer
+from aoiktracecall.plugin.threshold_plugin import specs_have_threshold
+from aoiktracecall.plugin.threshold_plugin import threshold_filter
+from aoiktracecall.plugin.threshold_plugin import threshold_handler
+from aoiktracecall.spec import find_matched_spec_info
 from aoiktracecall.spec import parse_specs
+from aoiktracecall.specfile import load_spec_file
 from aoiktracecall.state import call_existwrap_get
 from aoiktracecall.state import call_existwrap_set
 from aoiktracecall.state import class_existwrap_get
@@ -32,7 +60,12 @@ from aoiktracecall.state import module_failload_set
 from aoiktracecall.state import module_postload_set
 from aoiktracecall.state import module_preload_set
 from aoiktracecall.util import chain_filters
+from aoiktracecall.util import compile_handlers
+from aoiktracecall.util import set_specializer
+from aoiktracecall.util import specialize_handler
 from aoiktracecall.util import format_func_name
+from aoiktracecall.wrap import apply_wrap_plan
+from aoiktracecall.wrap import rewrap
 from aoiktracecall.wrap import wrap_call
 from aoiktracecall.wrap import wrap_class_attrs
 from aoiktracecall.wrap import wrap_module_attrs
@@ -222,6 +255,198 @@ def trace_calls_in_obj(
         )
 
 
+# Packages excluded from the default module list of `trace_calls_in_modules`.
+# Tracing them would trace the tracer itself, e.g. `logging` used to print
+# trace messages.
+_TRACER_PACKAGE_NAMES = ('aoiktracecall', 'logging')
+
+
+def _is_tracer_module_name(module_name):
+    # Return whether the module is one of the tracer packages or in one of them
+    return any(
+        module_name == package_name or
+        module_name.startswith(package_name + '.')
+        for package_name in _TRACER_PACKAGE_NAMES
+    )
+
+
+def trace_calls_in_modules(
+    modules=None,
+    filter=None,
+    handler=None,
+    module_existwrap=None,
+    class_existwrap=None,
+    call_existwrap=None,
+    progress=None,
+):
+    """
+    Trace callables in given already-loaded modules.
+
+    This is useful when tracing is enabled after many modules have been
+    imported. The work is done in two phases. In the analysis phase, each
+    module's classes and callables are walked and filtered in the calling
+    thread. In the apply phase, wrappers are created and set as attributes
+    while holding a lock, so the window in which the modules are partially
+    wrapped is short.
+
+    :param modules: Module list. Default is all modules in `sys.modules` \
+        except `__main__`, and modules of `aoiktracecall` and of packages it \
+        calls when handling events, e.g. `logging`.
+
+    :param filter: Filter function. Default is use global one.
+
+    :param handler: Handler function. Default is use global one.
+
+    :param module_existwrap: Module exist-wrapper callback. Default is use \
+        global one.
+
+    :param class_existwrap: Class exist-wrapper callback. Default is use \
+        global one.
+
+    :param call_existwrap: Function exist-wrapper callback. Default is use \
+        global one.
+
+    :param progress: Progress callback. Called with done module count, total \
+        module count and module name after each module is analysed.
+
+    :return: Report dict with keys `module_count`, `wrapped_count`, \
+        `analysis_time`, `apply_time` and `modules`. `modules` is a list of \
+        dicts with keys `module_name`, `plan_count` and `analysis_time`.
+    """
+    # If module list is not given
+    if modules is None:
+        # Use all loaded modules
+        modules = [
+            module for module_name, module in sorted(sys.modules.items())
+            # Module can be None in Python 2
+            if module is not None and module_name != '__main__' and
+            not _is_tracer_module_name(module_name)
+        ]
+    else:
+        # Ensure is list
+        modules = list(modules)
+
+    # If filter function is not given
+    if filter is None:
+        # Use global one
+        filter = filter_get()
+
+    # If handler function is not given
+    if handler is None:
+        # Use global one
+        handler = handler_get()
+
+    # If module exist-wrapper callback is not given
+    if module_existwrap is None:
+        # Use global one
+        module_existwrap = module_existwrap_get()
+
+    # If class exist-wrapper callback is not given
+    if class_existwrap is None:
+        # Use global one
+        class_existwrap = class_existwrap_get()
+
+    # If function exist-wrapper callback is not given
+    if call_existwrap is None:
+        # Use global one
+        call_existwrap = call_existwrap_get()
+
+    # Module count
+    module_count = len(modules)
+
+    # Create analysis function
+    def analyse_module(done_count, module):
+        # Start time
+        start_time = default_timer()
+
+        # Plan item list
+        wrap_plan = []
+
+        # Walk and filter the module's attributes
+        wrap_module_attrs(
+            module=module,
+            filter=filter,
+            handler=handler,
+            module_existwrap=module_existwrap,
+            class_existwrap=class_existwrap,
+            call_existwrap=call_existwrap,
+            wrap_plan=wrap_plan,
+        )
+
+        # Get analysis time
+        analysis_time = default_timer() - start_time
+
+        # If have progress callback
+        if progress is not None:
+            # Call progress callback
+            progress(done_count, module_count, module.__name__)
+
+        # Return module's plan and analysis time
+        return wrap_plan, analysis_time
+
+    # Analysis start time
+    analysis_start_time = default_timer()
+
+    # Analyse modules in calling thread.
+    # Not use threads since the work is pure Python code holding the GIL.
+    result_s = [
+        analyse_module(done_count, module)
+        for done_count, module in enumerate(modules, 1)
+    ]
+
+    # Get analysis time
+    analysis_time = default_timer() - analysis_start_time
+
+    # Plan item list of all modules
+    wrap_plan = []
+
+    # Module report list
+    module_report_s = []
+
+    # For each module's analysis result
+    for module, (module_wrap_plan, module_analysis_time) in zip(
+        modules, result_s
+    ):
+        # Add the module's plan items
+        wrap_plan.extend(module_wrap_plan)
+
+        # Add module report
+        module_report_s.append({
+            'module_name': module.__name__,
+            'plan_count': len(module_wrap_plan),
+            'analysis_time': module_analysis_time,
+        })
+
+    # Apply start time
+    apply_start_time = default_timer()
+
+    # Create wrappers and set wrapper attributes
+    wrapped_count = apply_wrap_plan(wrap_plan, handler=handler)
+
+    # Get apply time
+    apply_time = default_timer() - apply_start_time
+
+    # Get report
+    report = {
+        'module_count': module_count,
+        'wrapped_count': wrapped_count,
+        'analysis_time': analysis_time,
+        'apply_time': apply_time,
+        'modules': module_report_s,
+    }
+
+    # Get message
+    msg = (
+        '# Traced {} modules: {} wrappers, analysis {:.3f}s, apply {:.3f}s'
+    ).format(module_count, wrapped_count, analysis_time, apply_time)
+
+    # Print message
+    print_debug(msg)
+
+    # Return report
+    return report
+
+
 def trace_calls_in_this_module():
     """
     Trace callables in caller's module.
@@ -248,17 +473,236 @@ def trace_calls_in_this_module():
     trace_calls_in_obj(func_module)
 
 
+# Arguments and functions of the latest `trace_calls_in_specs` or
+# `reload_specs` call
+_TRACE_CONTEXT = {}
+
+
+def _current_trace_filter(info):
+    # Delegate call to the current trace filter
+    return _TRACE_CONTEXT['trace_filter'](info)
+
+
+def _current_trace_handler(info):
+    # Delegate call to the current trace handler
+    return _TRACE_CONTEXT['trace_handler'](info)
+
+
+def _specialize_current_trace_handler(info):
+    # Specialize the current trace handler
+    return specialize_handler(_TRACE_CONTEXT['trace_handler'], info)
+
+
+# Whether `_print_spec_stats_report` is registered to run at process exit.
+# Use list to be changed in functions.
+_SPEC_STATS_REPORT_REGISTERED = [False]
+
+
+def _print_spec_stats_report():
+    # Print spec stats report for the specs in use
+    if _TRACE_CONTEXT:
+        print_info(
+            format_spec_stats_report(
+                _TRACE_CONTEXT['parsed_specs'],
+                top_count=get_config('SPEC_STATS_REPORT_TOP_COUNT'),
+            ),
+            indent=False,
+        )
+
+
+# Wrappers created after `reload_specs` get the current trace handler's
+# specialization
+set_specializer(_current_trace_handler, _specialize_current_trace_handler)
+
+
+def _create_trace_funcs(
+    parsed_specs,
+    printing_handler_filter_func=None,
+    handlers=None,
+    use_cache=True,
+):
+    # Return trace filter and trace handler for given parsed specs.
+    # `use_cache` is whether use config `WRAP_DECISION_CACHE_PATH`.
+
+    # Copy handlers dict to add `print` handler later
+    handlers = dict(handlers or {})
+
+    # Add name of `print` handler to be defined later
+    handlers.setdefault(HANDLER_PRINT, None)
+
+    # Check handler names used by the specs are defined
+    check_spec_handlers(parsed_specs, handlers)
+
+    # Create filter function
+    def showhide_filter_wrapper(info):
+        # Get info type.
+        # Allowed values: 'module', 'class', 'class_attr', 'callable'.
+        info_type = info['info_type']
+
+        # Get onwrap URI
+        onwrap_uri = info['onwrap_uri']
+
+        # Get origin URI
+        origin_uri = info.get('origin_uri', None)
+
+        # Get origin attribute URI
+        origin_attr_uri = info.get('origin_attr_uri', None)
+
+        # If info type is `class_attr`
+        if info_type == 'class_attr':
+            # If origin attribute URI and onwrap URI are different
+            if origin_attr_uri and (origin_attr_uri != onwrap_uri):
+                # If config `WRAP_BASE_CLASS_ATTRIBUTES` is disabled
+                if not get_config('WRAP_BASE_CLASS_ATTRIBUTES'):
+                    # Get message
+                    msg = '!: {0} == {1}\n'.format(onwrap_uri, origin_attr_uri)
+
+                    # Print message
+                    print_debug(msg)
+
+                    # Return False to not trace the item
+                    return False
+
+        # If info type is not `class_attr`
+        else:
+            # If origin URI and onwrap URI are different
+            if origin_uri and (origin_uri != onwrap_uri):
+                # Get message
+                msg = '!: {0} == {1}\n'.format(onwrap_uri, origin_uri)
+
+                # Print message
+                print_debug(msg)
+
+                # Return False to not trace the item
+                return False
+
+        # Delegate call to `showhide_filter`
+        info = showhide_filter(info=info, parsed_specs=parsed_specs)
+
+        # Get message
+        msg = '{0}: {1}\n'.format(
+            '@' if isinstance(info, dict) else '!',
+            onwrap_uri if (onwrap_uri == origin_uri or not origin_uri) else
+            '{} == {}'.format(onwrap_uri, origin_uri)
+        )
+
+        # Print message
+        print_debug(msg)
+
+        # Return info dict
+        return info
+
+    # Create trace filter
+    trace_filter = chain_filters([
+        reject_exception,
+        showhide_filter_wrapper,
+        partial(printing_filter, parsed_specs=parsed_specs),
+        partial(generator_filter, parsed_specs=parsed_specs),
+        partial(threshold_filter, parsed_specs=parsed_specs),
+        partial(limit_filter, parsed_specs=parsed_specs),
+        partial(handler_filter, parsed_specs=parsed_specs),
+    ])
+
+    # Get wrap decision cache file path
+    cache_path = get_config('WRAP_DECISION_CACHE_PATH')
+
+    # If wrap decision cache is enabled
+    if cache_path and use_cache:
+        # Get specs hash.
+        # Config values affecting filtering are part of the hash.
+        specs_hash = get_specs_hash(
+            parsed_specs,
+            extra=tuple(get_config(key) for key in (
+                'WRAP_BASE_CLASS_ATTRIBUTES',
+                'LATENCY_THRESHOLD_MS',
+                'TRACE_MAX_DEPTH',
+                'TRACE_MAX_CHILDREN',
+                'TRACE_MAX_RATE',
+                'DEFAULT_HANDLERS',
+            )),
+        )
+
+        # Wrap trace filter with cached filter
+        trace_filter = create_cached_filter(
+            trace_filter,
+            file_path=cache_path,
+            specs_hash=specs_hash,
+        )
+
+    # Whether collect spec stats
+    need_spec_stats = get_config('SPEC_STATS')
+
+    # If need collect spec stats
+    if need_spec_stats:
+        # Count spec matches before the cached filter so that objects whose
+        # decisions are cached are counted too
+        trace_filter = chain_filters([
+            partial(spec_stats_filter, parsed_specs=parsed_specs),
+            trace_filter,
+        ])
+
+    # Create printing handler
+    output_handler = partial(
+        printing_handler,
+        filter_func=printing_handler_filter_func,
+    )
+
+    # If need collapse repeated calls
+    if get_config('PRINTING_COLLAPSE_REPEATS'):
+        # Print repeated calls as summary lines
+        output_handler = create_collapse_handler(output_handler)
+
+    # If latency threshold is used
+    if specs_have_threshold(parsed_specs):
+        # Print only calls slower than their thresholds
+        output_handler = partial(threshold_handler, handler=output_handler)
+
+    # If `print` handler is not given
+    if handlers[HANDLER_PRINT] is None:
+        # Use the printing handler
+        handlers[HANDLER_PRINT] = output_handler
+
+    # Create trace handler.
+    # It is specialized for each wrapped function at wrap time, e.g. calls
+    # always shown skip `showhide_handler`, and each function calls only the
+    # handlers selected by its spec.
+    trace_handler = compile_handlers(([
+        # Count calls per spec before hidden calls are stopped by
+        # `showhide_handler`. Calls skipped by `wrap._skip_pre_call` are
+        # counted by `spec_stats_skip_hook`.
+        set_specializer(spec_stats_handler, spec_stats_specializer),
+    ] if need_spec_stats else []) + [
+        set_specializer(showhide_handler, partial(
+            showhide_specializer,
+            use_hide_stack=specs_use_hide_stack(parsed_specs),
+        )),
+        create_dispatch_handler(handlers),
+    ])
+
+    #
+    return trace_filter, trace_handler
+
+
 def trace_calls_in_specs(
     specs,
     printing_handler_filter_func=None,
+    handlers=None,
 ):
     """
     Trace callables according to given specs.
 
+    A spec dict can select the handlers its callables' events are passed to
+    by key `handlers`, a handler name or list of handler names. Default is
+    config `DEFAULT_HANDLERS`. Handler `print` prints the events. Other
+    names are looked up in given handlers dict and handlers registered with
+    `handler_plugin.register_handler`, e.g. `stats` and `count`.
+
     :param specs: Specs.
 
     :param printing_handler_filter_func: `printing_handler`'s filter function.
 
+    :param handlers: Dict mapping handler name to handler function.
+
     :return: None.
     """
     # Get message
@@ -346,97 +790,320 @@ def trace_calls_in_specs(
                 # Print message
                 print_debug(msg)
 
-    # Create filter function
-    def showhide_filter_wrapper(info):
-        # Get info type.
-        # Allowed values: 'module', 'class', 'class_attr', 'callable'.
-        info_type = info['info_type']
+    # Create trace filter and trace handler
+    trace_filter, trace_handler = _create_trace_funcs(
+        parsed_specs,
+        printing_handler_filter_func=printing_handler_filter_func,
+        handlers=handlers,
+    )
 
-        # Get onwrap URI
-        onwrap_uri = info['onwrap_uri']
+    # Store arguments and functions for `reload_specs`
+    _TRACE_CONTEXT.update(
+        parsed_specs=parsed_specs,
+        printing_handler_filter_func=printing_handler_filter_func,
+        handlers=handlers,
+        trace_filter=trace_filter,
+        trace_handler=trace_handler,
+    )
 
-        # Get origin URI
-        origin_uri = info.get('origin_uri', None)
+    # If need collect spec stats, and the report is not registered yet
+    if get_config('SPEC_STATS') and not _SPEC_STATS_REPORT_REGISTERED[0]:
+        # Print spec stats report at process exit, for the specs in use then
+        atexit.register(_print_spec_stats_report)
 
-        # Get origin attribute URI
-        origin_attr_uri = info.get('origin_attr_uri', None)
+        #
+        _SPEC_STATS_REPORT_REGISTERED[0] = True
 
-        # If info type is `class_attr`
-        if info_type == 'class_attr':
-            # If origin attribute URI and onwrap URI are different
-            if origin_attr_uri and (origin_attr_uri != onwrap_uri):
-                # If config `WRAP_BASE_CLASS_ATTRIBUTES` is disabled
-                if not get_config('WRAP_BASE_CLASS_ATTRIBUTES'):
-                    # Get message
-                    msg = '!: {0} == {1}\n'.format(onwrap_uri, origin_attr_uri)
+    # Create and hook module finder for tracing callables
+    # The module finder uses delegating functions so that modules imported
+    # after `reload_specs` use the reloaded specs.
+    create_and_hook_module_finder(
+        trace_filter=_current_trace_filter,
+        trace_handler=_current_trace_handler,
+        module_preload=module_preload,
+        module_postload=module_postload,
+        module_failload=module_failload,
+        module_existwrap=existwrap,
+        class_existwrap=existwrap,
+        call_existwrap=existwrap,
+    )
 
-                    # Print message
-                    print_debug(msg)
+    # Set global filter and handler functions to the current ones, e.g. for
+    # `trace_calls_in_obj` and accessing the cached filter's cache
+    filter_set(trace_filter)
 
-                    # Return False to not trace the item
-                    return False
+    handler_set(trace_handler)
 
-        # If info type is not `class_attr`
-        else:
-            # If origin URI and onwrap URI are different
-            if origin_uri and (origin_uri != onwrap_uri):
-                # Get message
-                msg = '!: {0} == {1}\n'.format(onwrap_uri, origin_uri)
+    # Get message
+    msg = format_func_name(
+        '- trace_calls_in_specs', level_step_after=-1, figlet=True
+    )
 
-                # Print message
-                print_debug(msg)
+    # Print message
+    print_debug(msg, indent=False)
 
-                # Return False to not trace the item
-                return False
 
-        # Delegate call to `showhide_filter`
-        info = showhide_filter(info=info, parsed_specs=parsed_specs)
+def trace_calls_in_spec_file(
+    file_path,
+    env=None,
+    printing_handler_filter_func=None,
+    handlers=None,
+):
+    """
+    Trace callables according to specs in given spec file.
 
-        # Get message
-        msg = '{0}: {1}\n'.format(
-            '@' if isinstance(info, dict) else '!',
-            onwrap_uri if (onwrap_uri == origin_uri or not origin_uri) else
-            '{} == {}'.format(onwrap_uri, origin_uri)
-        )
+    The spec file's config items are set before tracing. See module
+    `specfile` for the spec file format.
 
-        # Print message
-        print_debug(msg)
+    :param file_path: Spec file path.
 
-        # Return info dict
-        return info
+    :param env: Environment name whose overrides are applied. Default is \
+        environment variable `AOIKTRACECALL_ENV`.
 
-    # Create trace filter
-    trace_filter = chain_filters([
-        reject_exception,
-        showhide_filter_wrapper,
-        partial(printing_filter, parsed_specs=parsed_specs),
-    ])
+    :param printing_handler_filter_func: `printing_handler`'s filter function.
 
-    # Create trace handler
-    trace_handler = chain_filters([
-        showhide_handler,
-        partial(
-            printing_handler,
-            filter_func=printing_handler_filter_func,
-        ),
-    ])
+    :param handlers: Dict mapping handler name to handler function.
 
-    # Create and hook module finder for tracing callables
-    create_and_hook_module_finder(
+    :return: None.
+    """
+    # Load spec file
+    result = load_spec_file(file_path, env=env)
+
+    # Set config items
+    set_configs(result['config'])
+
+    # Delegate call to `trace_calls_in_specs`
+    trace_calls_in_specs(
+        result['specs'],
+        printing_handler_filter_func=printing_handler_filter_func,
+        handlers=handlers,
+    )
+
+
+def reload_specs(specs, full=False):
+    """
+    Replace the specs used by `trace_calls_in_specs` without restarting.
+
+    Wrapped callables are filtered again and their wrappers updated in
+    place, e.g. showhide and highlight options. Callables no longer matched
+    are disarmed. Objects newly matched are wrapped if config
+    `WRAP_RECORD_CANDIDATES` was enabled when they were rejected. Modules
+    imported later use the new specs.
+
+    Only objects whose first matching spec differs between the old and new
+    specs are filtered again, unless `full` is true.
+
+    :param specs: New specs.
+
+    :param full: Whether filter all objects again, e.g. after configs used \
+        by filters are changed.
+
+    :return: Dict of object counts, see `wrap.rewrap`.
+    """
+    # If `trace_calls_in_specs` is not called
+    if not _TRACE_CONTEXT:
+        raise ValueError('`trace_calls_in_specs` is not called.')
+
+    # Get old parsed specs
+    old_parsed_specs = _TRACE_CONTEXT['parsed_specs']
+
+    # Parse new specs
+    parsed_specs = parse_specs(specs)
+
+    # Create trace filter and trace handler.
+    # Wrap decision cache is not used since it is keyed by the specs used at
+    # startup.
+    trace_filter, trace_handler = _create_trace_funcs(
+        parsed_specs,
+        printing_handler_filter_func=_TRACE_CONTEXT[
+            'printing_handler_filter_func'
+        ],
+        handlers=_TRACE_CONTEXT['handlers'],
+        use_cache=False,
+    )
+
+    # If the specs change how the trace handler works for all calls
+    if any(
+        get_value(old_parsed_specs) != get_value(parsed_specs)
+        for get_value in (specs_use_hide_stack, specs_have_threshold)
+    ):
+        # Need filter all objects again
+        full = True
+
+    # If need filter all objects again
+    if full:
+        is_changed = None
+    else:
+        # Create function telling whether an object's first matching spec
+        # is changed
+        def is_changed(info):
+            return find_matched_spec_info(info, old_parsed_specs) != \
+                find_matched_spec_info(info, parsed_specs)
+
+    # Use new specs for modules imported from now on
+    _TRACE_CONTEXT.update(
+        parsed_specs=parsed_specs,
         trace_filter=trace_filter,
         trace_handler=trace_handler,
-        module_preload=module_preload,
-        module_postload=module_postload,
-        module_failload=module_failload,
-        module_existwrap=existwrap,
-        class_existwrap=existwrap,
-        call_existwrap=existwrap,
     )
 
-    # Get message
-    msg = format_func_name(
-        '- trace_calls_in_specs', level_step_after=-1, figlet=True
-    )
+    # Set global filter and handler functions
+    filter_set(trace_filter)
+
+    handler_set(trace_handler)
+
+    # Apply new specs to existing objects
+    count_s = rewrap(trace_filter, trace_handler, is_changed=is_changed)
 
     # Print message
-    print_debug(msg, indent=False)
+    print_debug('# Reloaded specs: {}'.format(
+        ', '.join('{}={}'.format(k, v) for k, v in sorted(count_s.items()))
+    ))
+
+    #
+    return count_s
+
+
+def reload_spec_file(file_path, env=None):
+    """
+    Replace the specs used by `trace_calls_in_specs` with specs in given \
+        spec file, see `reload_specs`.
+
+    The spec file's config items are set before reloading.
+
+    :param file_path: Spec file path.
+
+    :param env: Environment name, see `specfile.load_spec_file`.
+
+    :return: Dict of object counts, see `wrap.rewrap`.
+    """
+    # Load spec file
+    result = load_spec_file(file_path, env=env)
+
+    # Get config items
+    config_dict = result['config']
+
+    # Whether configs are changed
+    config_changed = any(
+        get_config(key) != value for key, value in config_dict.items()
+    )
+
+    # Set config items
+    set_configs(config_dict)
+
+    # Reload specs.
+    # Changed configs may change filter results so filter all objects again.
+    return reload_specs(result['specs'], full=config_changed)
+
+
+def _reload_spec_file_safely(file_path, env):
+    #
+    try:
+        # Reload spec file
+        reload_spec_file(file_path, env=env)
+    except Exception:
+        # Get message
+        msg = '# Error when reloading spec file:\n---\n{}---\n'.format(
+            traceback.format_exc()
+        )
+
+        # Print message
+        print_error(msg)
+
+
+def watch_spec_file(file_path, env=None, interval=1):
+    """
+    Start a daemon thread that reloads given spec file when its \
+        modification time changes, see `reload_spec_file`.
+
+    :param file_path: Spec file path.
+
+    :param env: Environment name, see `specfile.load_spec_file`.
+
+    :param interval: Polling interval in seconds.
+
+    :return: Event object. Set it to stop watching.
+    """
+    # Create stop event
+    stop_event = threading.Event()
+
+    # Create function getting the file's modification time
+    def get_mtime():
+        try:
+            return os.stat(file_path).st_mtime
+        except OSError:
+            return None
+
+    # Create thread function
+    def watch():
+        # Get initial modification time
+        old_mtime = get_mtime()
+
+        # Until stopped
+        while not stop_event.wait(interval):
+            # Get modification time
+            mtime = get_mtime()
+
+            # If the file is changed
+            if mtime is not None and mtime != old_mtime:
+                #
+                old_mtime = mtime
+
+                # Reload the file
+                _reload_spec_file_safely(file_path, env)
+
+    # Create thread
+    thread = threading.Thread(target=watch, name='aoiktracecall-spec-watch')
+
+    # Not block process exit
+    thread.daemon = True
+
+    # Start thread
+    thread.start()
+
+    # Return stop event
+    return stop_event
+
+
+def install_spec_file_reload_signal(file_path, env=None, signum=None):
+    """
+    Install signal handler that reloads given spec file, see \
+        `reload_spec_file`.
+
+    The reload runs in a new thread, not in the signal handler, since the
+    interrupted code may hold locks the reload needs.
+
+    :param file_path: Spec file path.
+
+    :param env: Environment name, see `specfile.load_spec_file`.
+
+    :param signum: Signal number. Default is `SIGHUP`.
+
+    :return: Previous signal handler.
+    """
+    # If signal number is not given
+    if signum is None:
+        # Get `SIGHUP`, not available on Windows
+        signum = getattr(signal, 'SIGHUP', None)
+
+        #
+        if signum is None:
+            raise ValueError('`SIGHUP` is not available.')
+
+    # Create signal handler
+    def reload_handler(signum, frame):
+        # Create thread
+        thread = threading.Thread(
+            target=_reload_spec_file_safely,
+            args=(file_path, env),
+            name='aoiktracecall-spec-reload',
+        )
+
+        # Not block process exit
+        thread.daemon = True
+
+        # Start thread
+        thread.start()
+
+    # Install signal handler
+    return signal.signal(signum, reload_handler)
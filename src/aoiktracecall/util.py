@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 
 # Standard imports
+from functools import partial
 import sys
 
 # Internal imports
@@ -205,6 +206,41 @@ def to_origin_uri(
     return obj_uri
 
 
+def copy_func_attrs(func, new_func, attr_names=None):
+    """
+    Copy function attributes, e.g. name, to another function.
+
+    Attributes missing in the source or read-only in the target are ignored.
+
+    :param func: Source function.
+
+    :param new_func: Target function.
+
+    :param attr_names: Attribute names. Default is `__module__`, `__name__`, \
+        `__qualname__` and `__doc__`.
+
+    :return: None.
+    """
+    # If attribute names are not given
+    if attr_names is None:
+        # Use default
+        attr_names = ('__module__', '__name__', '__qualname__', '__doc__')
+
+    # For each attribute name
+    for attr_name in attr_names:
+        #
+        try:
+            value = getattr(func, attr_name)
+        except AttributeError:
+            continue
+
+        #
+        try:
+            setattr(new_func, attr_name, value)
+        except (AttributeError, TypeError):
+            pass
+
+
 def chain_filters(filters):
     # Create combo filter
     def combo_filter(info):
@@ -225,6 +261,187 @@ def chain_filters(filters):
     return combo_filter
 
 
+def set_specializer(handler, specializer):
+    """
+    Set specializer function of given handler, used by `compile_handlers`.
+
+    :param handler: Handler function.
+
+    :param specializer: Function that takes a wrapped function's info dict \
+        at wrap time and returns the handler to use for the function's calls,
+        None if the handler can be skipped because it always returns the info
+        dict unchanged, or False if the handler always stops the chain.
+
+    :return: Handler function with specializer set.
+    """
+    # If the handler can not have attributes
+    if not hasattr(handler, '__dict__'):
+        # Wrap the handler
+        handler = partial(handler)
+
+    #
+    handler.specialize = specializer
+
+    #
+    return handler
+
+
+def _reject_handler(info):
+    # Return False to stop the handler chain
+    return False
+
+
+def _pass_handler(info):
+    # Return the info dict unchanged
+    return info
+
+
+def _specialize_handler_s(handler_s, info):
+    # Specialized handler list
+    new_handler_s = []
+
+    # For each handler
+    for handler in handler_s:
+        # Get specializer
+        specializer = getattr(handler, 'specialize', None)
+
+        # If the handler has specializer
+        if specializer is not None:
+            # Get specialized handler
+            handler = specializer(info)
+
+            # If the handler always stops the chain
+            if handler is False:
+                # Handlers after it are never called
+                return False
+
+            # If the handler can be skipped
+            if handler is None:
+                continue
+
+        #
+        new_handler_s.append(handler)
+
+    #
+    return new_handler_s
+
+
+def _create_handler_sequence(handler_s):
+    # Get handler count
+    handler_count = len(handler_s)
+
+    # If no handler applies
+    if handler_count == 0:
+        return _pass_handler
+
+    # If one handler applies
+    if handler_count == 1:
+        # Use the handler directly
+        return handler_s[0]
+
+    # If two handlers apply
+    if handler_count == 2:
+        # Get handlers
+        handler_1, handler_2 = handler_s
+
+        # Create handler calling the two handlers without looping
+        def handler_sequence(info):
+            #
+            info = handler_1(info)
+
+            #
+            if not isinstance(info, dict):
+                return False
+
+            #
+            info = handler_2(info)
+
+            #
+            if not isinstance(info, dict):
+                return False
+
+            #
+            return info
+
+        #
+        return handler_sequence
+
+    # If more handlers apply
+    return chain_filters(handler_s)
+
+
+def compile_handlers(handlers):
+    """
+    Create handler that calls given handlers like `chain_filters`, and that \
+        can be specialized for each wrapped function at wrap time.
+
+    The created handler has a `specialize` method that takes a wrapped
+    function's info dict and returns a handler calling only the handlers that
+    apply to the function, see `set_specializer`.
+
+    :param handlers: Handler list.
+
+    :return: Handler function.
+    """
+    # Get handler list
+    handler_s = list(handlers)
+
+    # Create handler for calls not specialized
+    handler = chain_filters(handler_s)
+
+    # Create specializer
+    def specialize(info):
+        # Get handlers that apply
+        new_handler_s = _specialize_handler_s(handler_s, info)
+
+        # If the handlers always stop
+        if new_handler_s is False:
+            #
+            return _reject_handler
+
+        # Create call sequence of the handlers that apply
+        return _create_handler_sequence(new_handler_s)
+
+    # Set specializer
+    handler.specialize = specialize
+
+    # Return handler
+    return handler
+
+
+def specialize_handler(handler, info):
+    """
+    Get handler specialized for given wrapped function's info dict.
+
+    :param handler: Handler function.
+
+    :param info: Info dict.
+
+    :return: Specialized handler if the handler has specializer, otherwise \
+        the handler itself.
+    """
+    # Get specializer
+    specializer = getattr(handler, 'specialize', None)
+
+    # If the handler has no specializer
+    if specializer is None:
+        return handler
+
+    # Get specialized handler
+    new_handler = specializer(info)
+
+    # If the handler always stops the chain
+    if new_handler is False:
+        return _reject_handler
+
+    # If the handler can be skipped
+    if new_handler is None:
+        return _pass_handler
+
+    # Return specialized handler
+    return new_handler
+
+
 def indent_text(text, indent):
     new_part_s = []
     for line in text.split('\n'):
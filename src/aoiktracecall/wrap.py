@@ -2,10 +2,14 @@
 from __future__ import absolute_import
 
 # Standard imports
+from collections import OrderedDict
 from functools import partial
 import inspect
 from pprint import pformat
 import sys
+import threading
+import time
+from timeit import default_timer
 import traceback
 from types import FunctionType
 from types import MethodType
@@ -15,106 +19,152 @@ from aoiktracecall.config import get_config
 from aoiktracecall.logging import print_debug
 from aoiktracecall.logging import print_error
 from aoiktracecall.logging import print_info
+from aoiktracecall.state import child_time_get
+from aoiktracecall.state import child_time_set
 from aoiktracecall.state import count_add
+from aoiktracecall.state import get_timestamp
+from aoiktracecall.state import last_exception_get
+from aoiktracecall.state import last_exception_set
 from aoiktracecall.state import level_add
 from aoiktracecall.state import level_set
+from aoiktracecall.state import limit_stack_get
+from aoiktracecall.state import limit_stack_set
+from aoiktracecall.state import showhide_bits_get
+from aoiktracecall.util import copy_func_attrs
 from aoiktracecall.util import format_info_dict_uris
+from aoiktracecall.util import specialize_handler
 from aoiktracecall.util import to_origin_uri
 from aoiktracecall.util import to_uri
+from aoiktracecall.wrap_signature import create_signature_wrapper
+
+
+try:
+    # Python 3.5+
+    from aoiktracecall.wrap_async import create_coroutine_wrapper
+except (ImportError, SyntaxError):
+    # Python 2
+    create_coroutine_wrapper = None
+
+
+try:
+    # Python 3.6+
+    from aoiktracecall.wrap_async import TracedAsyncGenerator
+except (ImportError, SyntaxError):
+    # Python 2 and Python 3.5
+    TracedAsyncGenerator = None
 
 
 IS_PY2 = sys.version_info[0] == 2
 
 
+# Thread CPU time function, in Python 3.7+
+_THREAD_TIME = getattr(time, 'thread_time', None)
+
+
 _OLD_CALL_ATTR_NAME = '__old_call_0123456789__'
 
 _NEW_CALL_ATTR_NAME = '__new_call_0123456789__'
 
+# Attribute name of `__init__` hook's state holder, see `_wrap_class_in_place`
+_HOOK_STATE_ATTR_NAME = '__hook_state_0123456789__'
+
 _METHOD_DESCRIPTOR_TYPE = type(dict.__getitem__)
 
 _WRAPPER_DESCRIPTOR_TYPE = type(dict.__setitem__)
 
 
+# Binding modes of `CallWrapper.__get__`.
+# Not bind, e.g. for classes.
+_BIND_NONE = 0
+
+# Bind the wrapper
+_BIND_WRAPPER = 1
+
+# Bind the new call, which is a plain function, so that calling the bound
+# method skips `CallWrapper.__call__`
+_BIND_NEW_CALL = 2
+
+
 class CallWrapper(object):
 
+    __slots__ = (_OLD_CALL_ATTR_NAME, _NEW_CALL_ATTR_NAME, '_bind_mode')
+
     def __init__(self, old_call, new_call):
         object.__setattr__(self, _OLD_CALL_ATTR_NAME, old_call)
 
         object.__setattr__(self, _NEW_CALL_ATTR_NAME, new_call)
 
-    def __call__(self, *args, **kwargs):
-        new_call = object.__getattribute__(self, _NEW_CALL_ATTR_NAME)
+        # Decide binding mode once instead of on each attribute access
+        if not isinstance(
+                old_call, (
+                    FunctionType,
+                    MethodType,
+                    _METHOD_DESCRIPTOR_TYPE,
+                    _WRAPPER_DESCRIPTOR_TYPE)):
+            bind_mode = _BIND_NONE
+        elif isinstance(new_call, FunctionType):
+            bind_mode = _BIND_NEW_CALL
+        else:
+            bind_mode = _BIND_WRAPPER
 
-        res = new_call(*args, **kwargs)
+        object.__setattr__(self, '_bind_mode', bind_mode)
 
-        return res
+    def __call__(self, *args, **kwargs):
+        return _get_new_call(self)(*args, **kwargs)
 
     def __getitem__(self, key):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return old_call.__getitem__(key)
+        return _get_old_call(self).__getitem__(key)
 
     def __setitem__(self, key, value):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return old_call.__setitem__(key, value)
+        return _get_old_call(self).__setitem__(key, value)
 
     def __getattribute__(self, name):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return old_call.__getattribute__(name)
+        return _get_old_call(self).__getattribute__(name)
 
     def __setattr__(self, name, value):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return old_call.__setattr__(name, value)
+        return _get_old_call(self).__setattr__(name, value)
 
     def __repr__(self):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return repr(old_call)
+        return repr(_get_old_call(self))
 
     def __str__(self):
-        old_call = object.__getattribute__(self, _OLD_CALL_ATTR_NAME)
-
-        return str(old_call)
+        return str(_get_old_call(self))
 
     def __get__(self, obj, cls=None):
-        old_call = object.__getattribute__(
-            self, _OLD_CALL_ATTR_NAME)
+        #
+        bind_mode = _get_bind_mode(self)
 
-        if isinstance(
-                old_call, (
-                    FunctionType,
-                    MethodType,
-                    _METHOD_DESCRIPTOR_TYPE,
-                    _WRAPPER_DESCRIPTOR_TYPE)):
-            is_func = True
+        #
+        if bind_mode == _BIND_NONE:
+            return self
+
+        #
+        if obj is None:
+            if IS_PY2:
+                return MethodType(self, None, cls)
+            else:
+                return self
+
+        #
+        if bind_mode == _BIND_NEW_CALL:
+            method_func = _get_new_call(self)
         else:
-            is_func = False
+            method_func = self
 
         #
-        if is_func:
-            if obj is None:
-                if IS_PY2:
-                    methodtype_args = (self, None, cls)
+        if IS_PY2:
+            return MethodType(method_func, obj, cls)
+        else:
+            return MethodType(method_func, obj)
 
-                    method = MethodType(*methodtype_args)
 
-                    return method
-                else:
-                    return self
-            else:
-                if IS_PY2:
-                    methodtype_args = (self, obj, cls)
-                else:
-                    methodtype_args = (self, obj)
+# Slot getters, which avoid attribute lookup by name through the overridden
+# `CallWrapper.__getattribute__`
+_get_old_call = vars(CallWrapper)[_OLD_CALL_ATTR_NAME].__get__
 
-                method = MethodType(*methodtype_args)
+_get_new_call = vars(CallWrapper)[_NEW_CALL_ATTR_NAME].__get__
 
-                return method
-        else:
-            return self
+_get_bind_mode = vars(CallWrapper)['_bind_mode'].__get__
 
 
 def get_wrapped_obj(wrapper, default=None):
@@ -134,7 +184,23 @@ def wrap_callable(old_call, new_call=None):
     else:
         object.__setattr__(new_call, _OLD_CALL_ATTR_NAME, old_call)
 
-        if get_config('WRAP_USING_WRAPPER_CLASS'):
+        # If the new call is plain function
+        if isinstance(new_call, FunctionType):
+            # Copy name, etc. so that the new call looks like the old call,
+            # including when it is bound as method by `CallWrapper.__get__`
+            copy_func_attrs(old_call, new_call)
+
+        #
+        using_wrapper_class = get_config('WRAP_USING_WRAPPER_CLASS')
+
+        # If use wrapper class only when the old call is not plain function
+        if using_wrapper_class == 'auto':
+            using_wrapper_class = not (
+                isinstance(old_call, FunctionType) and
+                isinstance(new_call, FunctionType)
+            )
+
+        if using_wrapper_class:
             return CallWrapper(old_call, new_call)
         else:
             return new_call
@@ -156,38 +222,1535 @@ def is_wrappable(obj):
 
 
 class ExceptionInfo(object):
-
-    def __init__(self, exc_info):
+    """
+    Exception raised by a traced call, used as the call's result.
+
+    Creating it is cheap. The traceback text is rendered only when the object
+    is converted to text, and is cached.
+
+    Attributes set by the wrapper:
+    - `uri`: URI of the call the exception propagated through.
+    - `level`: Level of the call.
+    - `raise_uri`: URI of the deepest traced call the exception propagated
+      through, i.e. where it was raised as far as tracing can tell.
+    - `raise_level`: Level of the raise call.
+    - `propagated`: Whether the exception propagated from a traced callee,
+      instead of being raised in the call itself.
+    """
+
+    def __init__(
+        self,
+        exc_info,
+        uri=None,
+        level=None,
+        raise_uri=None,
+        raise_level=None,
+        propagated=False,
+    ):
+        #
         self.exc_info = exc_info
 
+        #
+        self.uri = uri
+
+        #
+        self.level = level
+
+        #
+        self.raise_uri = raise_uri if raise_uri is not None else uri
+
+        #
+        self.raise_level = raise_level if raise_level is not None else level
+
+        #
+        self.propagated = propagated
+
+        # Cached traceback text
+        self._text = None
+
+    @property
+    def exc_type(self):
+        return self.exc_info[0]
+
+    @property
+    def exc_value(self):
+        return self.exc_info[1]
+
+    def format_short(self):
+        """
+        Format exception type and value to text, without traceback.
+
+        :return: Text.
+        """
+        # Get text
+        text = 'Exception: {}'.format(''.join(
+            traceback.format_exception_only(*self.exc_info[:2])
+        ).strip())
+
+        # If the exception propagated from a traced callee
+        if self.propagated:
+            # Add raise call info
+            text += ' (raised in {} at level {})'.format(
+                self.raise_uri, self.raise_level
+            )
+
+        # Return text
+        return text
+
     def __str__(self):
-        # Get message
-        message = 'Exception:\n---\n{}---\n'.format(
-            ''.join(traceback.format_exception(*self.exc_info)))
+        # If traceback text is not rendered
+        if self._text is None:
+            # Render traceback text
+            self._text = 'Exception:\n---\n{}---\n'.format(
+                ''.join(traceback.format_exception(*self.exc_info)))
 
         # Return message
-        return message
+        return self._text
 
     def __repr__(self):
         return self.__str__()
 
 
-#
-_MAP_MODULE_OR_CLASS_TO_WRAP_INFOS = {}
+# Map URI to list of count of exceptions raised in the URI's calls and count
+# of exceptions propagated through them from traced callees
+_EXCEPTION_COUNTS = {}
+
+
+def get_exception_counts():
+    """
+    Get per-URI exception counters.
+
+    :return: Dict mapping URI to dict with keys `raised` and `propagated`.
+    """
+    return dict(
+        (uri, {'raised': count_s[0], 'propagated': count_s[1]})
+        for uri, count_s in list(_EXCEPTION_COUNTS.items())
+    )
+
+
+def _handle_exception(info, level):
+    # Create exception info of the exception a wrapper is handling.
+    # Whether it propagated from a traced callee is found by comparing with
+    # the last exception seen in the call tree, without keeping a reference
+    # to the exception object.
+
+    # Get exception info
+    exc_info = sys.exc_info()
+
+    # Get exception value
+    exc_value = exc_info[1]
+
+    # Get URI
+    uri = info.get('onwrap_uri', None)
+
+    # Get last exception seen by a wrapper.
+    # Tuple of exception ID, exception type, level, raise level and raise URI.
+    last_exception = last_exception_get()
+
+    # If the exception is the one that propagated from a direct callee
+    if last_exception is not None and \
+            last_exception[0] == id(exc_value) and \
+            last_exception[1] is exc_info[0] and \
+            last_exception[2] == level + 1:
+        #
+        propagated = True
+
+        #
+        raise_level = last_exception[3]
+
+        raise_uri = last_exception[4]
+
+    # If the exception is raised in this call
+    else:
+        #
+        propagated = False
+
+        #
+        raise_level = level
+
+        raise_uri = uri
+
+    # Store last exception
+    last_exception_set(
+        (id(exc_value), exc_info[0], level, raise_level, raise_uri)
+    )
+
+    # Get counters of the URI
+    count_s = _EXCEPTION_COUNTS.get(uri, None)
+
+    #
+    if count_s is None:
+        count_s = _EXCEPTION_COUNTS.setdefault(uri, [0, 0])
+
+    # Update counters
+    count_s[1 if propagated else 0] += 1
+
+    # Return exception info
+    return ExceptionInfo(
+        exc_info,
+        uri=uri,
+        level=level,
+        raise_uri=raise_uri,
+        raise_level=raise_level,
+        propagated=propagated,
+    )
+
+
+#
+_MAP_MODULE_OR_CLASS_TO_WRAP_INFOS = {}
+
+
+#
+_MAP_CALLABLE_TO_WRAP_INFOS = {}
+
+
+# Lock held when setting wrapper attributes in `apply_wrap_plan` and `rewrap`
+_WRAP_LOCK = threading.RLock()
+
+
+# Info dict key of wrapper state
+INFO_K_WRAP_STATE = 'wrap_state'
+
+
+# Info dict key of wrapper flags, resolved from configs when the wrapper is
+# bound, see `_get_wrap_flags`
+INFO_K_WRAP_FLAGS = 'wrap_flags'
+
+
+# ----- Wrapper flags -----
+# Skip handler work of the call if it is below a call hiding calls below it,
+# see config `HIDDEN_SUBTREE_SHORT_CIRCUIT`
+_WRAP_FLAG_SKIP_WHEN_HIDDEN = 1
+
+# Update call count and level of skipped calls, see config
+# `HIDDEN_SUBTREE_COUNTING`
+_WRAP_FLAG_COUNT_HIDDEN = 2
+
+# Check call rate or overhead budget, see config `AUTO_DISARM_MAX_RATE`
+_WRAP_FLAG_CHECK_BUDGET = 4
+
+# Measure handler work time, see config `AUTO_DISARM_MAX_OVERHEAD`
+_WRAP_FLAG_MEASURE_OVERHEAD = 8
+
+# Print info dict's URIs, see config `WRAPPER_FUNC_DEBUG_INFO_DICT_URIS`
+_WRAP_FLAG_DEBUG_URIS = 16
+
+# Measure thread CPU time, see config `TRACE_CPU_TIME`
+_WRAP_FLAG_CPU_TIME = 32
+
+
+def _get_wrap_flags(info):
+    # Resolve configs the wrapper reads on each call into flags, so that a
+    # call checks bits instead of looking up configs. Changed configs apply
+    # to wrappers bound again, e.g. by `trace.reload_specs` with `full`.
+
+    #
+    flags = 0
+
+    # 5HSKP
+    # If the call is shown only if not below a call hiding calls below it
+    if info.get('skip_when_hidden', False) and \
+            get_config('HIDDEN_SUBTREE_SHORT_CIRCUIT'):
+        flags |= _WRAP_FLAG_SKIP_WHEN_HIDDEN
+
+    #
+    if get_config('HIDDEN_SUBTREE_COUNTING'):
+        flags |= _WRAP_FLAG_COUNT_HIDDEN
+
+    #
+    if get_config('AUTO_DISARM_MAX_RATE') or \
+            get_config('AUTO_DISARM_MAX_OVERHEAD'):
+        flags |= _WRAP_FLAG_CHECK_BUDGET
+
+    #
+    if get_config('AUTO_DISARM_MAX_OVERHEAD'):
+        flags |= _WRAP_FLAG_MEASURE_OVERHEAD
+
+    #
+    if get_config('WRAPPER_FUNC_DEBUG_INFO_DICT_URIS'):
+        flags |= _WRAP_FLAG_DEBUG_URIS
+
+    #
+    if _THREAD_TIME is not None and get_config('TRACE_CPU_TIME'):
+        flags |= _WRAP_FLAG_CPU_TIME
+
+    #
+    return flags
+
+
+# Info dict key of function called with the info dict when a call is skipped
+# because it is hidden, in which case handlers are not called, see
+# `_skip_pre_call`. Set by filters, e.g. `spec_stats_filter`.
+INFO_K_SKIP_HOOK = 'skip_hook'
+
+
+class WrapState(object):
+    # Mutable state of a wrapper, in info dict key `wrap_state`. The wrapper
+    # reads `binding` on each call, so `rewrap` can update or disarm it in
+    # place.
+
+    __slots__ = (
+        'binding',
+        'base_info',
+        'base_handler',
+        'window',
+        'window_start',
+        'window_calls',
+        'window_overhead',
+    )
+
+    def __init__(self, info, handler, base_info=None, base_handler=None):
+        # Set `binding`, tuple of info dict and handler, or None if disarmed,
+        # in which case the wrapper calls the wrapped function directly.
+        # Set `window`, seconds of measuring window, see config
+        # `AUTO_DISARM_WINDOW`.
+        self.bind(info, handler)
+
+        # Info dict before filtering, or None if not known
+        self.base_info = base_info
+
+        # Handler before specializing, used as circuit breaker key so that
+        # wrappers sharing a handler share its breakers
+        self.base_handler = base_handler
+
+        # Start time of the current measuring window, see config
+        # `AUTO_DISARM_WINDOW`
+        self.window_start = None
+
+        # Call count in the current measuring window
+        self.window_calls = 0
+
+        # Handler work time in the current measuring window
+        self.window_overhead = 0.0
+
+    def bind(self, info, handler):
+        # Set binding of given info dict and handler, resolving configs read
+        # on each call into the info dict's wrapper flags
+
+        #
+        info[INFO_K_WRAP_FLAGS] = _get_wrap_flags(info)
+
+        #
+        self.window = get_config('AUTO_DISARM_WINDOW')
+
+        #
+        self.binding = (info, handler)
+
+
+# Map URI of auto-disarmed wrapper to reason text, see config
+# `AUTO_DISARM_MAX_RATE`
+_AUTO_DISARMED_URIS = OrderedDict()
+
+
+def get_auto_disarmed_uris():
+    """
+    Get URIs of wrappers disarmed because of exceeding config \
+        `AUTO_DISARM_MAX_RATE` or `AUTO_DISARM_MAX_OVERHEAD`.
+
+    :return: List of URIs, in disarming order.
+    """
+    return list(_AUTO_DISARMED_URIS)
+
+
+def _check_disarm_budget(info, now):
+    # Get wrapper state
+    state = info.get(INFO_K_WRAP_STATE, None)
+
+    # If the wrapper has no state
+    if state is None:
+        return
+
+    # Counters are not locked so they are approximate when the function is
+    # called by multiple threads
+
+    # Get start time of measuring window
+    window_start = state.window_start
+
+    # If is the first call
+    if window_start is None:
+        # Start measuring window
+        state.window_start = now
+
+        state.window_calls = 1
+
+        #
+        return
+
+    #
+    state.window_calls += 1
+
+    # Get measured time
+    elapsed = now - window_start
+
+    # If the measuring window is not over
+    if elapsed < state.window:
+        return
+
+    # Get call rate
+    rate = state.window_calls / elapsed
+
+    # Get overhead ratio
+    overhead = state.window_overhead / elapsed
+
+    # Start next measuring window
+    state.window_start = now
+
+    state.window_calls = 0
+
+    state.window_overhead = 0.0
+
+    #
+    max_rate = get_config('AUTO_DISARM_MAX_RATE')
+
+    #
+    max_overhead = get_config('AUTO_DISARM_MAX_OVERHEAD')
+
+    # If the call rate exceeds the budget
+    if max_rate and rate > max_rate:
+        #
+        reason = '{:.0f} calls/s > {}'.format(rate, max_rate)
+
+    # If the overhead exceeds the budget
+    elif max_overhead and overhead > max_overhead:
+        #
+        reason = 'overhead {:.1%} > {:.1%}'.format(overhead, max_overhead)
+
+    #
+    else:
+        return
+
+    # If the wrapper is disarmed already, e.g. by another thread
+    if state.binding is None:
+        return
+
+    # Disarm the wrapper
+    state.binding = None
+
+    # Get URI
+    uri = info['onwrap_uri']
+
+    # Store URI
+    _AUTO_DISARMED_URIS[uri] = reason
+
+    # Print notice
+    print_info('# Auto-disarmed {}: {}'.format(uri, reason))
+
+
+# List of tuples of info dict before filtering and function taking filter
+# and handler that retries wrapping an object rejected by the filter, see
+# config `WRAP_RECORD_CANDIDATES`
+_WRAP_CANDIDATES = []
+
+
+def _add_wrap_candidate(base_info, retry):
+    # If need record objects rejected by the filter
+    if get_config('WRAP_RECORD_CANDIDATES'):
+        #
+        with _WRAP_LOCK:
+            _WRAP_CANDIDATES.append((base_info, retry))
+
+
+def get_wrap_candidate_count():
+    """
+    Get count of objects recorded as rejected by the filter, see config \
+        `WRAP_RECORD_CANDIDATES`.
+
+    :return: Count.
+    """
+    return len(_WRAP_CANDIDATES)
+
+
+#
+_default_filter = (lambda info: info)
+
+
+_default_handler = (lambda info: info)
+
+
+# Map tuple of hook name, exception type and URI to list of last report time
+# and count of errors not reported since then
+_HANDLER_ERROR_REPORTS = {}
+
+
+def _report_handler_error(info_dict, hook_name):
+    # Get exception type
+    exc_type = sys.exc_info()[0]
+
+    # Get report key
+    key = (hook_name, exc_type, info_dict.get('onwrap_uri', None))
+
+    # Get current time
+    now = get_timestamp()
+
+    # Get report state
+    report = _HANDLER_ERROR_REPORTS.get(key, None)
+
+    # If same error was reported within the interval
+    if report is not None and \
+            now - report[0] < get_config('HANDLER_ERROR_REPORT_INTERVAL'):
+        # Count the error without formatting traceback
+        report[1] += 1
+
+        # Return
+        return
+
+    # Get count of errors not reported since last report
+    unreported_count = report[1] if report is not None else 0
+
+    # Reset report state
+    _HANDLER_ERROR_REPORTS[key] = [now, 0]
+
+    #
+    error_msg = '# Error when calling {} handler:\n---\n{}---\n'.format(
+        hook_name,
+        traceback.format_exc(),
+    )
+
+    # If errors were not reported
+    if unreported_count:
+        #
+        error_msg += '# {} same errors not reported since last report.\n'\
+            .format(unreported_count)
+
+    #
+    print_error(error_msg)
+
+
+class _HandlerBreaker(object):
+    # Circuit breaker state of a handler, for a URI or globally
+
+    __slots__ = (
+        'failure_count',
+        'total_failure_count',
+        'skipped_count',
+        'open_count',
+        'open_until',
+    )
+
+    def __init__(self):
+        # Count of consecutive failures
+        self.failure_count = 0
+
+        # Count of all failures
+        self.total_failure_count = 0
+
+        # Count of calls skipped because the breaker is open
+        self.skipped_count = 0
+
+        # Count of times the breaker opened
+        self.open_count = 0
+
+        # Time until which the handler is disabled, or None if not disabled
+        self.open_until = None
+
+
+# Map tuple of handler and URI, or handler and None if breaker scope is
+# global, to `_HandlerBreaker` object.
+# Only handlers that have failed have an entry.
+_HANDLER_BREAKERS = {}
+
+
+def get_handler_breaker_counts():
+    """
+    Get counters of handler circuit breakers.
+
+    :return: Dict mapping tuple of handler name and URI, or handler name and \
+        None if breaker scope is global, to dict with keys `failures`
+        (consecutive failures), `total_failures`, `skipped`, `opened` and
+        `open`.
+    """
+    # Get current time
+    now = get_timestamp()
+
+    # Result dict
+    res = {}
+
+    #
+    for (handler, uri), breaker in list(_HANDLER_BREAKERS.items()):
+        #
+        handler_name = getattr(handler, '__name__', None) or repr(handler)
+
+        #
+        res[(handler_name, uri)] = {
+            'failures': breaker.failure_count,
+            'total_failures': breaker.total_failure_count,
+            'skipped': breaker.skipped_count,
+            'opened': breaker.open_count,
+            'open': breaker.open_until is not None and
+            now < breaker.open_until,
+        }
+
+    #
+    return res
+
+
+def _get_breaker_key(handler, info_dict):
+    # Get wrapper state
+    state = info_dict.get(INFO_K_WRAP_STATE, None)
+
+    # If the handler before specializing is known
+    if state is not None and state.base_handler is not None:
+        # Use it instead of the handler specialized for the function
+        handler = state.base_handler
+
+    # If breaker scope is global
+    if get_config('HANDLER_BREAKER_SCOPE') == 'global':
+        #
+        return (handler, None)
+
+    # If breaker scope is URI
+    else:
+        #
+        return (handler, info_dict.get('onwrap_uri', None))
+
+
+def _on_handler_failure(handler, info_dict, hook_name):
+    # Get breaker key
+    key = _get_breaker_key(handler, info_dict)
+
+    # Get breaker
+    breaker = _HANDLER_BREAKERS.get(key, None)
+
+    #
+    if breaker is None:
+        breaker = _HANDLER_BREAKERS.setdefault(key, _HandlerBreaker())
+
+    # If the breaker is open, e.g. the handler fails in the post-call event
+    # of a call whose pre-call event opened the breaker
+    if breaker.open_until is not None:
+        # Count the failure without reporting it
+        breaker.total_failure_count += 1
+
+        #
+        return
+
+    # Update counts
+    breaker.failure_count += 1
+
+    breaker.total_failure_count += 1
+
+    # Get failure threshold
+    max_failures = get_config('HANDLER_BREAKER_FAILURES')
+
+    # If the breaker is disabled, or the threshold is not reached
+    if not max_failures or breaker.failure_count < max_failures:
+        # Report the error, rate-limited
+        _report_handler_error(info_dict, hook_name)
+
+        #
+        return
+
+    # Get backoff seconds
+    backoff = get_config('HANDLER_BREAKER_BACKOFF')
+
+    # Open the breaker
+    breaker.open_until = get_timestamp() + backoff
+
+    breaker.open_count += 1
+
+    #
+    error_msg = (
+        '# Error when calling {} handler, handler disabled {}for {} seconds'
+        ' after {} consecutive failures:\n---\n{}---\n'
+    ).format(
+        hook_name,
+        '' if key[1] is None else 'for {} '.format(key[1]),
+        backoff,
+        breaker.failure_count,
+        traceback.format_exc(),
+    )
+
+    # If calls were skipped in previous backoff periods
+    if breaker.skipped_count:
+        #
+        error_msg += '# {} handler calls skipped so far.\n'.format(
+            breaker.skipped_count
+        )
+
+    #
+    print_error(error_msg)
+
+
+def _call_handler(handler, info_dict, hook_name, check_breaker=True):
+    # Call the handler unless its breaker is open, and return whether it is
+    # called. A call's pre-call event checks the breaker and its post-call
+    # event follows the result with `check_breaker` false, so that stateful
+    # handlers get both events or neither.
+
+    # If any handler has failed
+    if _HANDLER_BREAKERS:
+        # Get breaker
+        breaker = _HANDLER_BREAKERS.get(
+            _get_breaker_key(handler, info_dict), None
+        )
+
+        # If the breaker is open
+        if check_breaker and breaker is not None and \
+                breaker.open_until is not None:
+            # If the backoff period is not over
+            if get_timestamp() < breaker.open_until:
+                # Skip the handler
+                breaker.skipped_count += 1
+
+                #
+                return False
+
+            # Close the breaker, with consecutive failure count kept so that
+            # one more failure opens the breaker again
+            breaker.open_until = None
+
+            breaker.failure_count -= 1
+    else:
+        #
+        breaker = None
+
+    #
+    try:
+        handler(info_dict)
+    except Exception:
+        # Count the failure, report the error and open the breaker if needed
+        _on_handler_failure(handler, info_dict, hook_name)
+    else:
+        # If the handler has failed before, and the breaker is not opened
+        # after the call's pre-call event
+        if breaker is not None and breaker.open_until is None:
+            # Reset consecutive failure count
+            breaker.failure_count = 0
+
+    #
+    return True
+
+
+class TracedGenerator(object):
+    """
+    Generator proxy that reports each resume of the wrapped generator.
+
+    Each `__next__`, `send` or `throw` call is reported with hook type
+    `gen_resume` before resuming, and with hook type `gen_yield` after the
+    generator yields, or `gen_finish` after the generator finishes. Yield and
+    finish info dicts contain key `elapsed`, the time spent in the resume.
+    """
+
+    def __init__(self, generator, info, handler, info_dict):
+        #
+        self._generator = generator
+
+        #
+        self._info = info
+
+        #
+        self._handler = handler
+
+        # Info dict of the generator function's call
+        self._info_dict = info_dict
+
+        #
+        self._resume_count = 0
+
+        #
+        self._total_elapsed = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self._resume(next, self._generator)
+
+    # Python 2
+    next = __next__
+
+    def send(self, value):
+        return self._resume(self._generator.send, value)
+
+    def throw(self, *args):
+        return self._resume(self._generator.throw, *args)
+
+    def close(self):
+        return self._generator.close()
+
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    def __repr__(self):
+        return repr(self._generator)
+
+    def _resume(self, resume_func, *resume_args):
+        # Get time before handler work
+        enter_time = default_timer()
+
+        # Get callees' total time of the caller so far
+        child_time_base = child_time_get()
+
+        #
+        count = count_add(1)
+
+        #
+        level = level_add(1)
+
+        #
+        self._resume_count += 1
+
+        #
+        info_dict = self._info_dict.copy()
+
+        info_dict.update({
+            'trace_hook_type': 'gen_resume',
+            'level': level,
+            'count': count,
+            'resume_count': self._resume_count,
+        })
+
+        #
+        result_info_dict = info_dict.copy()
+
+        # If the handler is skipped because its breaker is open
+        if not _call_handler(self._handler, info_dict, 'generator resume'):
+            # Skip the yield or finish event too
+            result_info_dict = None
+
+        #
+        start_time = default_timer()
+
+        #
+        try:
+            #
+            yield_value = resume_func(*resume_args)
+
+        except StopIteration as e:
+            #
+            self._finish(
+                result_info_dict, start_time, getattr(e, 'value', None)
+            )
+
+            raise
+
+        except:
+            #
+            self._finish(
+                result_info_dict, start_time, ExceptionInfo(sys.exc_info())
+            )
+
+            raise
+
+        else:
+            #
+            elapsed = default_timer() - start_time
+
+            #
+            self._total_elapsed += elapsed
+
+            # If the resume event is handled
+            if result_info_dict is not None:
+                #
+                result_info_dict.update({
+                    'trace_hook_type': 'gen_yield',
+                    'yield_value': yield_value,
+                    'elapsed': elapsed,
+                })
+
+                #
+                _call_handler(
+                    self._handler,
+                    result_info_dict,
+                    'generator yield',
+                    check_breaker=False,
+                )
+
+            #
+            return yield_value
+
+        finally:
+            # Restore level
+            level_set(level - 1)
+
+            # Add the resume's time including handler work to the caller's
+            # callees' total time
+            child_time_set(child_time_base + (default_timer() - enter_time))
+
+    def _finish(self, result_info_dict, start_time, call_result):
+        #
+        elapsed = default_timer() - start_time
+
+        #
+        self._total_elapsed += elapsed
+
+        # If the resume event is not handled
+        if result_info_dict is None:
+            return
+
+        #
+        result_info_dict.update({
+            'trace_hook_type': 'gen_finish',
+            'call_result': call_result,
+            'elapsed': elapsed,
+            'total_elapsed': self._total_elapsed,
+        })
+
+        #
+        _call_handler(
+            self._handler,
+            result_info_dict,
+            'generator finish',
+            check_breaker=False,
+        )
+
+
+def _get_generator_type(func, info):
+    # 2XGNT
+    # If the spec not asks for tracing generator resumes
+    if not info.get('trace_generator', False):
+        return None
+
+    #
+    try:
+        # If is generator function
+        if inspect.isgeneratorfunction(func):
+            return TracedGenerator
+
+        # If is async generator function
+        if TracedAsyncGenerator is not None and \
+                inspect.isasyncgenfunction(func):
+            return TracedAsyncGenerator
+    except Exception:
+        pass
+
+    #
+    return None
+
+
+def _is_coroutine_function(func):
+    # If coroutine wrapper is not supported
+    if create_coroutine_wrapper is None:
+        return False
+
+    #
+    try:
+        return inspect.iscoroutinefunction(func)
+    except Exception:
+        return False
+
+
+class _LimitFrame(object):
+    # Limit state of a traced call under depth, fan-out or rate limits
+
+    __slots__ = (
+        'level',
+        'limits',
+        'root_level',
+        'child_count',
+        'suppressed',
+        'suppressed_count',
+    )
+
+    def __init__(self, level, limits, root_level, suppressed):
+        # Call level
+        self.level = level
+
+        # Tuple of max depth, max children and max rate
+        self.limits = limits
+
+        # Level of the outermost call of the limits
+        self.root_level = root_level
+
+        # Count of child calls
+        self.child_count = 0
+
+        # Whether the call and calls below it are suppressed
+        self.suppressed = suppressed
+
+        # Count of suppressed calls below the call, or including the call if
+        # it is suppressed
+        self.suppressed_count = 1 if suppressed else 0
+
+
+# Map URI to list of rate window start second, call count in the window, and
+# count of calls suppressed since the URI's last traced call
+_RATE_BUCKETS = {}
+
+
+def _is_rate_exceeded(uri, max_rate):
+    # Get current second
+    second = int(get_timestamp())
+
+    # Get rate bucket
+    bucket = _RATE_BUCKETS.get(uri, None)
+
+    # If the URI has no bucket
+    if bucket is None:
+        # Create bucket
+        bucket = _RATE_BUCKETS[uri] = [second, 0, 0]
+
+    # If is a new rate window
+    elif bucket[0] != second:
+        # Reset call count
+        bucket[0] = second
+
+        bucket[1] = 0
+
+    # If the rate is exceeded
+    if bucket[1] >= max_rate:
+        # Count suppressed call
+        bucket[2] += 1
+
+        # Return True
+        return True
+
+    # Count traced call
+    bucket[1] += 1
+
+    # Return False
+    return False
+
+
+def _pop_rate_suppressed_count(uri):
+    # Get rate bucket
+    bucket = _RATE_BUCKETS.get(uri, None)
+
+    # If the URI has no bucket
+    if bucket is None:
+        return 0
+
+    # Get count of calls suppressed since the URI's last traced call
+    suppressed_count = bucket[2]
+
+    # Reset the count
+    bucket[2] = 0
+
+    # Return the count
+    return suppressed_count
+
+
+def _limit_pre_call(info, level):
+    # Return whether the call is suppressed, and count of the URI's calls
+    # suppressed by rate limit since its last traced call
+
+    # 4LMTS
+    # Get the call's limits
+    limits = info.get('trace_limits', None)
+
+    # Get limit stack
+    stack = limit_stack_get()
+
+    # If the call and its callers have no limits
+    if limits is None and not stack:
+        # Not suppressed
+        return False, 0
+
+    # Get parent frame
+    parent = stack[-1] if stack else None
+
+    # If the parent is suppressed
+    if parent is not None and parent.suppressed:
+        # Count the call in the parent's suppressed count
+        parent.suppressed_count += 1
+
+        # Suppress the call
+        return True, 0
+
+    # If the call has no own limits, or same limits as its caller
+    if parent is not None and (limits is None or limits == parent.limits):
+        # Use the caller's limits
+        limits = parent.limits
+
+        root_level = parent.root_level
+
+    # If the call has own limits
+    else:
+        # The call is the outermost call of its limits
+        root_level = level
+
+    # Get limits
+    max_depth, max_children, max_rate = limits
+
+    # Whether the call is suppressed
+    suppressed = False
+
+    # If depth limit is exceeded
+    if max_depth is not None and level - root_level > max_depth:
+        suppressed = True
+
+    # If have parent
+    if parent is not None:
+        # Count child call
+        parent.child_count += 1
+
+        # Get parent's fan-out limit
+        parent_max_children = parent.limits[1]
+
+        # If fan-out limit is exceeded
+        if parent_max_children is not None and \
+                parent.child_count > parent_max_children:
+            suppressed = True
+
+    # If rate limit is exceeded
+    if not suppressed and max_rate is not None and \
+            _is_rate_exceeded(info['onwrap_uri'], max_rate):
+        suppressed = True
+
+    # Push frame.
+    # A new tuple is set, see `ContextLocal`.
+    limit_stack_set(stack + (
+        _LimitFrame(
+            level=level,
+            limits=limits,
+            root_level=root_level,
+            suppressed=suppressed,
+        ),
+    ))
+
+    # If the call is suppressed
+    if suppressed:
+        return True, 0
+
+    # If have rate limit
+    if max_rate is not None:
+        # Return count of calls suppressed by rate limit
+        return False, _pop_rate_suppressed_count(info['onwrap_uri'])
+
+    # Not suppressed
+    return False, 0
+
+
+def _limit_post_call(level):
+    # Pop the call's limit frame and return count of suppressed calls below
+    # the call
+
+    # Get limit stack
+    stack = limit_stack_get()
+
+    # If the call has no frame
+    if not stack or stack[-1].level != level:
+        return 0
+
+    # Get the call's frame
+    frame = stack[-1]
+
+    # Pop the frame.
+    # A new tuple is set, see `ContextLocal`.
+    limit_stack_set(stack[:-1])
+
+    # If the call is suppressed
+    if frame.suppressed:
+        # If have parent
+        if len(stack) > 1:
+            # Add suppressed count to the parent
+            stack[-2].suppressed_count += frame.suppressed_count
+
+        # Return 0 because the call is not reported
+        return 0
+
+    # Return suppressed count
+    return frame.suppressed_count
+
+
+def _skip_pre_call(info, flags):
+    # Handle pre-call event of a call skipped because it is hidden. Level is
+    # None if the call is not counted.
+
+    # If need count skipped calls
+    if flags & _WRAP_FLAG_COUNT_HIDDEN:
+        # Keep count and level same as if the call is not skipped
+        count_add(1)
+
+        level = level_add(1)
+    else:
+        level = None
+
+    # Get skip hook
+    skip_hook = info.get(INFO_K_SKIP_HOOK, None)
+
+    # If have skip hook
+    if skip_hook is not None:
+        # Call skip hook, as handlers are not called
+        skip_hook(info)
+
+    #
+    return level, None, None
+
+
+def _handle_pre_call(info, func, handler, args, kwargs, bound_args=None):
+    # Return call level, info dict and timing info for `_handle_post_call`.
+    # Timing info is None if the call is skipped because it is hidden. Info
+    # dict is None if the call is suppressed by limits or the handler's
+    # circuit breaker.
+
+    # Get wrapper flags
+    flags = info.get(INFO_K_WRAP_FLAGS, 0)
+
+    # If the call is shown only if not below a call hiding calls below it,
+    # and it is below such a call
+    if flags & _WRAP_FLAG_SKIP_WHEN_HIDDEN and showhide_bits_get() & 1:
+        # Skip all handler work
+        return _skip_pre_call(info, flags)
+
+    # Get time before handler work
+    enter_time = default_timer()
+
+    # If need disarm wrappers exceeding call rate or overhead budget
+    if flags & _WRAP_FLAG_CHECK_BUDGET:
+        # Check the wrapper's budget
+        _check_disarm_budget(info, enter_time)
+
+    #
+    count = count_add(1)
+
+    #
+    level = level_add(1)
+
+    # Get callees' total time of the caller so far.
+    # The callees' total time of this call is the increase of it in
+    # `_handle_post_call`.
+    child_time_base = child_time_get()
+
+    # Apply limits before any handler work
+    suppressed, rate_suppressed_count = _limit_pre_call(info, level)
+
+    # If the call is suppressed
+    if suppressed:
+        return level, None, (enter_time, child_time_base, enter_time, None)
+
+    # If need debug info dict's URIs
+    if flags & _WRAP_FLAG_DEBUG_URIS:
+        # Get message
+        msg = '# WRAPPER_FUNC_DEBUG_INFO_DICT_URIS: {}'.format(
+            format_info_dict_uris(info)
+        )
+
+        # Print message
+        print_info(msg)
+
+    #
+    info_dict = info.copy()
+
+    info_dict.update({
+        'trace_hook_type': 'pre_call',
+        'level': level,
+        'count': count,
+        'func': func,
+        'args': args,
+        'kwargs': kwargs,
+    })
+
+    # If arguments are bound by signature-preserving wrapper
+    if bound_args is not None:
+        #
+        info_dict['bound_args'] = bound_args
+
+    return_info_dict = info_dict.copy()
+
+    # If calls are suppressed by rate limit
+    if rate_suppressed_count:
+        # Report the count in pre-call event
+        info_dict['rate_suppressed_count'] = rate_suppressed_count
+
+    # 5IKXV
+    # If the handler is skipped because its breaker is open
+    if not _call_handler(handler, info_dict, 'pre-call'):
+        # Skip the post-call event too, as if the call is suppressed
+        return_info_dict = None
+
+    # If need thread CPU time
+    if flags & _WRAP_FLAG_CPU_TIME:
+        # Get thread CPU time before the call
+        cpu_start_time = _THREAD_TIME()
+    else:
+        cpu_start_time = None
+
+    # Get time after handler work
+    start_time = default_timer()
+
+    #
+    return level, return_info_dict, (
+        enter_time, child_time_base, start_time, cpu_start_time
+    )
+
+
+def _handle_post_call(
+    info, handler, level, return_info_dict, call_result, timing
+):
+    # Post-call info dict has keys `start_time` and `end_time` excluding
+    # handler work, `elapsed`, `self_time` excluding traced callees' time, and
+    # `cpu_time` if config `TRACE_CPU_TIME` is enabled.
+
+    # If the call is skipped because it is hidden, see `_skip_pre_call`
+    if timing is None:
+        # If the call is counted
+        if level is not None:
+            # Decrement level
+            level_set(level - 1)
+
+        #
+        return
+
+    # Get time before handler work
+    end_time = default_timer()
+
+    # Get timing info
+    enter_time, child_time_base, start_time, cpu_start_time = timing
+
+    # Pop limit frame
+    suppressed_count = _limit_post_call(level)
+
+    # If the call is not suppressed
+    if return_info_dict is not None:
+        # Get duration
+        elapsed = end_time - start_time
+
+        #
+        return_info_dict['trace_hook_type'] = 'post_call'
+
+        #
+        return_info_dict['call_result'] = call_result
+
+        #
+        return_info_dict['start_time'] = start_time
+
+        return_info_dict['end_time'] = end_time
+
+        return_info_dict['elapsed'] = elapsed
+
+        return_info_dict['self_time'] = \
+            elapsed - (child_time_get() - child_time_base)
+
+        # If have thread CPU time before the call
+        if cpu_start_time is not None:
+            #
+            return_info_dict['cpu_time'] = _THREAD_TIME() - cpu_start_time
+
+        # If calls below are suppressed
+        if suppressed_count:
+            # Report the count
+            return_info_dict['suppressed_count'] = suppressed_count
+
+        # 6VPTM
+        # Not check the breaker since the pre-call event is handled
+        _call_handler(
+            handler, return_info_dict, 'post-call', check_breaker=False
+        )
+
+        # Get time after handler work
+        handler_end_time = default_timer()
+
+        # If need disarm wrappers exceeding overhead budget
+        if info.get(INFO_K_WRAP_FLAGS, 0) & _WRAP_FLAG_MEASURE_OVERHEAD:
+            # Get wrapper state
+            state = info.get(INFO_K_WRAP_STATE, None)
+
+            # If the wrapper has state
+            if state is not None:
+                # Add the call's handler work time
+                state.window_overhead += (start_time - enter_time) + \
+                    (handler_end_time - end_time)
+
+        #
+        end_time = handler_end_time
+
+    # Add the call's time including handler work to the caller's callees'
+    # total time
+    child_time_set(child_time_base + (end_time - enter_time))
+
+    # Decrement level
+    new_level = level_add(-1)
+
+    # If new level is not EQ expected value.
+    # This is possible if `importlib.util.find_spec` is called by the
+    # traced code.
+    if new_level != level - 1:
+        #
+        msg = \
+            '# Warning: Unmatched level: {} != {}. {}'.format(
+                new_level,
+                level - 1,
+                format_info_dict_uris(info)
+            )
+
+        # Print warning
+        print_info(msg)
+
+        # Set to the expected level
+        level_set(level - 1)
+
+
+def _wrap_class_in_place(cls, state):
+    # Trace instantiation by setting a wrapper `__init__` on the class, so
+    # instances keep the original type. If the class has been hooked, update
+    # the hook's state instead. Return None if the class's attributes can not
+    # be set, e.g. built-in types.
+
+    # Get the class's own `__init__`, or None if inherited
+    own_init = vars(cls).get('__init__', None)
+
+    # Get the hook's state holder if the class has been hooked
+    state_holder = getattr(own_init, _HOOK_STATE_ATTR_NAME, None)
+
+    # If the class has been hooked
+    if state_holder is not None:
+        # Use given state
+        state_holder[0] = state
+
+        # Return the class
+        return cls
+
+    # Create state holder, so that hooking again can replace the state
+    state_holder = [state]
+
+    # If the class has own `__init__`
+    if own_init is not None:
+        # Call it
+        call_init = own_init
+
+    # If the inherited `__init__` is `object.__init__`, which does nothing.
+    # Calling it with arguments raises error once the class defines
+    # `__init__`.
+    elif cls.__init__ is object.__init__:
+        # Not call it
+        call_init = None
+
+    # If the class inherits `__init__` from a base class other than `object`
+    else:
+        #
+        def call_init(self, *args, **kwargs):
+            return super(cls, self).__init__(*args, **kwargs)
+
+    # Get the class's signature before hooking, in Python 3
+    try:
+        cls_signature = None if IS_PY2 else inspect.signature(cls)
+    except (TypeError, ValueError):
+        cls_signature = None
+
+    #
+    def __init__(self, *args, **kwargs):
+        # If is instance of a subclass
+        if type(self) is not cls:
+            # Not report
+            if call_init is not None:
+                call_init(self, *args, **kwargs)
+
+            return
+
+        #
+        binding = state_holder[0].binding
+
+        # If the wrapper is disarmed
+        if binding is None:
+            # Not report
+            if call_init is not None:
+                call_init(self, *args, **kwargs)
+
+            return
+
+        #
+        info, handler = binding
+
+        #
+        level, return_info_dict, timing = _handle_pre_call(
+            info, cls, handler, args, kwargs
+        )
+
+        # Use the instance as call result
+        call_result = self
+
+        try:
+            #
+            if call_init is not None:
+                call_init(self, *args, **kwargs)
+        except:
+            # If the call is not skipped because it is hidden, see
+            # `_skip_pre_call`
+            if timing is not None:
+                call_result = _handle_exception(info, level)
+            else:
+                call_result = None
+
+            raise
+        finally:
+            #
+            _handle_post_call(
+                info, handler, level, return_info_dict, call_result, timing
+            )
+
+    # If the class has own `__init__`
+    if own_init is not None:
+        # Copy name, etc.
+        copy_func_attrs(own_init, __init__)
+
+    # If the class has qualified name, in Python 3
+    elif hasattr(cls, '__qualname__'):
+        #
+        __init__.__qualname__ = cls.__qualname__ + '.__init__'
+
+    # If have the class's signature
+    if cls_signature is not None:
+        # Set signature so that `inspect.signature` on the class gives the
+        # original signature instead of `(*args, **kwargs)`
+        __init__.__signature__ = cls_signature.replace(parameters=[
+            inspect.Parameter('self', inspect.Parameter.POSITIONAL_ONLY)
+        ] + list(cls_signature.parameters.values()))
+
+    # Store the original `__init__`, or None if inherited
+    object.__setattr__(__init__, _OLD_CALL_ATTR_NAME, own_init)
+
+    # Store the state holder
+    object.__setattr__(__init__, _HOOK_STATE_ATTR_NAME, state_holder)
+
+    #
+    try:
+        # Hook `__init__` in place
+        setattr(cls, '__init__', __init__)
+    except (TypeError, AttributeError):
+        # Not supported
+        return None
+
+    # Return the class
+    return cls
+
+
+#
+def _get_direct_call(func):
+    # Get callable that calls given function the way its wrapper does
+    if func is object.__new__ or func is object.__init__:
+        return lambda *args, **kwargs: func(args[0])
+    elif isinstance(func, STATICMETHOD_TYPE):
+        return func.__func__
+    else:
+        return func
+
 
+def _retry_wrap_attr(
+    filter, handler, target, func, base_info, module, existwrap
+):
+    # Get attribute name
+    attr_name = base_info['attr_name']
 
-#
-_MAP_CALLABLE_TO_WRAP_INFOS = {}
+    # Get current attribute value
+    attr_obj = vars(target).get(attr_name, None)
 
+    # If the attribute has been replaced since the object was rejected
+    if attr_obj is not None and \
+            get_wrapped_obj(attr_obj, default=attr_obj) is not func:
+        # Forget the object
+        return None
 
-#
-_default_filter = (lambda info: info)
+    # Wrap the object
+    new_func = wrap_call(
+        func=func,
+        info=base_info.copy(),
+        filter=filter,
+        handler=handler,
+        module=module,
+        existwrap=existwrap,
+        target=target,
+    )
 
+    # If the object is accepted
+    if new_func is not None:
+        # Set wrapper attribute
+        setattr(target, attr_name, new_func)
 
-_default_handler = (lambda info: info)
+    #
+    return new_func
 
 
-#
 def wrap_call(
     func,
     info=None,
@@ -195,7 +1758,34 @@ def wrap_call(
     handler=None,
     module=None,
     existwrap=None,
+    target=None,
+    base_info=None,
 ):
+    """
+    Create wrapper for given callable if accepted by given filter.
+
+    :param func: Callable.
+
+    :param info: Info dict.
+
+    :param filter: Filter function. If None and `base_info` is given, the \
+        info dict is used as filtered.
+
+    :param handler: Handler function.
+
+    :param module: Module of the callable.
+
+    :param existwrap: Exist-wrapper callback. Called at 3QWOT.
+
+    :param target: Module or class whose attribute the caller sets the \
+        wrapper as. If given, the callable is recorded when rejected, see \
+        config `WRAP_RECORD_CANDIDATES`.
+
+    :param base_info: Info dict before filtering, if filter has been called \
+        by the caller, used by `rewrap` to filter again.
+
+    :return: Wrapper, or None if the callable is rejected.
+    """
     #
     if not is_wrappable(func):
         return None
@@ -207,8 +1797,8 @@ def wrap_call(
     if get_wrapped_obj(func, default=None) is not None:
         raise ValueError(func)
 
-    #
-    if filter is None:
+    # If filter is not given, and the caller has not called it
+    if filter is None and base_info is None:
         filter = _default_filter
 
     #
@@ -266,12 +1856,36 @@ def wrap_call(
 
     #
     if filter is not None:
+        # Keep info dict before filtering, to filter again in `rewrap`
+        base_info = info.copy()
+
         # 7AETC
         info = filter(info)
 
         if not isinstance(info, dict):
+            # If the caller sets the wrapper as attribute
+            if target is not None:
+                # Record the object to retry in `rewrap`
+                _add_wrap_candidate(base_info, partial(
+                    _retry_wrap_attr,
+                    target=target,
+                    func=func,
+                    base_info=base_info,
+                    module=module,
+                    existwrap=existwrap,
+                ))
+
             return None
 
+    # Create wrapper state, with handler specialized for the function, which
+    # calls only the handlers that apply to the function
+    state = info[INFO_K_WRAP_STATE] = WrapState(
+        info,
+        specialize_handler(handler, info),
+        base_info=base_info,
+        base_handler=handler,
+    )
+
     #
     wrap_info_s = _MAP_CALLABLE_TO_WRAP_INFOS.setdefault(func, [])
 
@@ -285,108 +1899,97 @@ def wrap_call(
     #
     wrap_info_s.append(info)
 
-    #
-    @wrap_callable(func)
-    def new_func(*args, **kwargs):
-        #
-        count = count_add(1)
+    # If the function is a class to be traced without subclass replacement
+    if inspect.isclass(func) and get_config('WRAP_CLASS_IN_PLACE'):
+        # Hook the class's `__init__` in place
+        new_func = _wrap_class_in_place(func, state)
+
+        # If the class is hooked
+        if new_func is not None:
+            return new_func
+
+        # Replace the class with a subclass instead
+
+    # If the function is a coroutine function
+    if _is_coroutine_function(func):
+        # Create coroutine wrapper that reports pre-call when the coroutine
+        # starts running and post-call when the coroutine finishes
+        new_func = wrap_callable(func, create_coroutine_wrapper(
+            func=func,
+            state=state,
+            pre_call=_handle_pre_call,
+            post_call=_handle_post_call,
+            handle_exception=_handle_exception,
+        ))
 
         #
-        level = level_add(1)
+        return new_func
+
+    # Get generator proxy type, or None if not need trace generator resumes
+    generator_type = _get_generator_type(func, info)
+
+    # If need preserve signature
+    if get_config('WRAP_PRESERVE_SIGNATURE'):
+        # Create wrapper with the same signature as the function, or None if
+        # the function is not supported
+        new_func = create_signature_wrapper(
+            func=func,
+            state=state,
+            pre_call=_handle_pre_call,
+            post_call=_handle_post_call,
+            handle_exception=_handle_exception,
+            generator_type=generator_type,
+        )
 
-        # If need debug info dict's URIs
-        if get_config('WRAPPER_FUNC_DEBUG_INFO_DICT_URIS'):
-            # Get message
-            msg = '# WRAPPER_FUNC_DEBUG_INFO_DICT_URIS: {}'.format(
-                format_info_dict_uris(info)
-            )
+        # If the wrapper is created
+        if new_func is not None:
+            #
+            return wrap_callable(func, new_func)
 
-            # Print message
-            print_info(msg)
+    # Get callable that calls the function
+    call = _get_direct_call(func)
 
+    #
+    @wrap_callable(func)
+    def new_func(*args, **kwargs):
         #
-        info_dict = info.copy()
+        binding = state.binding
 
-        info_dict.update({
-            'trace_hook_type': 'pre_call',
-            'level': level,
-            'count': count,
-            'func': func,
-            'args': args,
-            'kwargs': kwargs,
-        })
+        # If the wrapper is disarmed
+        if binding is None:
+            # Call the function directly
+            return call(*args, **kwargs)
 
-        return_info_dict = info_dict.copy()
+        #
+        info, handler = binding
 
         #
+        level, return_info_dict, timing = _handle_pre_call(
+            info, func, handler, args, kwargs
+        )
+
         try:
-            # 5IKXV
-            handler(info_dict)
-        except Exception:
-            #
-            error_msg = '# Error when calling pre-call handler:\n---\n{}---\n'\
-                .format(
-                    traceback.format_exc()
-                )
+            call_result = call(*args, **kwargs)
 
             #
-            print_error(error_msg)
-
-        try:
-            if func is object.__new__:
-                call_result = func(args[0])
-            elif func is object.__init__:
-                call_result = func(args[0])
-            elif isinstance(func, STATICMETHOD_TYPE):
-                call_result = func.__func__(*args, **kwargs)
-            else:
-                call_result = func(*args, **kwargs)
+            if generator_type is not None and return_info_dict is not None:
+                call_result = generator_type(
+                    call_result, info, handler, return_info_dict.copy()
+                )
         except:
-            call_result = ExceptionInfo(sys.exc_info())
+            # If the call is not skipped because it is hidden, see
+            # `_skip_pre_call`
+            if timing is not None:
+                call_result = _handle_exception(info, level)
+            else:
+                call_result = None
 
             raise
         finally:
             #
-            return_info_dict['trace_hook_type'] = 'post_call'
-
-            #
-            return_info_dict['call_result'] = call_result
-
-            #
-            try:
-                # 6VPTM
-                handler(return_info_dict)
-            except Exception:
-                #
-                error_msg = (
-                    '# Error when calling post-call handler:\n---\n{}---\n'
-                ).format(
-                    traceback.format_exc()
-                )
-
-                #
-                print_error(error_msg)
-
-            # Decrement level
-            new_level = level_add(-1)
-
-            # If new level is not EQ expected value.
-            # This is possible if `importlib.util.find_spec` is called by the
-            # traced code.
-            if new_level != level - 1:
-                #
-                msg = \
-                    '# Warning: Unmatched level: {} != {}. {}'.format(
-                        new_level,
-                        level - 1,
-                        format_info_dict_uris(info)
-                    )
-
-                # Print warning
-                print_info(msg)
-
-                # Set to the expected level
-                level_set(level - 1)
+            _handle_post_call(
+                info, handler, level, return_info_dict, call_result, timing
+            )
 
         #
         return call_result
@@ -429,6 +2032,7 @@ def wrap_class_attrs(
     class_onwrap_uri=None,
     class_existwrap=None,
     call_existwrap=None,
+    wrap_plan=None,
 ):
     #
     orig_cls = cls
@@ -473,10 +2077,23 @@ def wrap_class_attrs(
     #
     print_debug(msg)
 
+    # Keep info dict before filtering
+    base_class_info = class_info.copy()
+
     # 5WGOF
     class_info = filter(class_info)
 
     if not isinstance(class_info, dict):
+        # Record the class to retry in `rewrap`
+        _add_wrap_candidate(base_class_info, partial(
+            _retry_wrap_class_attrs,
+            cls=cls,
+            module=module,
+            class_onwrap_uri=class_onwrap_uri,
+            class_existwrap=class_existwrap,
+            call_existwrap=call_existwrap,
+        ))
+
         return None
 
     #
@@ -675,6 +2292,23 @@ def wrap_class_attrs(
         #
         func = func_info['obj']
 
+        # If need plan wrapping instead of wrapping
+        if wrap_plan is not None:
+            # Add plan item
+            _add_wrap_plan_item(
+                wrap_plan=wrap_plan,
+                target=func_info['class'],
+                attr_name=func_info['attr_name'],
+                func=func,
+                info=func_info,
+                filter=filter,
+                module=module,
+                existwrap=call_existwrap,
+            )
+
+            #
+            continue
+
         try:
             new_func = wrap_call(
                 func=func,
@@ -683,6 +2317,7 @@ def wrap_class_attrs(
                 handler=handler,
                 module=module,
                 existwrap=call_existwrap,
+                target=func_info['class'],
             )
         except Exception:
             #
@@ -750,6 +2385,7 @@ def wrap_module_attrs(
     module_existwrap=None,
     class_existwrap=None,
     call_existwrap=None,
+    wrap_plan=None,
 ):
     #
     if filter is None:
@@ -788,10 +2424,24 @@ def wrap_module_attrs(
 
     print_debug(msg)
 
+    # Keep info dict before filtering
+    base_module_info = module_info.copy()
+
     # 2D5HA
     module_info = filter(module_info)
 
     if not isinstance(module_info, dict):
+        # Record the module to retry in `rewrap`
+        _add_wrap_candidate(base_module_info, partial(
+            _retry_wrap_module_attrs,
+            module=module,
+            module_origin_uri=module_origin_uri,
+            module_onwrap_uri=module_onwrap_uri,
+            module_existwrap=module_existwrap,
+            class_existwrap=class_existwrap,
+            call_existwrap=call_existwrap,
+        ))
+
         return None
 
     #
@@ -828,6 +2478,7 @@ def wrap_module_attrs(
                 class_onwrap_uri=class_onwrap_uri,
                 class_existwrap=class_existwrap,
                 call_existwrap=call_existwrap,
+                wrap_plan=wrap_plan,
             )
         #
         elif is_wrappable(mod_attr_obj):
@@ -863,8 +2514,22 @@ def wrap_module_attrs(
             #
             print_debug(msg)
 
+            # If need plan wrapping instead of wrapping
+            if wrap_plan is not None:
+                # Add plan item
+                _add_wrap_plan_item(
+                    wrap_plan=wrap_plan,
+                    target=module,
+                    attr_name=mod_attr_name,
+                    func=mod_attr_obj,
+                    info=info,
+                    filter=filter,
+                    module=module,
+                    existwrap=call_existwrap,
+                )
+
             #
-            if isinstance(info, dict):
+            elif isinstance(info, dict):
                 try:
                     new_func = wrap_call(
                         func=mod_attr_obj,
@@ -873,6 +2538,7 @@ def wrap_module_attrs(
                         handler=handler,
                         module=module,
                         existwrap=call_existwrap,
+                        target=module,
                     )
 
                 except Exception:
@@ -929,3 +2595,363 @@ def wrap_module_attrs(
 
     #
     return module
+
+
+def _add_wrap_plan_item(
+    wrap_plan,
+    target,
+    attr_name,
+    func,
+    info,
+    filter,
+    module,
+    existwrap,
+):
+    # If the object is not wrappable
+    if not is_wrappable(func):
+        # Ignore
+        return
+
+    # Keep info dict before filtering, to filter again in `rewrap`
+    base_info = info.copy()
+
+    #
+    try:
+        # Call filter now so that `apply_wrap_plan` needs not call it.
+        # 7AETC
+        info = filter(info)
+    except Exception:
+        #
+        error_msg = (
+            '# Error when filtering callable:\n---\n{}---\n'
+        ).format(
+            traceback.format_exc()
+        )
+
+        #
+        print_error(error_msg)
+
+        #
+        msg = pformat(info, indent=4, width=1)
+
+        #
+        print_error(msg)
+
+        #
+        return
+
+    # If the object is rejected
+    if not isinstance(info, dict):
+        # Record the object to retry in `rewrap`
+        _add_wrap_candidate(base_info, partial(
+            _retry_wrap_attr,
+            target=target,
+            func=func,
+            base_info=base_info,
+            module=module,
+            existwrap=existwrap,
+        ))
+
+        # Ignore
+        return
+
+    # Add plan item
+    wrap_plan.append({
+        'target': target,
+        'attr_name': attr_name,
+        'func': func,
+        'info': info,
+        'base_info': base_info,
+        'module': module,
+        'existwrap': existwrap,
+    })
+
+
+def apply_wrap_plan(wrap_plan, handler=None):
+    """
+    Create wrappers for plan items collected by `wrap_module_attrs` or \
+        `wrap_class_attrs` with argument `wrap_plan` given, and set the \
+        wrappers as attributes.
+
+    Filters have been called when collecting the plan items, so this
+    function only does the wrapper creation and `setattr` work, holding a
+    lock during the whole process.
+
+    :param wrap_plan: Plan item list.
+
+    :param handler: Handler function.
+
+    :return: Number of wrapper attributes set.
+    """
+    #
+    if handler is None:
+        handler = _default_handler
+
+    # Number of wrapper attributes set
+    wrapped_count = 0
+
+    # Set of (target ID, attribute name) tuples handled
+    done_key_s = set()
+
+    #
+    with _WRAP_LOCK:
+        # For each plan item
+        for plan_item in wrap_plan:
+            #
+            target = plan_item['target']
+
+            #
+            attr_name = plan_item['attr_name']
+
+            # Get key.
+            # An attribute planned twice is applied once.
+            done_key = (id(target), attr_name)
+
+            # If the attribute has been handled
+            if done_key in done_key_s:
+                # Ignore
+                continue
+
+            #
+            done_key_s.add(done_key)
+
+            #
+            info = plan_item['info']
+
+            #
+            try:
+                new_func = wrap_call(
+                    func=plan_item['func'],
+                    info=info,
+                    filter=None,
+                    handler=handler,
+                    module=plan_item['module'],
+                    existwrap=plan_item['existwrap'],
+                    base_info=plan_item['base_info'],
+                )
+
+                #
+                if new_func is not None:
+                    #
+                    setattr(target, attr_name, new_func)
+
+                    #
+                    wrapped_count += 1
+
+            except Exception:
+                #
+                error_msg = (
+                    '# Error when applying wrap plan item:\n---\n{}---\n'
+                ).format(
+                    traceback.format_exc()
+                )
+
+                #
+                print_error(error_msg)
+
+                #
+                msg = pformat(info, indent=4, width=1)
+
+                #
+                print_error(msg)
+
+    #
+    return wrapped_count
+
+
+def _retry_wrap_class_attrs(
+    filter,
+    handler,
+    cls,
+    module,
+    class_onwrap_uri,
+    class_existwrap,
+    call_existwrap,
+):
+    # Wrap the class's attributes
+    return wrap_class_attrs(
+        cls,
+        filter=filter,
+        handler=handler,
+        module=module,
+        class_onwrap_uri=class_onwrap_uri,
+        class_existwrap=class_existwrap,
+        call_existwrap=call_existwrap,
+    )
+
+
+def _retry_wrap_module_attrs(
+    filter,
+    handler,
+    module,
+    module_origin_uri,
+    module_onwrap_uri,
+    module_existwrap,
+    class_existwrap,
+    call_existwrap,
+):
+    # Wrap the module's attributes
+    return wrap_module_attrs(
+        module,
+        filter=filter,
+        handler=handler,
+        module_origin_uri=module_origin_uri,
+        module_onwrap_uri=module_onwrap_uri,
+        module_existwrap=module_existwrap,
+        class_existwrap=class_existwrap,
+        call_existwrap=call_existwrap,
+    )
+
+
+def rewrap(filter, handler, is_changed=None):
+    """
+    Filter wrapped callables and objects recorded as rejected again with \
+        given filter, e.g. after specs are changed, and apply the results \
+        to existing wrappers in place.
+
+    A wrapped callable accepted again gets the new info dict and handler. A
+    wrapped callable rejected is disarmed, i.e. its wrapper calls it
+    directly. A recorded object accepted is wrapped, see config
+    `WRAP_RECORD_CANDIDATES`.
+
+    :param filter: Filter function.
+
+    :param handler: Handler function.
+
+    :param is_changed: Function taking an info dict before filtering and \
+        returning whether filtering it again may give a different result. \
+        Objects for which it returns False are skipped. None means filter \
+        all objects again.
+
+    :return: Dict mapping `updated`, `disarmed`, `wrapped`, `unchanged` \
+        and `failed` to object counts.
+    """
+    # Map result name to object count
+    count_s = dict.fromkeys(
+        ('updated', 'disarmed', 'wrapped', 'unchanged', 'failed'), 0
+    )
+
+    #
+    with _WRAP_LOCK:
+        # For each wrapped callable's info dicts
+        for info_s in list(_MAP_CALLABLE_TO_WRAP_INFOS.values()):
+            # For each info dict, one per wrapper
+            for index, info in enumerate(info_s):
+                # Get wrapper state
+                state = info.get(INFO_K_WRAP_STATE, None)
+
+                # If the info dict before filtering is not known, or
+                # filtering it again will not change the result
+                if state is None or state.base_info is None or (
+                    is_changed is not None and not is_changed(state.base_info)
+                ):
+                    #
+                    count_s['unchanged'] += 1
+
+                    #
+                    continue
+
+                #
+                try:
+                    # Filter again
+                    new_info = filter(state.base_info.copy())
+
+                    # If the callable is rejected
+                    if not isinstance(new_info, dict):
+                        # If the wrapper is armed
+                        if state.binding is not None:
+                            # Disarm the wrapper
+                            state.binding = None
+
+                            #
+                            count_s['disarmed'] += 1
+                        else:
+                            #
+                            count_s['unchanged'] += 1
+
+                        #
+                        continue
+
+                    #
+                    new_info[INFO_K_WRAP_STATE] = state
+
+                    # Update the wrapper's info dict and handler together
+                    state.bind(new_info, specialize_handler(handler, new_info))
+
+                    #
+                    state.base_handler = handler
+
+                    #
+                    info_s[index] = new_info
+
+                    # The wrapper is no longer auto-disarmed.
+                    # Restart its measuring window.
+                    _AUTO_DISARMED_URIS.pop(new_info.get('onwrap_uri'), None)
+
+                    state.window_start = None
+
+                    #
+                    count_s['updated'] += 1
+
+                except Exception:
+                    #
+                    error_msg = (
+                        '# Error when rewrapping callable:\n---\n{}---\n'
+                    ).format(
+                        traceback.format_exc()
+                    )
+
+                    #
+                    print_error(error_msg)
+
+                    #
+                    count_s['failed'] += 1
+
+        # Take recorded objects.
+        # Objects rejected again are recorded again.
+        candidate_s = _WRAP_CANDIDATES[:]
+
+        del _WRAP_CANDIDATES[:]
+
+        # For each recorded object
+        for candidate in candidate_s:
+            #
+            base_info, retry = candidate
+
+            # If filtering it again will not change the result
+            if is_changed is not None and not is_changed(base_info):
+                # Keep the record
+                _WRAP_CANDIDATES.append(candidate)
+
+                #
+                count_s['unchanged'] += 1
+
+                #
+                continue
+
+            #
+            try:
+                # If the object is wrapped
+                if retry(filter, handler) is not None:
+                    #
+                    count_s['wrapped'] += 1
+                else:
+                    #
+                    count_s['unchanged'] += 1
+
+            except Exception:
+                #
+                error_msg = (
+                    '# Error when rewrapping object:\n---\n{}---\n'
+                ).format(
+                    traceback.format_exc()
+                )
+
+                #
+                print_error(error_msg)
+
+                #
+                count_s['failed'] += 1
+
+    #
+    return count_s
@@ -0,0 +1,265 @@
+# coding: utf-8
+"""
+Wrappers for coroutine functions and async generators.
+
+This module uses Python 3.5+ syntax and is imported by `wrap` only if
+supported.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+import sys
+from timeit import default_timer
+
+# Internal imports
+from aoiktracecall.state import child_time_get
+from aoiktracecall.state import child_time_set
+from aoiktracecall.state import count_add
+from aoiktracecall.state import level_add
+from aoiktracecall.state import level_set
+
+
+def create_coroutine_wrapper(
+    func,
+    state,
+    pre_call,
+    post_call,
+    handle_exception,
+):
+    """
+    Create wrapper for coroutine function.
+
+    Unlike a plain wrapper, which would report post-call as soon as the
+    coroutine object is created, the created wrapper is itself a coroutine
+    function. Pre-call is reported when the coroutine starts running, i.e.
+    when it is first awaited, and post-call is reported when it finishes.
+
+    :param func: Coroutine function.
+
+    :param state: Wrapper state, see `wrap.WrapState`.
+
+    :param pre_call: Pre-call event function, see `wrap._handle_pre_call`.
+
+    :param post_call: Post-call event function, see `wrap._handle_post_call`.
+
+    :param handle_exception: Function creating call result for the exception \
+        being handled, see `wrap._handle_exception`.
+
+    :return: Wrapper coroutine function.
+    """
+    #
+    async def new_func(*args, **kwargs):
+        #
+        binding = state.binding
+
+        # If the wrapper is disarmed
+        if binding is None:
+            # Call the function directly
+            return await func(*args, **kwargs)
+
+        #
+        info, handler = binding
+
+        #
+        level, return_info_dict, timing = pre_call(
+            info, func, handler, args, kwargs
+        )
+
+        #
+        try:
+            call_result = await func(*args, **kwargs)
+        except:
+            # If the call is not skipped because it is hidden, see
+            # `wrap._skip_pre_call`
+            if timing is not None:
+                call_result = handle_exception(info, level)
+            else:
+                call_result = None
+
+            raise
+        finally:
+            #
+            post_call(
+                info, handler, level, return_info_dict, call_result, timing
+            )
+
+        #
+        return call_result
+
+    #
+    return new_func
+
+
+class TracedAsyncGenerator(object):
+    """
+    Async generator proxy that reports each resume of the wrapped async \
+        generator.
+
+    Same events as `wrap.TracedGenerator`, reported for `__anext__`, `asend`
+    and `athrow`.
+    """
+
+    def __init__(self, generator, info, handler, info_dict):
+        #
+        self._generator = generator
+
+        #
+        self._info = info
+
+        #
+        self._handler = handler
+
+        # Info dict of the generator function's call
+        self._info_dict = info_dict
+
+        #
+        self._resume_count = 0
+
+        #
+        self._total_elapsed = 0.0
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._resume(self._generator.__anext__)
+
+    def asend(self, value):
+        return self._resume(self._generator.asend, value)
+
+    def athrow(self, *args):
+        return self._resume(self._generator.athrow, *args)
+
+    def aclose(self):
+        return self._generator.aclose()
+
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    def __repr__(self):
+        return repr(self._generator)
+
+    async def _resume(self, resume_func, *resume_args):
+        # Import here because module `wrap` imports this module
+        from aoiktracecall.wrap import _call_handler
+        from aoiktracecall.wrap import ExceptionInfo
+
+        # Get time before handler work
+        enter_time = default_timer()
+
+        # Get callees' total time of the caller so far
+        child_time_base = child_time_get()
+
+        #
+        count = count_add(1)
+
+        #
+        level = level_add(1)
+
+        #
+        self._resume_count += 1
+
+        #
+        info_dict = self._info_dict.copy()
+
+        info_dict.update({
+            'trace_hook_type': 'gen_resume',
+            'level': level,
+            'count': count,
+            'resume_count': self._resume_count,
+        })
+
+        #
+        result_info_dict = info_dict.copy()
+
+        # If the handler is skipped because its breaker is open
+        if not _call_handler(self._handler, info_dict, 'generator resume'):
+            # Skip the yield or finish event too
+            result_info_dict = None
+
+        #
+        start_time = default_timer()
+
+        #
+        try:
+            #
+            yield_value = await resume_func(*resume_args)
+
+        except StopAsyncIteration:
+            #
+            self._finish(result_info_dict, start_time, None, _call_handler)
+
+            raise
+
+        except:
+            #
+            self._finish(
+                result_info_dict,
+                start_time,
+                ExceptionInfo(sys.exc_info()),
+                _call_handler,
+            )
+
+            raise
+
+        else:
+            #
+            elapsed = default_timer() - start_time
+
+            #
+            self._total_elapsed += elapsed
+
+            # If the resume event is handled
+            if result_info_dict is not None:
+                #
+                result_info_dict.update({
+                    'trace_hook_type': 'gen_yield',
+                    'yield_value': yield_value,
+                    'elapsed': elapsed,
+                })
+
+                #
+                _call_handler(
+                    self._handler,
+                    result_info_dict,
+                    'generator yield',
+                    check_breaker=False,
+                )
+
+            #
+            return yield_value
+
+        finally:
+            # Restore level
+            level_set(level - 1)
+
+            # Add the resume's time including handler work to the caller's
+            # callees' total time
+            child_time_set(child_time_base + (default_timer() - enter_time))
+
+    def _finish(self, result_info_dict, start_time, call_result, call_handler):
+        #
+        elapsed = default_timer() - start_time
+
+        #
+        self._total_elapsed += elapsed
+
+        # If the resume event is not handled
+        if result_info_dict is None:
+            return
+
+        #
+        result_info_dict.update({
+            'trace_hook_type': 'gen_finish',
+            'call_result': call_result,
+            'elapsed': elapsed,
+            'total_elapsed': self._total_elapsed,
+        })
+
+        #
+        call_handler(
+            self._handler,
+            result_info_dict,
+            'generator finish',
+            check_breaker=False,
+        )
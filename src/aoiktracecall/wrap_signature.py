@@ -0,0 +1,491 @@
+# coding: utf-8
+"""
+Wrappers generated with the same signature as the wrapped function.
+
+A generated wrapper binds arguments by name as part of the call, so the
+handler gets the bound arguments without inspecting the function's signature
+on each call, and the wrapper's own signature is correct.
+"""
+from __future__ import absolute_import
+
+# Standard imports
+from collections import OrderedDict
+import re
+from types import FunctionType
+
+# Internal imports
+from aoiktracecall.aoikinspectargs import ArgumentInfo
+from aoiktracecall.aoikinspectargs import ArgumentType
+from aoiktracecall.aoikinspectargs import InspectInfo
+from aoiktracecall.aoikinspectargs import ParameterType
+from aoiktracecall.util import copy_func_attrs
+
+
+# Code object flags, see `inspect.CO_VARARGS` and `inspect.CO_VARKEYWORDS`
+_CO_VARARGS = 0x04
+
+_CO_VARKEYWORDS = 0x08
+
+
+# Name of the generated wrapper's call function
+_CALL_NAME = '_aoiktracecall_call'
+
+
+# Identifier regex
+_IDENTIFIER_REGEX = re.compile(r'^[^\W\d]\w*$', re.UNICODE)
+
+
+class SignatureLayout(object):
+    """
+    Parameter layout of a function, read from its code object.
+
+    Bound argument values are in the layout's parameter order, i.e.
+    positional parameters, keyword-only parameters, variable-positional
+    parameter, variable-keyword parameter.
+    """
+
+    __slots__ = (
+        'posonly_names',
+        'poskwd_names',
+        'kwdonly_names',
+        'varpos_name',
+        'varkwd_name',
+        'names',
+    )
+
+    def __init__(self, code):
+        # Get positional-only parameter count, in Python 3.8+
+        posonly_count = getattr(code, 'co_posonlyargcount', 0)
+
+        # Get positional parameter count
+        pos_count = code.co_argcount
+
+        # Get keyword-only parameter count, in Python 3
+        kwdonly_count = getattr(code, 'co_kwonlyargcount', 0)
+
+        # Get parameter names
+        name_s = code.co_varnames
+
+        # Positional-only parameter names
+        self.posonly_names = name_s[:posonly_count]
+
+        # Positional-or-keyword parameter names, including positional-only
+        # parameter names
+        self.poskwd_names = name_s[:pos_count]
+
+        # Keyword-only parameter names
+        self.kwdonly_names = name_s[pos_count:pos_count + kwdonly_count]
+
+        # Get index of variable parameters
+        index = pos_count + kwdonly_count
+
+        # Variable-positional parameter name
+        if code.co_flags & _CO_VARARGS:
+            self.varpos_name = name_s[index]
+
+            index += 1
+        else:
+            self.varpos_name = None
+
+        # Variable-keyword parameter name
+        if code.co_flags & _CO_VARKEYWORDS:
+            self.varkwd_name = name_s[index]
+
+            index += 1
+        else:
+            self.varkwd_name = None
+
+        # All parameter names
+        self.names = name_s[:index]
+
+    def to_call_args(self, values):
+        """
+        Convert bound argument values to arguments to call the function with.
+
+        :param values: Bound argument values.
+
+        :return: Tuple of positional arguments tuple and keyword arguments \
+            dict.
+        """
+        # Get positional parameter count
+        pos_count = len(self.poskwd_names)
+
+        # Get positional arguments
+        args = values[:pos_count]
+
+        # Get keyword-only parameter count
+        kwdonly_count = len(self.kwdonly_names)
+
+        # Get keyword arguments
+        if kwdonly_count:
+            kwargs = dict(zip(
+                self.kwdonly_names,
+                values[pos_count:pos_count + kwdonly_count]
+            ))
+        else:
+            kwargs = {}
+
+        # Get index of variable parameters
+        index = pos_count + kwdonly_count
+
+        # If have variable-positional parameter
+        if self.varpos_name is not None:
+            # Add variable-positional arguments
+            args += values[index]
+
+            index += 1
+
+        # If have variable-keyword parameter
+        if self.varkwd_name is not None:
+            # Add variable-keyword arguments
+            kwargs.update(values[index])
+
+        # Return arguments
+        return args, kwargs
+
+
+class BoundArguments(object):
+    """
+    Arguments of a call bound by parameter name.
+
+    Dicts are created only when accessed.
+    """
+
+    __slots__ = ('layout', 'values')
+
+    def __init__(self, layout, values):
+        # SignatureLayout object
+        self.layout = layout
+
+        # Bound argument values in the layout's parameter order
+        self.values = values
+
+    @property
+    def arguments(self):
+        """
+        Ordered dict mapping parameter name to argument value, like \
+            `inspect.BoundArguments.arguments`.
+        """
+        return OrderedDict(zip(self.layout.names, self.values))
+
+    def to_inspect_info(self):
+        """
+        Convert to inspect info used by `printing_handler`.
+
+        :return: InspectInfo instance.
+        """
+        # Get layout
+        layout = self.layout
+
+        # Get values
+        values = self.values
+
+        # Map fixed argument name to argument info
+        fixed_arg_infos = OrderedDict()
+
+        # Variable-positional argument info list
+        varpos_arg_infos = []
+
+        # Map variable-keyword argument name to argument info
+        varkwd_arg_infos = {}
+
+        # Get positional-only parameter count
+        posonly_count = len(layout.posonly_names)
+
+        # For each positional parameter
+        for pos_index, name in enumerate(layout.poskwd_names):
+            #
+            fixed_arg_infos[name] = ArgumentInfo(
+                name=name,
+                value=values[pos_index],
+                type=ArgumentType.POSITIONAL,
+                pos_index=pos_index,
+                param_type=(
+                    ParameterType.POSITIONAL_ONLY
+                    if pos_index < posonly_count else
+                    ParameterType.POSITIONAL_OR_KEYWORD
+                ),
+            )
+
+        # Get index of keyword-only parameters
+        index = len(layout.poskwd_names)
+
+        # For each keyword-only parameter
+        for name in layout.kwdonly_names:
+            #
+            fixed_arg_infos[name] = ArgumentInfo(
+                name=name,
+                value=values[index],
+                type=ArgumentType.KEYWORD_ONLY,
+                param_type=ParameterType.KEYWORD_ONLY,
+            )
+
+            index += 1
+
+        # If have variable-positional parameter
+        if layout.varpos_name is not None:
+            # For each variable-positional argument
+            for varpos_index, value in enumerate(values[index]):
+                #
+                varpos_arg_infos.append(ArgumentInfo(
+                    name=None,
+                    value=value,
+                    type=ArgumentType.VAR_POSITIONAL,
+                    varpos_index=varpos_index,
+                    param_type=ParameterType.VAR_POSITIONAL,
+                ))
+
+            index += 1
+
+        # If have variable-keyword parameter
+        if layout.varkwd_name is not None:
+            # For each variable-keyword argument
+            for name, value in values[index].items():
+                #
+                varkwd_arg_infos[name] = ArgumentInfo(
+                    name=name,
+                    value=value,
+                    type=ArgumentType.VAR_KEYWORD,
+                    param_type=ParameterType.VAR_KEYWORD,
+                )
+
+        # Return inspect info
+        return InspectInfo({
+            InspectInfo.K_POSKWD_PARAM_NAMES: list(layout.poskwd_names),
+            InspectInfo.K_KWDONLY_PARAM_NAMES: list(layout.kwdonly_names),
+            InspectInfo.K_VARPOS_PARAM_NAME: layout.varpos_name,
+            InspectInfo.K_VARKWD_PARAM_NAME: layout.varkwd_name,
+            InspectInfo.K_FIXED_ARG_INFOS: fixed_arg_infos,
+            InspectInfo.K_VARPOS_ARG_INFOS: varpos_arg_infos,
+            InspectInfo.K_VARKWD_ARG_INFOS: varkwd_arg_infos,
+            InspectInfo.K_DUPKWD_ARG_INFOS: {},
+            InspectInfo.K_MISSING_ARG_INFOS: OrderedDict(),
+        })
+
+
+# Map code object to tuple of SignatureLayout object and wrapper factory
+# function, or None if the code object's signature is not supported
+_MAP_CODE_TO_FACTORY_INFO = {}
+
+
+def _create_factory_info(code):
+    # Get layout
+    layout = SignatureLayout(code)
+
+    # Get parameter names
+    name_s = layout.names
+
+    # For each parameter name
+    for name in name_s:
+        # If the name is not identifier, e.g. Python 2's tuple parameter, or
+        # the name conflicts with the call function's name
+        if not _IDENTIFIER_REGEX.match(name) or name == _CALL_NAME:
+            # Not supported
+            return None
+
+    # Parameter text list
+    param_text_s = []
+
+    # Get positional-only parameter count
+    posonly_count = len(layout.posonly_names)
+
+    # For each positional parameter
+    for pos_index, name in enumerate(layout.poskwd_names):
+        #
+        param_text_s.append(name)
+
+        # If is the last positional-only parameter
+        if pos_index + 1 == posonly_count:
+            #
+            param_text_s.append('/')
+
+    # If have variable-positional parameter
+    if layout.varpos_name is not None:
+        #
+        param_text_s.append('*' + layout.varpos_name)
+
+    # If have keyword-only parameters but no variable-positional parameter
+    elif layout.kwdonly_names:
+        #
+        param_text_s.append('*')
+
+    # Add keyword-only parameters
+    param_text_s.extend(layout.kwdonly_names)
+
+    # If have variable-keyword parameter
+    if layout.varkwd_name is not None:
+        #
+        param_text_s.append('**' + layout.varkwd_name)
+
+    # Get bound values text.
+    # Trailing comma makes one-value tuple.
+    values_text = ''.join(name + ', ' for name in name_s)
+
+    # Get factory code.
+    # The wrapper's name is set after creation.
+    source = (
+        'def factory({call_name}):\n'
+        '    def wrapper({params}):\n'
+        '        return {call_name}(({values}))\n'
+        '    return wrapper\n'
+    ).format(
+        call_name=_CALL_NAME,
+        params=', '.join(param_text_s),
+        values=values_text,
+    )
+
+    # Namespace to run the code in
+    namespace = {}
+
+    # Run the code to define factory function
+    exec(compile(source, '<aoiktracecall wrapper {}>'.format(
+        code.co_name), 'exec'), namespace)
+
+    # Return factory info
+    return layout, namespace['factory']
+
+
+def get_factory_info(func):
+    """
+    Get signature layout and wrapper factory for given function, cached by \
+        code object.
+
+    :param func: Function.
+
+    :return: Tuple of SignatureLayout object and wrapper factory function, \
+        or None if the function is not supported.
+    """
+    # If is not plain function
+    if not isinstance(func, FunctionType):
+        return None
+
+    # Get code object
+    code = func.__code__
+
+    # Get factory info
+    factory_info = _MAP_CODE_TO_FACTORY_INFO.get(code, False)
+
+    # If factory info is not created
+    if factory_info is False:
+        # Create factory info
+        factory_info = _create_factory_info(code)
+
+        # Cache factory info
+        _MAP_CODE_TO_FACTORY_INFO[code] = factory_info
+
+    # Return factory info
+    return factory_info
+
+
+def create_signature_wrapper(
+    func,
+    state,
+    pre_call,
+    post_call,
+    handle_exception,
+    generator_type=None,
+):
+    """
+    Create wrapper with the same signature as given function.
+
+    The created wrapper reports the call like a plain wrapper, with info dict
+    key `bound_args` set to a `BoundArguments` object.
+
+    :param func: Function.
+
+    :param state: Wrapper state, see `wrap.WrapState`.
+
+    :param pre_call: Pre-call event function, see `wrap._handle_pre_call`.
+
+    :param post_call: Post-call event function, see `wrap._handle_post_call`.
+
+    :param handle_exception: Function creating call result for the exception \
+        being handled, see `wrap._handle_exception`.
+
+    :param generator_type: Generator proxy type, or None if not need trace \
+        generator resumes.
+
+    :return: Wrapper function, or None if the function is not supported.
+    """
+    # Get factory info
+    factory_info = get_factory_info(func)
+
+    # If the function is not supported
+    if factory_info is None:
+        return None
+
+    # Get layout and factory
+    layout, factory = factory_info
+
+    # Get argument conversion function
+    to_call_args = layout.to_call_args
+
+    #
+    def call_func(values):
+        # Get arguments to call the function with
+        args, kwargs = to_call_args(values)
+
+        #
+        binding = state.binding
+
+        # If the wrapper is disarmed
+        if binding is None:
+            # Call the function directly
+            return func(*args, **kwargs)
+
+        #
+        info, handler = binding
+
+        #
+        level, return_info_dict, timing = pre_call(
+            info,
+            func,
+            handler,
+            args,
+            kwargs,
+            bound_args=BoundArguments(layout, values),
+        )
+
+        try:
+            #
+            call_result = func(*args, **kwargs)
+
+            #
+            if generator_type is not None and return_info_dict is not None:
+                call_result = generator_type(
+                    call_result, info, handler, return_info_dict.copy()
+                )
+        except:
+            # If the call is not skipped because it is hidden, see
+            # `wrap._skip_pre_call`
+            if timing is not None:
+                call_result = handle_exception(info, level)
+            else:
+                call_result = None
+
+            raise
+        finally:
+            #
+            post_call(
+                info, handler, level, return_info_dict, call_result, timing
+            )
+
+        #
+        return call_result
+
+    # Create wrapper
+    new_func = factory(call_func)
+
+    # Copy name, defaults, etc.
+    copy_func_attrs(func, new_func, attr_names=(
+        '__module__',
+        '__name__',
+        '__qualname__',
+        '__doc__',
+        '__defaults__',
+        '__kwdefaults__',
+        '__annotations__',
+    ))
+
+    # Return wrapper
+    return new_func